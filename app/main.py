@@ -7,9 +7,12 @@ from PyQt6.QtWidgets import QApplication
 from presenter.main_presenter import Presenter
 from view.main_window import MainWindow
 from model.camera import CameraDevice, VideoRecorder
+from model.logger import configure_logging, get_logger
 
 
 if __name__ == "__main__":
+    configure_logging(trace="--trace" in sys.argv)
+    log = get_logger("main")
     app = QApplication(sys.argv)
     
     # Initialize main window
@@ -22,9 +25,9 @@ if __name__ == "__main__":
             'camera': CameraDevice(camera_type="Webcam"),
             'video_recorder': VideoRecorder()
         }
-        print("相機模組初始化成功")
+        log.info("相機模組初始化成功")
     except Exception as e:
-        print(f"相機模組初始化失敗: {str(e)}")
+        log.error("相機模組初始化失敗: %s", e)
         camera_model = None
     
     # Initialize presenter with model and view
@@ -0,0 +1,296 @@
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from .frame_bus import COLOR_BGR, COLOR_GRAY
+from .logger import get_logger
+from .quality import QualityMeter
+from .telemetry import LatencyTracker, RateMeter
+from .workers import WORKER_NICENESS, init_worker
+
+
+log = get_logger("analysis")
+
+
+def _lower_thread_priority():
+    # Linux 的 nice 值以執行緒為單位；其他平台會影響整個行程，因此略過
+    if sys.platform.startswith('linux') and hasattr(threading, 'get_native_id'):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), WORKER_NICENESS)
+        except OSError:
+            pass
+
+
+class AnalysisPlugin:
+    """Base class of real-time frame analysis plugins.
+
+    Subclasses set ``name`` (and a display ``title``) and implement
+    ``process(frame)``, returning a dict of result values. The class
+    attributes declare what the plugin needs from the frame bus: at most
+    ``max_fps`` frames per second (None for every frame), reduced to fit
+    ``max_size``, in ``color`` format. ``budget_ms`` is the CPU time the
+    plugin may use per frame; when it takes longer, the following frames
+    are skipped to keep its CPU share bounded. Plugins with ``use_process`` run on a separate
+    process pool and must then be stateless and picklable.
+    """
+
+    name = "analysis"
+    title = None
+    max_fps = 5
+    max_size = (640, 480)
+    color = COLOR_BGR
+    budget_ms = 50
+    use_process = False
+
+    def start(self):
+        """Called on the worker thread before the first frame."""
+
+    def process(self, frame):
+        raise NotImplementedError
+
+    def stop(self):
+        """Called on the worker thread after the last frame."""
+
+    def describe(self, result):
+        """One-line text of a result for the analysis tab."""
+        parts = []
+        for key, value in result.items():
+            parts.append(f"{key}: {value:.3g}" if isinstance(value, float) else f"{key}: {value}")
+        return ", ".join(parts)
+
+
+# 已註冊的分析模組 (名稱 → 類別)
+PLUGINS = {}
+
+
+def register_plugin(plugin_class):
+    """Make a plugin class available to AnalysisPipeline (usable as a decorator)."""
+    PLUGINS[plugin_class.name] = plugin_class
+    return plugin_class
+
+
+@register_plugin
+class FrameStatsPlugin(AnalysisPlugin):
+    """Mean, spread and range of the luminance."""
+
+    name = "frame_stats"
+    title = "亮度統計"
+    max_fps = 10
+    max_size = (320, 240)
+    color = COLOR_GRAY
+    budget_ms = 5
+
+    def process(self, frame):
+        mean, std = cv2.meanStdDev(frame.image)
+        low, high, _, _ = cv2.minMaxLoc(frame.image)
+        return {'mean': float(mean[0, 0]), 'std': float(std[0, 0]), 'min': int(low), 'max': int(high)}
+
+
+@register_plugin
+class ImageQualityPlugin(AnalysisPlugin):
+    """Sharpness, exposure, clipping and motion of every frame (see QualityMeter)."""
+
+    name = "image_quality"
+    title = "影像品質"
+    max_fps = None
+    max_size = (480, 270)
+    color = COLOR_GRAY
+    budget_ms = 3
+
+    def start(self):
+        self.meter = QualityMeter()
+
+    def process(self, frame):
+        return self.meter.measure(frame.image)
+
+    def describe(self, result):
+        return (f"清晰度 {result['sharpness']:.0f}, 曝光 {result['exposure']:+.2f}, "
+                f"欠曝 {result['underexposed']:.1%}, 過曝 {result['overexposed']:.1%}, "
+                f"動態 {result['motion']:.1f}")
+
+
+class AnalysisStage:
+    """Run one plugin on its own low-priority thread, fed by a FrameBus subscription.
+
+    The subscription queue holds a single frame, so a plugin that falls
+    behind only ever sees the newest frame; frames it never picked up are
+    counted as ``dropped``, frames skipped after exceeding the latency
+    budget as ``skipped``. ``on_result(name, frame, result)`` is called on
+    the stage thread with the frame's metadata (its image already released).
+    """
+
+    def __init__(self, plugin, bus, on_result=None, executor=None):
+        self.plugin = plugin
+        self.bus = bus
+        self.on_result = on_result
+        self.executor = executor
+        self.subscription = None
+        self.last_result = None
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.budget_overruns = 0
+        self.errors = 0
+        self.rate = RateMeter()
+        self.latency = LatencyTracker()
+        self._skip = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        plugin = self.plugin
+        self.subscription = self.bus.subscribe(
+            f"analysis:{plugin.name}", plugin.max_fps, plugin.max_size, plugin.color, queue_size=1
+        )
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"analysis-{plugin.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self.subscription.close()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        _lower_thread_priority()
+        subscription = self.subscription
+        try:
+            self.plugin.start()
+        except Exception as e:
+            log.error("Analysis plugin %s failed to start: %s", self.plugin.name, e)
+            return
+        if self.executor is not None:
+            # 先等待工作行程啟動，啟動時間不計入第一格的處理時間
+            try:
+                self.executor.submit(int).result()
+            except Exception as e:
+                log.error("Analysis plugin %s worker failed to start: %s", self.plugin.name, e)
+                return
+        budget = self.plugin.budget_ms / 1000.0
+        # 預算以本執行緒的 CPU 時間計算，低優先權執行緒被搶占的時間不算超時；
+        # 行程池模式只能以等待時間計算
+        clock = time.perf_counter if self.executor is not None else time.thread_time
+        while not self._stop_event.is_set():
+            frame = subscription.get(0.2)
+            if frame is None:
+                continue
+            if self._skip > 0:
+                self._skip -= 1
+                self.frames_skipped += 1
+                subscription.release(frame)
+                continue
+            start = time.perf_counter()
+            cpu_start = clock()
+            metadata = frame.with_image(None)
+            try:
+                if self.executor is not None:
+                    result = self.executor.submit(self.plugin.process, frame).result()
+                else:
+                    result = self.plugin.process(frame)
+            except Exception as e:
+                self.errors += 1
+                log.error("Analysis plugin %s error: %s", self.plugin.name, e)
+                continue
+            finally:
+                # 行程池模式下需等結果回來才能歸還，影格已在送出時序列化
+                subscription.release(frame)
+            self.latency.add(time.perf_counter() - start)
+            self.rate.mark()
+            self.frames_processed += 1
+            used = clock() - cpu_start
+            if budget and used > budget:
+                self.budget_overruns += 1
+                self._skip = math.ceil(used / budget) - 1
+            self.last_result = result
+            if self.on_result is not None:
+                self.on_result(self.plugin.name, metadata, result)
+        try:
+            self.plugin.stop()
+        except Exception as e:
+            log.error("Analysis plugin %s failed to stop: %s", self.plugin.name, e)
+
+    def get_stats(self):
+        subscription = self.subscription
+        return {
+            'processed': self.frames_processed,
+            'skipped': self.frames_skipped,
+            'dropped': subscription.frames_dropped if subscription else 0,
+            'overruns': self.budget_overruns,
+            'errors': self.errors,
+            'fps': self.rate.rate(),
+            'latency_ms': self.latency.percentiles((50, 95)),
+        }
+
+
+class AnalysisPipeline:
+    """The registered analysis plugins, each enabled or disabled independently.
+
+    Enabled plugins run as ``AnalysisStage`` threads on subsampled frames
+    from ``bus``; plugins with ``use_process`` share a small process pool.
+    Nothing here can slow capture or recording: the bus never blocks the
+    publisher and stale frames are dropped per plugin.
+    """
+
+    def __init__(self, bus, plugins=None, on_result=None, processes=1):
+        self.bus = bus
+        self.on_result = on_result
+        self.processes = processes
+        self.plugins = plugins if plugins is not None else [cls() for cls in PLUGINS.values()]
+        self.stages = {}
+        self._executor = None
+
+    def _executor_for(self, plugin):
+        if not plugin.use_process:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker
+            )
+        return self._executor
+
+    def plugin(self, name):
+        return next((plugin for plugin in self.plugins if plugin.name == name), None)
+
+    def set_enabled(self, name, enabled):
+        plugin = self.plugin(name)
+        if plugin is None:
+            raise ValueError(f"Unknown analysis plugin: {name}")
+        stage = self.stages.get(name)
+        if enabled and stage is None:
+            stage = AnalysisStage(plugin, self.bus, self.on_result, self._executor_for(plugin))
+            self.stages[name] = stage
+            stage.start()
+            log.info("Analysis plugin %s enabled", name)
+        elif not enabled and stage is not None:
+            stage.stop()
+            del self.stages[name]
+            log.info("Analysis plugin %s disabled", name)
+
+    def is_enabled(self, name):
+        return name in self.stages
+
+    def results(self):
+        return {name: stage.last_result for name, stage in self.stages.items()}
+
+    def get_stats(self):
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
+
+    def stop(self):
+        for name in list(self.stages):
+            self.set_enabled(name, False)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
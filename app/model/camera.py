@@ -1,24 +1,188 @@
+import os
+import time
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 
+from .capture import CaptureWorker
+from .encoder import (
+    BACKPRESSURE_BLOCK,
+    BACKPRESSURE_DROP_OLDEST,
+    BACKPRESSURE_POLICIES,
+    EncoderWorker,
+    FrameQueue,
+    RepeatedFrame,
+    unpack_item,
+)
+from .frame import Frame, frame_image
+from .frame_bus import FrameBus
+from .frame_pool import CAPTURE_RING_FRAMES, DEFAULT_POOL_SIZE, ENCODER_QUEUE_FRAMES, FramePool
+from .logger import get_logger
+from .mode_cache import CameraModeCache
+from .pacing import FramePacer
+from .segments import SegmentedWriter
+from .video_codecs import DEFAULT_CODEC, fourcc_to_str, get_codec
+from .sources import ImageFolderCamera, SyntheticCamera, VideoFileCamera
+
+
+log = get_logger("camera")
+
 # 嘗試導入 pyrealsense2，如果失敗則設為 None
 try:
     import pyrealsense2 as rs
 except ImportError:
     rs = None
-    print("Warning: pyrealsense2 not installed. RealSense camera will not be available.")
+    log.warning("pyrealsense2 not installed. RealSense camera will not be available.")
 
 
 class WebcamCamera:
-    def __init__(self, camera_index=0):
+    # 探測支援模式時嘗試的解析度與像素格式
+    CANDIDATE_RESOLUTIONS = [
+        (3840, 2160), (2560, 1440), (1920, 1080), (1600, 1200),
+        (1280, 720), (1024, 768), (800, 600), (640, 480), (320, 240),
+    ]
+    CANDIDATE_FORMATS = ["MJPG", "YUYV"]
+
+    def __init__(self, camera_index=0, pool_size=DEFAULT_POOL_SIZE, mode_cache=None):
         self.camera_index = camera_index
         self.capture = None
+        self.pool_size = pool_size
+        self.frame_pool = None
+        # 最近一格的 (裝置時間 ms, 裝置序號)，由擷取執行緒讀取
+        self.last_frame_meta = (None, None)
+        self.mode_cache = mode_cache if mode_cache is not None else CameraModeCache()
+        # 要求的模式 (None 表示使用裝置預設值) 與實際取得的模式
+        self.requested_mode = None
+        self.width = None
+        self.height = None
+        self.fps = None
+        self.pixel_format = None
 
     def start(self):
         if self.capture is None:
             self.capture = cv2.VideoCapture(self.camera_index)
         else:
             self.capture.open(self.camera_index)
+        
+        # 裝置無法開啟時不讀取模式，未開啟的 VideoCapture 會回報 -1
+        if not self.capture.isOpened():
+            log.warning("Webcam %s could not be opened", self.camera_index)
+            return
+        
+        if self.requested_mode is not None:
+            self._apply_mode(self.requested_mode)
+        self._read_granted_mode()
+        
+        # 依協商後的解析度配置影格緩衝區
+        if self.width and self.height:
+            self._ensure_pool((self.height, self.width, 3))
+
+    def configure(self, width, height, fps=None, pixel_format=None):
+        """Request a capture mode; applied now if the device is open, else on start.
+
+        Returns:
+            dict of the mode the driver actually granted (or the request if closed)
+        """
+        self.requested_mode = {
+            'width': width, 'height': height, 'fps': fps, 'format': pixel_format
+        }
+        if self.capture is not None and self.capture.isOpened():
+            self._apply_mode(self.requested_mode)
+            self._read_granted_mode()
+            if self.width and self.height:
+                self._ensure_pool((self.height, self.width, 3))
+            return self.get_mode()
+        return dict(self.requested_mode)
+
+    def get_mode(self):
+        return {
+            'width': self.width, 'height': self.height,
+            'fps': self.fps, 'format': self.pixel_format
+        }
+
+    def _apply_mode(self, mode):
+        # 像素格式須先設定，部分驅動程式會依格式限制可用的解析度
+        if mode.get('format'):
+            self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['format']))
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+        if mode.get('fps'):
+            self.capture.set(cv2.CAP_PROP_FPS, mode['fps'])
+
+    def _read_granted_mode(self):
+        # 驅動程式以 0 或 -1 表示未知，一律視為 None
+        width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = round(self.capture.get(cv2.CAP_PROP_FPS), 2)
+        self.width = width if width > 0 else None
+        self.height = height if height > 0 else None
+        self.fps = fps if fps > 0 else None
+        self.pixel_format = fourcc_to_str(self.capture.get(cv2.CAP_PROP_FOURCC)) or None
+        requested = self.requested_mode
+        if requested and (self.width, self.height) != (requested['width'], requested['height']):
+            log.warning("Webcam granted %sx%s instead of %sx%s", self.width, self.height,
+                        requested['width'], requested['height'])
+
+    def _cache_key(self):
+        backend = ""
+        if self.capture is not None and self.capture.isOpened():
+            try:
+                backend = self.capture.getBackendName()
+            except cv2.error:
+                pass
+        return f"webcam:{backend or 'default'}:{self.camera_index}"
+
+    def get_supported_modes(self, refresh=False):
+        """Return the modes the device really supports, probing once and caching on disk."""
+        was_open = self.capture is not None and self.capture.isOpened()
+        if not was_open:
+            self.capture = cv2.VideoCapture(self.camera_index)
+            if not self.capture.isOpened():
+                return []
+        key = self._cache_key()
+        modes = None if refresh else self.mode_cache.get(key)
+        if modes is None:
+            modes = self._probe_modes()
+            if modes:
+                self.mode_cache.put(key, modes)
+        # 探測會改變裝置模式，結束後恢復原狀
+        if was_open:
+            if self.requested_mode is not None:
+                self._apply_mode(self.requested_mode)
+            self._read_granted_mode()
+        else:
+            self.capture.release()
+        return modes
+
+    def _probe_modes(self):
+        modes = []
+        seen = set()
+        for pixel_format in self.CANDIDATE_FORMATS:
+            for width, height in self.CANDIDATE_RESOLUTIONS:
+                self._apply_mode({'width': width, 'height': height, 'fps': 60, 'format': pixel_format})
+                granted_format = fourcc_to_str(self.capture.get(cv2.CAP_PROP_FOURCC))
+                mode = {
+                    'width': int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    'height': int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    'fps': round(self.capture.get(cv2.CAP_PROP_FPS), 2),
+                    'format': granted_format or pixel_format,
+                }
+                # 只保留驅動程式確實接受的組合
+                if (mode['width'], mode['height']) != (width, height):
+                    continue
+                if granted_format and granted_format != pixel_format:
+                    continue
+                key = (mode['width'], mode['height'], mode['format'])
+                if key not in seen:
+                    seen.add(key)
+                    modes.append(mode)
+        modes.sort(key=lambda m: (m['width'] * m['height'], m['fps']), reverse=True)
+        return modes
+
+    def _ensure_pool(self, shape):
+        if self.frame_pool is None or not self.frame_pool.matches(shape):
+            self.frame_pool = FramePool(shape, np.uint8, self.pool_size)
 
     def stop(self):
         if self.capture:
@@ -27,37 +191,95 @@ class WebcamCamera:
     def get_frame(self):
         if self.capture is None:
             return None
-        ret, frame = self.capture.read()
+        buffer = self.frame_pool.acquire() if self.frame_pool else None
+        ret, frame = self.capture.read(buffer)
         if not ret:
+            self.release_frame(buffer)
             return None
+        if frame is not buffer:
+            # OpenCV 重新配置了影格 (解析度改變)，依新尺寸重建緩衝池
+            self.release_frame(buffer)
+            self._ensure_pool(frame.shape)
+        # V4L2/MSMF 後端回報驅動程式的影格時間戳記
+        self.last_frame_meta = (self.capture.get(cv2.CAP_PROP_POS_MSEC) or None, None)
         return frame
+
+    def release_frame(self, frame):
+        if self.frame_pool:
+            self.frame_pool.release(frame)
     
     def release(self):
         self.stop()
 
 
 class RealSenseCamera:
-    def __init__(self, width=640, height=480, fps=30):
+    """Intel RealSense color camera with optional depth and infrared streams.
+
+    With ``enable_depth`` the depth stream (z16) is aligned to the color
+    stream by ``rs.align`` and delivered with each color frame through
+    ``last_frame_extras['depth']`` (uint16, units of ``depth_scale`` meters);
+    ``enable_infrared`` adds ``last_frame_extras['infrared']`` (uint8, left
+    imager, at the sensor's own resolution). Depth and infrared run at a
+    resolution librealsense picks for the requested fps. ``intrinsics`` describes the color stream, which the aligned
+    depth shares. ``serial`` selects one unit when several are connected.
+    """
+
+    def __init__(self, width=640, height=480, fps=30, pool_size=DEFAULT_POOL_SIZE,
+                 enable_depth=False, enable_infrared=False, serial=None):
         if rs is None:
             raise ImportError("pyrealsense2 is not installed")
         
         self.pipeline = rs.pipeline()
         self.config = rs.config()
+        if serial:
+            self.config.enable_device(serial)
+        self.serial = serial
         self.config.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)
+        # 深度與紅外線感測器不支援所有彩色解析度 (如 1920x1080)，由 librealsense 選擇
+        # 同幀率下的解析度；深度再經 align 重新取樣為彩色影像大小
+        if enable_depth:
+            self.config.enable_stream(rs.stream.depth, rs.format.z16, fps)
+        if enable_infrared:
+            self.config.enable_stream(rs.stream.infrared, 1, rs.format.y8, fps)
+        # 深度對齊到彩色影像，像素座標可直接對應
+        self.align = rs.align(rs.stream.color) if enable_depth else None
+        self.enable_depth = enable_depth
+        self.enable_infrared = enable_infrared
         self.width = width
         self.height = height
         self.fps = fps
+        self.pool_size = pool_size
+        self.frame_pool = FramePool((height, width, 3), np.uint8, pool_size)
+        self.last_frame_meta = (None, None)
+        self.last_frame_extras = None
+        self.depth_scale = None
+        self.intrinsics = None
 
     def reset(self, width=640, height=480, fps=30):
         self.stop()
-        self.__init__(width, height, fps)
+        self.__init__(width, height, fps, self.pool_size, self.enable_depth, self.enable_infrared, self.serial)
+
+    def set_streams(self, depth=False, infrared=False):
+        """Enable or disable the depth and infrared streams (takes effect on the next start)."""
+        self.stop()
+        self.__init__(self.width, self.height, self.fps, self.pool_size, depth, infrared, self.serial)
 
     def start(self):
         try:
-            self.pipeline.start(self.config)
+            profile = self.pipeline.start(self.config)
         except Exception as e:
-            print(f"Error starting RealSense camera: {e}")
+            log.error("Error starting RealSense camera: %s", e)
             raise
+        color_profile = profile.get_stream(rs.stream.color).as_video_stream_profile()
+        intrinsics = color_profile.get_intrinsics()
+        self.intrinsics = {
+            'width': intrinsics.width, 'height': intrinsics.height,
+            'fx': intrinsics.fx, 'fy': intrinsics.fy,
+            'ppx': intrinsics.ppx, 'ppy': intrinsics.ppy,
+            'model': str(intrinsics.model), 'coeffs': list(intrinsics.coeffs),
+        }
+        if self.enable_depth:
+            self.depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
 
     def stop(self):
         try:
@@ -66,26 +288,91 @@ class RealSenseCamera:
             pass
 
     def get_frame(self):
+        frame = None
         try:
             frames = self.pipeline.wait_for_frames()
+            if self.align is not None:
+                frames = self.align.process(frames)
             color_frame = frames.get_color_frame()
             if not color_frame:
                 return None
-            frame = np.asanyarray(color_frame.get_data())
+            # 深度與紅外線影格較小，直接複製一份讓 librealsense 回收原影格
+            extras = None
+            if self.enable_depth or self.enable_infrared:
+                extras = {}
+                depth_frame = frames.get_depth_frame() if self.enable_depth else None
+                if depth_frame:
+                    extras['depth'] = np.array(depth_frame.get_data(), dtype=np.uint16)
+                infrared_frame = frames.get_infrared_frame(1) if self.enable_infrared else None
+                if infrared_frame:
+                    extras['infrared'] = np.array(infrared_frame.get_data(), dtype=np.uint8)
+            # 複製到預先配置的緩衝區，讓 librealsense 可立即回收其影格
+            frame = self.frame_pool.acquire()
+            np.copyto(frame, np.asanyarray(color_frame.get_data()))
+            self.last_frame_meta = (color_frame.get_timestamp(), color_frame.get_frame_number())
+            self.last_frame_extras = extras
             return frame
-        except:
+        except Exception as e:
+            # 已取得的緩衝區須歸還，否則每次錯誤都會少一個位置
+            if frame is not None:
+                self.frame_pool.release(frame)
+            log.debug("RealSense frame error: %s", e)
             return None
+
+    def release_frame(self, frame):
+        self.frame_pool.release(frame)
+
+    def get_mode(self):
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'format': 'BGR8'}
+
+    def get_supported_modes(self, refresh=False):
+        """List the BGR8 color profiles reported by the connected device."""
+        modes = []
+        seen = set()
+        try:
+            for device in rs.context().query_devices():
+                for sensor in device.query_sensors():
+                    for profile in sensor.get_stream_profiles():
+                        if profile.stream_type() != rs.stream.color or profile.format() != rs.format.bgr8:
+                            continue
+                        video_profile = profile.as_video_stream_profile()
+                        key = (video_profile.width(), video_profile.height(), profile.fps())
+                        if key not in seen:
+                            seen.add(key)
+                            modes.append({
+                                'width': key[0], 'height': key[1], 'fps': key[2], 'format': 'BGR8'
+                            })
+        except Exception as e:
+            log.warning("Error querying RealSense modes: %s", e)
+        modes.sort(key=lambda m: (m['width'] * m['height'], m['fps']), reverse=True)
+        return modes
     
     def release(self):
         self.stop()
 
 
+# 以檔案為來源的相機類型，需先以 set_source_path 指定路徑
+FILE_CAMERA_TYPES = ("Video File", "Image Folder")
+
+
+def list_realsense_serials():
+    """Serial numbers of the connected RealSense devices."""
+    if rs is None:
+        return []
+    try:
+        return [device.get_info(rs.camera_info.serial_number) for device in rs.context().query_devices()]
+    except Exception as e:
+        log.warning("Error querying RealSense devices: %s", e)
+        return []
+
+
 class CameraDevice:
     def __init__(self, camera_type="Webcam"):
         # 動態設定可用的相機類型
         self.camera_types = ["Webcam"]
         if rs is not None:
             self.camera_types.append("RealSense")
+        self.camera_types.extend(["Video File", "Image Folder", "Synthetic"])
         
         # Initialize cameras lazily
         self.camera_devices = {
@@ -93,45 +380,256 @@ class CameraDevice:
         }
         if rs is not None:
             self.camera_devices["RealSense"] = None
+        for source_type in ("Video File", "Image Folder", "Synthetic"):
+            self.camera_devices[source_type] = None
+        
+        # 檔案來源的路徑與播放方式 (True: 依原始時序, False: 盡可能快)
+        self.source_paths = {}
+        self.replay_realtime = True
         
         self.camera_type = camera_type
         self.camera = None
+        # 每個相機各自擁有一個擷取執行緒
+        self.capture_workers = {}
+        self.buffer_size = CAPTURE_RING_FRAMES
+        self._on_frame = None
+        # 與目前相機同時擷取的其他相機 (多相機同步)
+        self.sync_camera_types = []
+        # 切換後仍保持串流的待命相機 (依最近使用排序)，最多 standby_limit 台
+        self.standby_limit = 0
+        self._standby = OrderedDict()
+        # 目前相機的影格發布給其他使用者 (分析、快照等)，各自依需求取得
+        self.frame_bus = FrameBus(retain=self.retain_frame, release=self.release_frame)
+        # 第一台 RealSense 的序號 (多台連接時由 discover_cameras 設定)
+        self._realsense_serial = None
         self._initialize_camera(camera_type)
 
     def _initialize_camera(self, camera_type):
+        camera_type = self._ensure_camera(camera_type)
+        self.camera = self.camera_devices[camera_type]
+        self.camera_type = camera_type
+
+    def _ensure_camera(self, camera_type):
+        """Create the camera of a type if needed; returns the type actually available."""
         if camera_type not in self.camera_types:
             # 如果指定的相機類型不可用，使用 Webcam
-            print(f"Camera type {camera_type} not available, using Webcam instead")
+            log.warning("Camera type %s not available, using Webcam instead", camera_type)
             camera_type = "Webcam"
         
         # Create camera instance if not exists
         if self.camera_devices[camera_type] is None:
             if camera_type == "Webcam":
                 self.camera_devices[camera_type] = WebcamCamera()
+            elif camera_type == "Video File":
+                self.camera_devices[camera_type] = VideoFileCamera(
+                    self.source_paths.get(camera_type), realtime=self.replay_realtime
+                )
+            elif camera_type == "Image Folder":
+                self.camera_devices[camera_type] = ImageFolderCamera(
+                    self.source_paths.get(camera_type), realtime=self.replay_realtime
+                )
+            elif camera_type == "Synthetic":
+                self.camera_devices[camera_type] = SyntheticCamera()
             else:  # RealSense
                 try:
-                    self.camera_devices[camera_type] = RealSenseCamera()
+                    self.camera_devices[camera_type] = RealSenseCamera(serial=self._realsense_serial)
                 except:
                     # Fallback to webcam if RealSense is not available
-                    print("RealSense camera not available, falling back to Webcam")
+                    log.warning("RealSense camera not available, falling back to Webcam")
                     camera_type = "Webcam"
                     if self.camera_devices["Webcam"] is None:
                         self.camera_devices["Webcam"] = WebcamCamera()
-        
-        self.camera = self.camera_devices[camera_type]
-        self.camera_type = camera_type
+        return camera_type
+
+    def set_source_path(self, camera_type, path, realtime=None):
+        """Select the file or folder replayed by a file-backed camera type.
+
+        Args:
+            camera_type: "Video File" or "Image Folder"
+            path: video file or directory of frames
+            realtime: replay at the original timing (True) or as fast as possible
+        """
+        if camera_type not in FILE_CAMERA_TYPES:
+            raise ValueError(f"Camera type {camera_type} does not use a source path")
+        if realtime is not None:
+            self.replay_realtime = realtime
+        if camera_type in self.capturing_types() and self.is_capturing():
+            raise RuntimeError("Stop capturing before changing the source path")
+        self.source_paths[camera_type] = path
+        if camera_type in self._standby:
+            self._stop_standby(camera_type)
+        # 下次切換時依新路徑重新建立
+        camera = self.camera_devices.get(camera_type)
+        if camera is not None:
+            camera.release()
+            self.camera_devices[camera_type] = None
+            self.capture_workers.pop(camera_type, None)
+            if camera_type == self.camera_type:
+                self._initialize_camera(camera_type)
+
+    def set_replay_realtime(self, realtime):
+        """Switch file-backed cameras between original timing and as fast as possible."""
+        self.replay_realtime = realtime
+        for camera_type in FILE_CAMERA_TYPES:
+            camera = self.camera_devices.get(camera_type)
+            if camera is not None:
+                camera.realtime = realtime
+
+    def register_camera(self, camera_type, camera):
+        """Make an additional camera instance selectable through switch_camera.
+
+        The camera must provide the same interface as WebcamCamera (start, stop,
+        get_frame, release_frame, frame_pool, get_mode, get_supported_modes,
+        configure and release).
+        """
+        if camera_type not in self.camera_types:
+            self.camera_types.append(camera_type)
+        self.camera_devices[camera_type] = camera
+
+    def discover_cameras(self, max_webcams=4):
+        """Register the additional webcams and RealSense units that are connected.
+
+        Webcams are probed at indices 1 .. max_webcams-1 and registered as
+        "Webcam <index>"; with several RealSense devices the first stays
+        "RealSense" and the others become "RealSense <serial>". Returns the
+        camera types added.
+        """
+        added = []
+        for index in range(1, max_webcams):
+            camera_type = f"Webcam {index}"
+            if camera_type in self.camera_types:
+                continue
+            capture = cv2.VideoCapture(index)
+            opened = capture.isOpened()
+            capture.release()
+            if opened:
+                self.register_camera(camera_type, WebcamCamera(index))
+                added.append(camera_type)
+        serials = list_realsense_serials()
+        if len(serials) > 1:
+            if self.camera_devices.get("RealSense") is None:
+                self._realsense_serial = serials[0]
+            for serial in serials[1:]:
+                camera_type = f"RealSense {serial}"
+                if camera_type in self.camera_types:
+                    continue
+                try:
+                    self.register_camera(camera_type, RealSenseCamera(serial=serial))
+                    added.append(camera_type)
+                except Exception as e:
+                    log.warning("RealSense %s not available: %s", serial, e)
+        if added:
+            log.info("Discovered cameras: %s", ", ".join(added))
+        return added
+
+    def set_sync_cameras(self, camera_types):
+        """Capture these cameras alongside the active one, each on its own thread.
+
+        Takes effect immediately when capturing, otherwise on the next
+        start_capture. The active camera is never listed twice.
+        """
+        for camera_type in camera_types:
+            if camera_type not in self.camera_types:
+                raise ValueError(f"Invalid camera type: {camera_type}")
+        was_capturing = self.is_capturing()
+        if was_capturing:
+            self.stop_capture()
+        self.sync_camera_types = list(dict.fromkeys(camera_types))
+        if was_capturing:
+            self.start_capture(self._on_frame)
+
+    def capturing_types(self):
+        """Active camera type followed by the synchronized ones."""
+        return [self.camera_type] + [t for t in self.sync_camera_types if t != self.camera_type]
 
     def switch_camera(self, camera_type):
         if camera_type not in self.camera_types:
             raise ValueError(f"Invalid camera type: {camera_type}")
         
+        was_capturing = self.is_capturing()
+        if was_capturing and self.standby_limit > 0:
+            self._switch_warm(camera_type)
+            return
+        
         # Stop current camera
-        if self.camera:
+        if was_capturing:
+            self.stop_capture()
+        elif self.camera:
             self.camera.stop()
         
         # Initialize and start new camera
         self._initialize_camera(camera_type)
-        self.camera.start()
+        if was_capturing:
+            self.start_capture(self._on_frame)
+        else:
+            self.camera.start()
+
+    def _switch_warm(self, camera_type):
+        """Switch without closing the previous camera: it keeps streaming in standby."""
+        previous = self.capturing_types()
+        self._initialize_camera(camera_type)
+        current = self.capturing_types()
+        for standby_type in previous:
+            if standby_type not in current:
+                self._enter_standby(standby_type)
+        for active_type in current:
+            worker = self.capture_workers.get(active_type)
+            if worker is None or not worker.is_running():
+                self._standby.pop(active_type, None)
+                self._start_worker(active_type, self._on_frame)
+            elif active_type in self._standby:
+                # 待命中的相機已在串流，捨棄待命期間的舊影格後直接接手
+                del self._standby[active_type]
+                for stale in worker.buffer.drain():
+                    self.release_frame(stale)
+                worker.standby = False
+                worker.on_frame = self._on_frame
+                log.info("Camera %s resumed from standby", active_type)
+        for active_type in current:
+            worker = self.capture_workers.get(active_type)
+            if worker is not None:
+                worker.publish = self.frame_bus.publish if active_type == self.camera_type else None
+        self._enforce_standby_limit()
+
+    def _enter_standby(self, camera_type):
+        worker = self.capture_workers.get(camera_type)
+        if worker is None or not worker.is_running() or self.standby_limit <= 0:
+            self._stop_worker(camera_type)
+            return
+        worker.on_frame = None
+        worker.standby = True
+        self._standby[camera_type] = time.monotonic()
+        self._standby.move_to_end(camera_type)
+        log.info("Camera %s in standby", camera_type)
+
+    def _stop_standby(self, camera_type):
+        self._standby.pop(camera_type, None)
+        self._stop_worker(camera_type)
+        log.info("Camera %s left standby", camera_type)
+
+    def _enforce_standby_limit(self):
+        # 超過上限時關閉最久未使用的待命相機
+        while len(self._standby) > self.standby_limit:
+            self._stop_standby(next(iter(self._standby)))
+
+    def set_standby_limit(self, limit):
+        """Keep up to ``limit`` previously used cameras streaming after a switch (0 disables).
+
+        Switching back to a camera in standby only changes which capture
+        worker feeds the preview, so there is no device open/start delay.
+        Each warm camera keeps its USB bandwidth, buffers and capture thread.
+        """
+        self.standby_limit = max(0, int(limit))
+        self._enforce_standby_limit()
+
+    def standby_types(self):
+        """Cameras currently kept warm, least recently used first."""
+        return list(self._standby)
+
+    def stop_standby(self):
+        """Close every camera kept in standby."""
+        for camera_type in list(self._standby):
+            self._stop_standby(camera_type)
 
     def start(self):
         if self.camera:
@@ -146,65 +644,428 @@ class CameraDevice:
             return self.camera.get_frame()
         return None
 
+    def start_capture(self, on_frame=None):
+        """Start the active camera and grab frames on a background thread.
+
+        Cameras selected with set_sync_cameras are started too, each with its
+        own capture thread and ring buffer, so a slow device never holds up
+        the others.
+
+        Args:
+            on_frame: callable invoked from the capture thread after each frame
+        """
+        if not self.camera:
+            return
+        self._on_frame = on_frame
+        for camera_type in self.capturing_types():
+            if camera_type in self._standby:
+                self._stop_standby(camera_type)
+            self._start_worker(camera_type, on_frame)
+
+    def _start_worker(self, camera_type, on_frame):
+        camera_type = self._ensure_camera(camera_type)
+        camera = self.camera_devices[camera_type]
+        worker = self.capture_workers.get(camera_type)
+        if worker is None or worker.camera is not camera:
+            worker = CaptureWorker(camera, self.buffer_size)
+            self.capture_workers[camera_type] = worker
+        worker.on_frame = on_frame
+        worker.standby = False
+        worker.publish = self.frame_bus.publish if camera_type == self.camera_type else None
+        camera.start()
+        worker.start()
+
+    def _stop_worker(self, camera_type):
+        worker = self.capture_workers.get(camera_type)
+        if worker is not None:
+            worker.stop()
+        camera = self.camera_devices.get(camera_type)
+        if camera:
+            camera.stop()
+
+    def stop_capture(self):
+        """Stop the capture threads before closing the devices they read from.
+
+        Cameras in standby keep streaming; see stop_standby.
+        """
+        for camera_type in self.capturing_types():
+            self._stop_worker(camera_type)
+
+    def is_capturing(self):
+        worker = self.capture_workers.get(self.camera_type)
+        return worker is not None and worker.is_running()
+
+    def get_supported_modes(self, refresh=False):
+        """Capture modes the active camera really supports."""
+        if self.camera:
+            return self.camera.get_supported_modes(refresh)
+        return []
+
+    def get_mode(self, camera_type=None):
+        """Mode granted by the active (or the given) camera: width, height, fps, format."""
+        camera = self.camera if camera_type is None else self.camera_devices.get(camera_type)
+        if camera:
+            return camera.get_mode()
+        return None
+
+    def set_mode(self, width, height, fps=None, pixel_format=None):
+        """Reconfigure the active camera, restarting capture if it was running."""
+        if not self.camera:
+            return None
+        was_capturing = self.is_capturing()
+        if was_capturing:
+            self.stop_capture()
+        
+        if isinstance(self.camera, RealSenseCamera):
+            self.camera.reset(width=width, height=height, fps=fps or self.camera.fps)
+        else:
+            self.camera.configure(width, height, fps, pixel_format)
+        
+        if was_capturing:
+            self.start_capture(self._on_frame)
+        return self.get_mode()
+
+    def set_depth_streams(self, depth=False, infrared=False):
+        """Enable RealSense depth/infrared streams, restarting capture if it was running.
+
+        Returns False when the active camera has no such streams.
+        """
+        if not hasattr(self.camera, 'set_streams'):
+            return False
+        was_capturing = self.is_capturing()
+        if was_capturing:
+            self.stop_capture()
+        self.camera.set_streams(depth, infrared)
+        if was_capturing:
+            self.start_capture(self._on_frame)
+        return True
+
+    def get_depth_scale(self):
+        """Meters per depth unit of the active camera, or None without depth."""
+        return getattr(self.camera, 'depth_scale', None)
+
+    def get_intrinsics(self):
+        """Intrinsics of the active camera's color (and aligned depth) stream, or None."""
+        return getattr(self.camera, 'intrinsics', None)
+
+    def _pool_for(self, frame):
+        frame = frame_image(frame)
+        if frame is None:
+            return None
+        for camera in self.camera_devices.values():
+            pool = camera.frame_pool if camera else None
+            if pool is not None and pool.owns(frame):
+                return pool
+        return None
+
+    def retain_frame(self, frame):
+        """Keep a pooled frame alive beyond the current call."""
+        pool = self._pool_for(frame)
+        if pool is not None:
+            pool.retain(frame_image(frame))
+
+    def release_frame(self, frame):
+        """Return a frame obtained from get_frame/drain_frames to its pool."""
+        pool = self._pool_for(frame)
+        if pool is not None:
+            pool.release(frame_image(frame))
+
+    def get_capture_stats(self, camera_type=None):
+        """Counters of the active (or the given camera's) capture worker."""
+        worker = self.capture_workers.get(camera_type or self.camera_type)
+        if worker is None:
+            return {'frames_captured': 0, 'empty_reads': 0, 'queue_depth': 0, 'overwritten': 0,
+                    'device_dropped': 0}
+        return {
+            'frames_captured': worker.frames_captured,
+            'empty_reads': worker.empty_reads,
+            'device_dropped': worker.frames_dropped,
+            'queue_depth': len(worker.buffer),
+            'overwritten': worker.buffer.overwritten_count,
+        }
+
+    def get_latest_frame(self):
+        """Return the newest captured Frame (latest frame wins)."""
+        worker = self.capture_workers.get(self.camera_type)
+        return worker.buffer.latest() if worker else None
+
+    def drain_frames(self, camera_type=None):
+        """Return all Frames captured since the last call, oldest first.
+
+        Args:
+            camera_type: camera to drain; defaults to the active one
+        """
+        worker = self.capture_workers.get(camera_type or self.camera_type)
+        return worker.buffer.drain() if worker else []
+
     def release(self):
+        for worker in self.capture_workers.values():
+            worker.stop()
         for camera in self.camera_devices.values():
             if camera:
                 camera.release()
 
 
 class VideoRecorder:
-    def __init__(self, width=640, height=480, fps=30):
+    """Record frames to a video file through a background encoder thread.
+
+    ``record_frame`` only queues the frame, so encoding never runs on the
+    caller's (GUI) thread. When the queue is full the ``backpressure`` policy
+    decides whether to block, drop the oldest queued frame or drop the new one.
+    Frames from a ``FramePool`` stay valid while queued when ``retain_frame``
+    and ``release_frame`` hooks are set. For ``Frame`` items the capture
+    metadata of every written frame is saved next to the video in
+    ``<name>.timestamps.csv``.
+
+    With ``pacing`` the capture timestamps decide how often each frame is
+    written (see ``FramePacer``), so the file has exactly ``fps`` frames per
+    second of real time whatever rate the frames arrive at, and ``duration``
+    is measured in that media time.
+
+    ``set_segmenting`` splits long recordings into consecutive files by
+    media time or size (see ``SegmentedWriter``). The compression is chosen
+    by ``codec``, one of the names registered in ``video_codecs``.
+    """
+
+    def __init__(self, width=640, height=480, fps=30, queue_size=ENCODER_QUEUE_FRAMES,
+                 backpressure=BACKPRESSURE_DROP_OLDEST, block_timeout=1.0, pacing=True,
+                 codec=DEFAULT_CODEC):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Invalid backpressure policy: {backpressure}")
         self.width = width
         self.height = height
         self.fps = fps
         self.writer = None
         self.is_recording = False
-        self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.codec = get_codec(codec)
+        self.fourcc = self.codec.fourcc_code
         self.duration_count = 0
         self.filename = None
         self.duration = None
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout
+        self.pacing = pacing
+        self._pacer = None
+        self.segment_seconds = None
+        self.segment_bytes = None
+        # 緩衝池的引用計數掛鉤 (由 presenter 設定)
+        self.retain_frame = None
+        self.release_frame = None
+        self.frames_queued = 0
+        self.frames_dropped = 0
+        self.preroll_frames = 0
+        self._encoder = None
+        self._last_encoder = None
+        self._flushing = []
 
     def set_config(self, filename, width=640, height=480, fps=30, duration=None):
         self.filename = filename
         self.fps = fps
         self.width = width
         self.height = height
-        self.duration = duration * fps if duration else None
+        # 錄影時長以輸出影格數計算，是唯一的停止條件
+        self.duration = int(round(duration * fps)) if duration else None
+
+    def set_backpressure(self, policy, queue_size=None):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Invalid backpressure policy: {policy}")
+        self.backpressure = policy
+        if queue_size is not None:
+            self.queue_size = queue_size
+
+    def set_segmenting(self, seconds=None, max_bytes=None):
+        """Roll over to a new file every ``seconds`` of video or ``max_bytes``; None disables."""
+        self.segment_seconds = seconds or None
+        self.segment_bytes = max_bytes or None
+
+    def set_codec(self, name):
+        """Select the codec for the next recording; its container extension is ``codec.extension``."""
+        self.codec = get_codec(name)
+        self.fourcc = self.codec.fourcc_code
+
+    def _open_writer(self, path):
+        return self.codec.open_writer(path, self.fps, (self.width, self.height))
 
     def start(self):
         if self.filename:
-            self.writer = cv2.VideoWriter(
-                self.filename, self.fourcc, self.fps, (self.width, self.height)
+            if self.segment_seconds or self.segment_bytes:
+                self.writer = SegmentedWriter(
+                    self.filename, self._open_writer, self.fps,
+                    self.segment_seconds, self.segment_bytes, codec=self.codec.name,
+                )
+            else:
+                self.writer = self._open_writer(self.filename)
+            queue = FrameQueue(self.queue_size, self.backpressure)
+            self._encoder = EncoderWorker(
+                self.writer, queue,
+                on_frame_done=self._release,
+                on_dropped=self._on_dropped,
+                timestamp_file=self._open_timestamp_file(),
             )
+            self._last_encoder = self._encoder
+            self._pacer = FramePacer(self.fps) if self.pacing else None
+            self.frames_queued = 0
+            self.frames_dropped = 0
+            self.preroll_frames = 0
+            self._encoder.start()
             self.is_recording = True
             self.duration_count = 0
         else:
             raise ValueError("Filename not set. Use set_config first.")
 
-    def stop(self):
-        if self.writer:
-            self.writer.release()
+    def timestamp_path(self):
+        return os.path.splitext(self.filename)[0] + ".timestamps.csv"
+
+    def _open_timestamp_file(self):
+        try:
+            f = open(self.timestamp_path(), 'w', encoding='utf-8')
+        except OSError as e:
+            log.warning("Unable to create timestamp file: %s", e)
+            return None
+        f.write(f"# start_wall_time={time.time():.6f} start_monotonic={time.monotonic():.6f} fps={self.fps}\n")
+        f.write("index,seq,host_time,device_time,device_seq\n")
+        return f
+
+    def stop(self, wait=False, timeout=None):
+        """Stop accepting frames; queued frames are flushed in the background.
+
+        Args:
+            wait: block until the encoder has written every queued frame
+            timeout: maximum time to wait in seconds
+        """
         self.is_recording = False
+        encoder = self._encoder
+        self._encoder = None
+        self.writer = None
+        if encoder is not None:
+            self._flushing.append(encoder)
+            encoder.finish()
+            if wait:
+                encoder.join(timeout)
+
+    def is_flushing(self):
+        """True while a stopped recording still has frames to write."""
+        self._flushing = [encoder for encoder in self._flushing if encoder.is_alive()]
+        return bool(self._flushing)
+
+    def wait_finished(self, timeout=None):
+        for encoder in list(self._flushing):
+            encoder.join(timeout)
+        return not self.is_flushing()
+
+    @property
+    def frames_written(self):
+        encoder = self._last_encoder
+        return encoder.frames_written if encoder else 0
+
+    def get_stats(self):
+        """Counters of the current (or last) recording."""
+        encoder = self._last_encoder
+        pacer = self._pacer
+        return {
+            'queued': self.frames_queued,
+            'dropped': self.frames_dropped,
+            'written': self.frames_written,
+            'queue_depth': len(encoder.queue) if encoder else 0,
+            'preroll': self.preroll_frames,
+            'duplicated': pacer.frames_duplicated if pacer else 0,
+            'skipped': pacer.frames_skipped if pacer else 0,
+        }
+
+    @property
+    def recorded_seconds(self):
+        """Media time of the frames queued so far."""
+        return self.duration_count / self.fps if self.fps else 0.0
+
+    def progress(self):
+        """Fraction (0..1) of the configured duration already recorded."""
+        if not self.duration:
+            return 0.0
+        return min(self.duration_count / self.duration, 1.0)
+
+    def record_preroll(self, frames):
+        """Queue frames captured before ``start`` (oldest first) ahead of the live frames.
+
+        They are paced like live frames but never dropped by the backpressure
+        policy and not counted against ``duration``, which applies to the
+        time after the recording was started.
+        """
+        encoder = self._encoder
+        if not self.is_recording or encoder is None or not frames:
+            return 0
+        items = []
+        count = 0
+        for frame in frames:
+            copies = self._pacer.slots_for(frame.host_time) if self._pacer is not None else 1
+            if not copies:
+                continue
+            if frame.shape[:2] != (self.height, self.width):
+                frame = frame.with_image(cv2.resize(frame.image, (self.width, self.height)))
+            if self.retain_frame is not None:
+                self.retain_frame(frame)
+            items.append(RepeatedFrame(frame, copies) if copies > 1 else frame)
+            count += copies
+        if not encoder.queue.extend(items):
+            for item in items:
+                self._release(unpack_item(item)[0])
+            return 0
+        self.frames_queued += count
+        self.preroll_frames += count
+        return count
 
     def record_frame(self, frame):
-        if not self.is_recording or not self.writer:
-            return
+        """Queue a frame for encoding; returns True if it was accepted."""
+        encoder = self._encoder
+        if not self.is_recording or encoder is None:
+            return False
             
         if frame is None:
             raise ValueError("Frame is None.")
+        
+        if self._pacer is not None:
+            timestamp = frame.host_time if isinstance(frame, Frame) else time.monotonic()
+            copies = self._pacer.slots_for(timestamp)
+            if copies == 0:
+                return False
+        else:
+            copies = 1
+        if self.duration is not None:
+            copies = min(copies, self.duration - self.duration_count)
             
-        # Resize frame if necessary
+        # 相機已依錄影解析度輸出，此縮放僅在設定不一致時作為備援
         if frame.shape[:2] != (self.height, self.width):
-            frame = cv2.resize(frame, (self.width, self.height))
+            resized = cv2.resize(frame_image(frame), (self.width, self.height))
+            frame = frame.with_image(resized) if isinstance(frame, Frame) else resized
         
-        if self.duration is None:
-            self.writer.write(frame)
+        # 擷取落後時以單一佇列項目重複寫入同一影格填補時間軸，只佔一個位置與一次保留
+        item = RepeatedFrame(frame, copies) if copies > 1 else frame
+        if self.retain_frame is not None:
+            self.retain_frame(frame)
+        if self.backpressure == BACKPRESSURE_BLOCK:
+            dropped = encoder.queue.put(item, self.block_timeout)
         else:
-            if self.duration_count < self.duration:
-                self.writer.write(frame)
-                self.duration_count += 1
-            else:
-                self.stop()
+            dropped = encoder.queue.put(item)
+        if dropped is not None:
+            self._on_dropped(dropped)
+        # 捨棄最舊影格時新影格仍會排入；其他策略回傳的是被拒絕的新影格
+        if dropped is item and self.backpressure != BACKPRESSURE_DROP_OLDEST:
+            return False
+        self.frames_queued += copies
+        self.duration_count += copies
+        
+        if self.duration is not None and self.duration_count >= self.duration:
+            self.stop()
+        return True
+
+    def _release(self, frame):
+        if self.release_frame is not None:
+            self.release_frame(frame)
+
+    def _on_dropped(self, item):
+        frame, count = unpack_item(item)
+        self.frames_dropped += count
+        self._release(frame)
     
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+
+from .frame import Frame
+from .frame_pool import CAPTURE_RING_FRAMES
+from .logger import DEVICE_DROPPED_FRAMES, FRAMES_GRABBED, NONE_FRAMES, counters, get_logger
+from .telemetry import RATE_CAPTURE, STAGE_GRAB, telemetry
+
+
+log = get_logger("capture")
+
+
+class FrameRingBuffer:
+    """Bounded, thread-safe buffer holding the most recent captured frames.
+
+    The capture thread pushes every frame it grabs; when the buffer is full the
+    oldest frame is discarded, so consumers always see the newest data.
+    """
+
+    def __init__(self, capacity=CAPTURE_RING_FRAMES):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.pushed_count = 0
+        self.overwritten_count = 0
+
+    def push(self, frame):
+        """Append a frame, returning the frame that was evicted (if any)."""
+        with self._lock:
+            evicted = None
+            if len(self._frames) == self.capacity:
+                evicted = self._frames[0]
+                self.overwritten_count += 1
+            self._frames.append(frame)
+            self.pushed_count += 1
+            return evicted
+
+    def latest(self):
+        """Return the newest frame without removing it."""
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def drain(self):
+        """Remove and return all buffered frames, oldest first."""
+        with self._lock:
+            frames = list(self._frames)
+            self._frames.clear()
+            return frames
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+
+class CaptureWorker:
+    """Grab frames from a camera on a dedicated thread.
+
+    Each grab is wrapped in a ``Frame`` carrying a sequence number, the host
+    monotonic time and the camera's device timestamp/counter, then pushed into
+    a ``FrameRingBuffer`` at the device rate. ``on_frame`` (if given) is called
+    from the capture thread after each push, so the GUI can be notified without
+    polling. Frames evicted from the ring are handed back to the camera's
+    buffer pool via ``release_frame``. A worker in ``standby`` keeps grabbing
+    so the device stays streaming, but skips telemetry and notifications.
+    ``publish`` (if given) receives every frame before it enters the ring,
+    e.g. ``FrameBus.publish``.
+    """
+
+    def __init__(self, camera, buffer_size=CAPTURE_RING_FRAMES, on_frame=None):
+        self.camera = camera
+        self.buffer = FrameRingBuffer(buffer_size)
+        self.on_frame = on_frame
+        self.publish = None
+        self.standby = False
+        self.frames_captured = 0
+        self.empty_reads = 0
+        self.frames_dropped = 0
+        self._seq = 0
+        self._expected_interval = None
+        self._last_host_time = None
+        self._last_device_seq = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        for stale in self.buffer.drain():
+            self.camera.release_frame(stale.image)
+        self._seq = 0
+        self._last_host_time = None
+        self._last_device_seq = None
+        fps = (self.camera.get_mode() or {}).get('fps')
+        self._expected_interval = 1.0 / fps if fps else None
+        self._thread = threading.Thread(
+            target=self._run, name=f"capture-{type(self.camera).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=6.0):
+        """Stop the capture thread; blocks until the current grab returns."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            grab_start = time.perf_counter()
+            frame = self.camera.get_frame()
+            if frame is None:
+                self.empty_reads += 1
+                counters.incr(NONE_FRAMES)
+                # 避免裝置未就緒時空轉佔滿 CPU
+                time.sleep(0.005)
+                continue
+            device_time, device_seq = self.camera.last_frame_meta
+            # 只有部分相機 (RealSense 深度/紅外線) 會附帶其他串流
+            extras = getattr(self.camera, 'last_frame_extras', None)
+            captured = Frame(frame, self._seq, time.monotonic(), device_time, device_seq, extras)
+            self._seq += 1
+            self._detect_gap(captured)
+            # 在放入環形緩衝區前發布，訂閱者取得參照時影格仍屬於擷取執行緒
+            publish = self.publish
+            if publish is not None and not self.standby:
+                try:
+                    publish(captured)
+                except Exception as e:
+                    log.error("Frame publish error: %s", e)
+            evicted = self.buffer.push(captured)
+            if evicted is not None:
+                self.camera.release_frame(evicted.image)
+            if self.standby:
+                continue
+            self.frames_captured += 1
+            counters.incr(FRAMES_GRABBED)
+            telemetry.record_latency(STAGE_GRAB, time.perf_counter() - grab_start)
+            telemetry.mark(RATE_CAPTURE)
+            if self.on_frame is not None:
+                try:
+                    self.on_frame()
+                except Exception as e:
+                    log.error("Capture callback error: %s", e)
+
+    def _detect_gap(self, frame):
+        """Count frames the device produced but we never received."""
+        missing = 0
+        if frame.device_seq is not None and self._last_device_seq is not None:
+            # 裝置計數器倒退 (例如影片重新播放) 視為重新開始
+            if frame.device_seq > self._last_device_seq:
+                missing = frame.device_seq - self._last_device_seq - 1
+        elif frame.device_seq is None and self._last_host_time is not None and self._expected_interval:
+            interval = frame.host_time - self._last_host_time
+            if interval > 1.5 * self._expected_interval:
+                missing = int(round(interval / self._expected_interval)) - 1
+        self._last_device_seq = frame.device_seq
+        self._last_host_time = frame.host_time
+        if missing > 0:
+            self.frames_dropped += missing
+            counters.incr(DEVICE_DROPPED_FRAMES, missing)
+            log.warning("Detected %d dropped frame(s) before seq %d", missing, frame.seq)
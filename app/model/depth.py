@@ -0,0 +1,167 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from .encoder import BACKPRESSURE_DROP_OLDEST, FrameQueue
+from .logger import get_logger
+
+
+log = get_logger("depth")
+
+
+class DepthColorizer:
+    """Map 16-bit depth to BGR through a 65536-entry lookup table.
+
+    The table is built once per range/scale, so colorizing a frame is a
+    single ``np.take`` with no per-frame float math. Depth 0 (no data) is
+    black. Output alternates between two buffers, so the previous result
+    stays valid while the next one is produced.
+    """
+
+    def __init__(self, min_depth=0.2, max_depth=5.0, depth_scale=0.001, colormap=cv2.COLORMAP_JET):
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.depth_scale = depth_scale
+        self.colormap = colormap
+        self._lut = None
+        self._buffers = [None, None]
+        self._next = 0
+        self._build()
+
+    def _build(self):
+        meters = np.arange(65536, dtype=np.float64) * self.depth_scale
+        span = max(self.max_depth - self.min_depth, 1e-6)
+        index = np.clip((meters - self.min_depth) / span * 255.0, 0, 255).astype(np.uint8)
+        palette = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), self.colormap)
+        self._lut = palette.reshape(256, 3)[index]
+        self._lut[0] = 0
+
+    def set_range(self, min_depth, max_depth):
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self._build()
+
+    def set_depth_scale(self, depth_scale):
+        if depth_scale and depth_scale != self.depth_scale:
+            self.depth_scale = depth_scale
+            self._build()
+
+    def colorize(self, depth):
+        """Return a BGR image for a uint16 depth array."""
+        shape = depth.shape + (3,)
+        out = self._buffers[self._next]
+        if out is None or out.shape != shape:
+            out = np.empty(shape, np.uint8)
+            self._buffers[self._next] = out
+        self._next ^= 1
+        np.take(self._lut, depth, axis=0, out=out)
+        return out
+
+
+class DepthRecorder:
+    """Write the 16-bit depth of each recorded frame as lossless PNG files.
+
+    Frames are queued from the caller's thread and compressed by ``workers``
+    threads (PNG encoding releases the GIL), so a 30 fps depth stream keeps
+    up next to the color recording. Files are ``depth_<index>.png`` in the
+    output directory, with ``timestamps.csv`` mapping each index to the
+    capture metadata of its frame.
+    """
+
+    def __init__(self, workers=3, queue_size=64, compression=1):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.compression = compression
+        self.directory = None
+        self.is_recording = False
+        self.frames_queued = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._queue = None
+        self._threads = []
+        self._timestamps = None
+        self._lock = threading.Lock()
+
+    def start(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.frames_queued = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._timestamps = open(os.path.join(directory, "timestamps.csv"), 'w', encoding='utf-8')
+        self._timestamps.write("index,seq,host_time,device_time,device_seq\n")
+        self._queue = FrameQueue(self.queue_size, BACKPRESSURE_DROP_OLDEST)
+        # 前一次錄影可能仍在寫入，每次錄影的執行緒只使用自己的佇列與檔案
+        remaining = [self.workers]
+        self._threads = [
+            threading.Thread(
+                target=self._run, args=(self._queue, self._timestamps, directory, remaining),
+                name=f"depth-writer-{i}",
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.is_recording = True
+
+    def record_frame(self, frame):
+        """Queue the depth stream of a ``Frame``; returns False if it has none."""
+        depth = frame.stream('depth') if self.is_recording else None
+        if depth is None:
+            return False
+        dropped = self._queue.put((self.frames_queued, frame))
+        if dropped is not None:
+            with self._lock:
+                self.frames_dropped += 1
+        self.frames_queued += 1
+        return True
+
+    def stop(self, wait=False, timeout=None):
+        """Stop accepting frames; queued frames are still written."""
+        self.is_recording = False
+        if self._queue is not None:
+            self._queue.close()
+        if wait:
+            self.wait_finished(timeout)
+
+    def is_flushing(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def wait_finished(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+        return not self.is_flushing()
+
+    def get_stats(self):
+        return {
+            'queued': self.frames_queued,
+            'written': self.frames_written,
+            'dropped': self.frames_dropped,
+            'queue_depth': len(self._queue) if self._queue else 0,
+        }
+
+    def _run(self, queue, timestamps, directory, remaining):
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            index, frame = item
+            path = os.path.join(directory, f"depth_{index:06d}.png")
+            try:
+                if not cv2.imwrite(path, frame.stream('depth'), [cv2.IMWRITE_PNG_COMPRESSION, self.compression]):
+                    raise IOError(f"Unable to write {path}")
+            except Exception as e:
+                log.error("Error writing depth frame: %s", e)
+                continue
+            device_time = "" if frame.device_time is None else f"{frame.device_time:.3f}"
+            device_seq = "" if frame.device_seq is None else frame.device_seq
+            with self._lock:
+                self.frames_written += 1
+                timestamps.write(f"{index},{frame.seq},{frame.host_time:.6f},{device_time},{device_seq}\n")
+        with self._lock:
+            # 最後一個結束的執行緒關閉時間戳記檔
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                timestamps.close()
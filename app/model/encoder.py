@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import deque
+
+from .frame import Frame, frame_image
+from .logger import get_logger
+from .telemetry import RATE_ENCODE, STAGE_ENCODE, telemetry
+
+
+log = get_logger("encoder")
+
+
+# 佇列滿時的處理策略
+BACKPRESSURE_BLOCK = "block"
+BACKPRESSURE_DROP_OLDEST = "drop_oldest"
+BACKPRESSURE_DROP_NEWEST = "drop_newest"
+BACKPRESSURE_POLICIES = (BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_OLDEST, BACKPRESSURE_DROP_NEWEST)
+
+
+class FrameQueue:
+    """Bounded FIFO of frames with a configurable backpressure policy.
+
+    ``put`` returns the frame that had to be discarded to honour the policy
+    (the new frame for drop-newest, the oldest queued frame for drop-oldest),
+    or None when nothing was dropped.
+    """
+
+    def __init__(self, maxsize=32, policy=BACKPRESSURE_DROP_OLDEST):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Invalid backpressure policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()
+        # extend() 允許暫時超出 maxsize 的項目數，取出後逐一歸還
+        self._overflow = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item, timeout=None):
+        with self._cond:
+            if self._closed:
+                return item
+            dropped = None
+            if len(self._items) >= self.maxsize + self._overflow:
+                if self.policy == BACKPRESSURE_DROP_NEWEST:
+                    return item
+                if self.policy == BACKPRESSURE_DROP_OLDEST:
+                    dropped = self._items.popleft()
+                else:
+                    self._cond.wait_for(
+                        lambda: len(self._items) < self.maxsize + self._overflow or self._closed, timeout
+                    )
+                    if self._closed or len(self._items) >= self.maxsize + self._overflow:
+                        return item
+            self._items.append(item)
+            self._cond.notify_all()
+            return dropped
+
+    def extend(self, items):
+        """Queue already-allocated items beyond ``maxsize`` without dropping anything.
+
+        Used for pre-roll frames: the capacity grows by the number of items
+        and shrinks back as they are consumed, so later ``put`` calls are not
+        forced to drop them.
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            self._items.extend(items)
+            self._overflow += len(items)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Block until an item is available; returns None once closed and empty, or on timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            if self._overflow:
+                self._overflow -= 1
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Refuse new items; queued items are still handed out by ``get``."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class RepeatedFrame:
+    """Queue item for a frame the encoder writes ``count`` times in a row.
+
+    Fills the output timeline after a capture stall with a single queue
+    slot (and a single buffer reference) instead of ``count`` items.
+    """
+
+    __slots__ = ('frame', 'count')
+
+    def __init__(self, frame, count):
+        self.frame = frame
+        self.count = count
+
+
+def unpack_item(item):
+    """(frame, count) of a queued frame or ``RepeatedFrame``."""
+    if isinstance(item, RepeatedFrame):
+        return item.frame, item.count
+    return item, 1
+
+
+class EncoderWorker:
+    """Drain a FrameQueue into a ``cv2.VideoWriter`` on a background thread.
+
+    Each recording gets its own worker, so a new recording can start while the
+    previous one is still flushing its queue to disk. Writers that provide
+    ``write_frame`` (e.g. ``SegmentedWriter``) receive the whole ``Frame``
+    instead of the bare image. When ``timestamp_file``
+    is given, a CSV row with the metadata of every written ``Frame`` is
+    appended to it. ``RepeatedFrame`` items are written ``count`` times;
+    ``on_frame_done`` and ``on_dropped`` still receive one call per item.
+    """
+
+    def __init__(self, writer, queue, on_frame_done=None, on_dropped=None, on_finished=None,
+                 timestamp_file=None):
+        self.writer = writer
+        self.queue = queue
+        self.timestamp_file = timestamp_file
+        self._write = getattr(writer, 'write_frame', None) or (lambda frame: writer.write(frame_image(frame)))
+        self.on_frame_done = on_frame_done
+        self.on_dropped = on_dropped
+        self.on_finished = on_finished
+        self.frames_written = 0
+        self._thread = threading.Thread(target=self._run, name="video-encoder")
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, frame):
+        """Queue a frame; returns False if it (or an older frame) was dropped."""
+        dropped = self.queue.put(frame)
+        if dropped is not None and self.on_dropped is not None:
+            self.on_dropped(dropped)
+        return dropped is None
+
+    def finish(self):
+        """Stop accepting frames; the thread flushes the queue and releases the writer."""
+        self.queue.close()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _write_timestamp(self, frame):
+        device_time = "" if frame.device_time is None else f"{frame.device_time:.3f}"
+        device_seq = "" if frame.device_seq is None else frame.device_seq
+        self.timestamp_file.write(
+            f"{self.frames_written},{frame.seq},{frame.host_time:.6f},{device_time},{device_seq}\n"
+        )
+
+    def _run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                frame, count = unpack_item(item)
+                try:
+                    for _ in range(count):
+                        start = time.perf_counter()
+                        self._write(frame)
+                        telemetry.record_latency(STAGE_ENCODE, time.perf_counter() - start)
+                        telemetry.mark(RATE_ENCODE)
+                        if self.timestamp_file is not None and isinstance(frame, Frame):
+                            self._write_timestamp(frame)
+                        self.frames_written += 1
+                except Exception as e:
+                    log.error("Error encoding frame: %s", e)
+                finally:
+                    if self.on_frame_done is not None:
+                        self.on_frame_done(frame)
+        finally:
+            self.writer.release()
+            if self.timestamp_file is not None:
+                self.timestamp_file.close()
+            if self.on_finished is not None:
+                self.on_finished(self)
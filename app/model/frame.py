@@ -0,0 +1,41 @@
+class Frame:
+    """A captured image together with its timing metadata.
+
+    Attributes:
+        image: BGR ndarray (usually a FramePool buffer)
+        seq: sequence number assigned by the capture worker, starting at 0
+        host_time: ``time.monotonic()`` when the grab returned, in seconds
+        device_time: device timestamp in milliseconds, or None if unavailable
+        device_seq: device frame counter, or None if unavailable
+        extras: dict of additional streams captured with the image (e.g.
+            ``'depth'`` uint16 and ``'infrared'`` uint8 arrays), or None
+    """
+
+    __slots__ = ('image', 'seq', 'host_time', 'device_time', 'device_seq', 'extras')
+
+    def __init__(self, image, seq=0, host_time=0.0, device_time=None, device_seq=None, extras=None):
+        self.image = image
+        self.seq = seq
+        self.host_time = host_time
+        self.device_time = device_time
+        self.device_seq = device_seq
+        self.extras = extras
+
+    def with_image(self, image):
+        """Copy of the metadata attached to a different image (e.g. a resized one)."""
+        return Frame(image, self.seq, self.host_time, self.device_time, self.device_seq, self.extras)
+
+    def stream(self, name):
+        """Return the image (``'color'``) or an extra stream by name, or None."""
+        if name == 'color':
+            return self.image
+        return self.extras.get(name) if self.extras else None
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+
+def frame_image(frame):
+    """Return the ndarray of a Frame, or the argument itself if it is already an array."""
+    return frame.image if isinstance(frame, Frame) else frame
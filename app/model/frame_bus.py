@@ -0,0 +1,250 @@
+import threading
+
+import cv2
+
+from .encoder import BACKPRESSURE_DROP_OLDEST, FrameQueue
+from .frame_pool import FramePool
+from .logger import get_logger
+from .preview import downscale, fit_size
+
+
+log = get_logger("frame_bus")
+
+
+# 訂閱者可要求的色彩格式
+COLOR_BGR = "bgr"
+COLOR_RGB = "rgb"
+COLOR_GRAY = "gray"
+COLOR_FORMATS = (COLOR_BGR, COLOR_RGB, COLOR_GRAY)
+
+_CONVERSIONS = {
+    COLOR_RGB: cv2.COLOR_BGR2RGB,
+    COLOR_GRAY: cv2.COLOR_BGR2GRAY,
+}
+
+
+class _Published:
+    """One published frame shared by the subscriptions it was delivered to.
+
+    Derived images (another size or color format) are computed by the first
+    subscriber that asks for them and reused by the others. When the last
+    subscriber releases the frame, the derived buffers go back to the bus.
+    """
+
+    __slots__ = ('bus', 'frame', 'refs', 'variants', 'lock')
+
+    def __init__(self, bus, frame, refs):
+        self.bus = bus
+        self.frame = frame
+        self.refs = refs
+        self.variants = {}
+        self.lock = threading.Lock()
+
+    def image_for(self, subscription):
+        key = subscription.format_key(self.frame.image)
+        if key is None:
+            return self.frame.image
+        with self.lock:
+            image = self.variants.get(key)
+            if image is None:
+                image = self.bus._derive(self.frame.image, key)
+                self.variants[key] = image
+            return image
+
+    def release(self):
+        with self.lock:
+            self.refs -= 1
+            last = self.refs == 0
+        self.bus.release(self.frame)
+        if last:
+            self.bus._recycle(self.variants)
+
+
+class Subscription:
+    """A consumer of a FrameBus with its own rate, frame format and queue.
+
+    ``get`` returns the next ``Frame`` (with the image in the requested size
+    and color format) and must be paired with ``release`` once the consumer
+    is done with it. The queue drops its oldest frame when the consumer falls
+    behind, so a slow subscriber never delays the publisher or the others.
+    """
+
+    def __init__(self, bus, name, max_fps=None, max_size=None, color=COLOR_BGR, queue_size=2):
+        if color not in COLOR_FORMATS:
+            raise ValueError(f"Invalid color format: {color}")
+        self.bus = bus
+        self.name = name
+        self.max_fps = max_fps
+        self.max_size = max_size
+        self.color = color
+        self.queue = FrameQueue(queue_size, BACKPRESSURE_DROP_OLDEST)
+        self.frames_delivered = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0
+        self._interval = 1.0 / max_fps if max_fps else 0.0
+        self._next_time = None
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def format_key(self, image):
+        """((width, height) or None, color) of the derived image, or None when the original is used as is."""
+        size = None
+        if self.max_size is not None:
+            height, width = image.shape[:2]
+            if width > self.max_size[0] or height > self.max_size[1]:
+                size = fit_size(width, height, *self.max_size)
+        color = self.color if self.color != COLOR_BGR and image.ndim == 3 else COLOR_BGR
+        if size is None and color == COLOR_BGR:
+            return None
+        return size, color
+
+    def wants(self, timestamp):
+        """Rate limit on capture time: True when a frame captured at ``timestamp`` is due."""
+        if not self._interval:
+            return True
+        if self._next_time is not None and timestamp < self._next_time:
+            self.frames_skipped += 1
+            return False
+        # 依固定間隔推進，偶爾延遲時不累積誤差
+        if self._next_time is None or timestamp - self._next_time > self._interval:
+            self._next_time = timestamp + self._interval
+        else:
+            self._next_time += self._interval
+        return True
+
+    def _deliver(self, published):
+        dropped = self.queue.put(published)
+        if dropped is not None:
+            self.frames_dropped += 1
+            dropped.release()
+
+    def get(self, timeout=None):
+        """Next frame, or None on timeout or once unsubscribed."""
+        published = self.queue.get(timeout)
+        if published is None:
+            return None
+        frame = published.frame.with_image(published.image_for(self))
+        with self._lock:
+            self._held[id(frame)] = published
+            self.frames_delivered += 1
+        return frame
+
+    def release(self, frame):
+        with self._lock:
+            published = self._held.pop(id(frame), None)
+        if published is not None:
+            published.release()
+
+    def pending(self):
+        return len(self.queue)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def get_stats(self):
+        return {
+            'delivered': self.frames_delivered,
+            'skipped': self.frames_skipped,
+            'dropped': self.frames_dropped,
+            'pending': len(self.queue),
+        }
+
+
+class FrameBus:
+    """Publish/subscribe fan-out of captured frames to any number of consumers.
+
+    The capture thread publishes each frame once; every subscription whose
+    rate allows it gets a reference in its own bounded queue (one
+    ``retain`` of the pooled buffer per delivery, undone by the consumer's
+    ``release``). Resized or color-converted versions are derived once per
+    frame and format and shared by all subscriptions asking for them; their
+    buffers come from per-format pools and are recycled when every
+    subscriber has released the frame.
+    """
+
+    def __init__(self, retain=None, release=None, pool_size=8):
+        self.retain = retain or (lambda frame: None)
+        self.release = release or (lambda frame: None)
+        self.pool_size = pool_size
+        self._subscriptions = []
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name, max_fps=None, max_size=None, color=COLOR_BGR, queue_size=2):
+        """Register a consumer.
+
+        Args:
+            name: label used in logs and statistics
+            max_fps: highest delivery rate, None for every frame
+            max_size: (width, height) box larger frames are reduced to
+            color: COLOR_BGR, COLOR_RGB or COLOR_GRAY
+            queue_size: frames kept for a consumer that falls behind
+        """
+        subscription = Subscription(self, name, max_fps, max_size, color, queue_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        log.info("Subscribed %s (max %s FPS, size %s, %s)", name, max_fps or "all", max_size, color)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+        subscription.queue.close()
+        while True:
+            published = subscription.queue.get(0)
+            if published is None:
+                break
+            published.release()
+        log.info("Unsubscribed %s", subscription.name)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscriptions)
+
+    def publish(self, frame):
+        """Offer a Frame to every subscription; returns the number it was delivered to."""
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.wants(frame.host_time)]
+        if not targets:
+            return 0
+        published = _Published(self, frame, len(targets))
+        for _ in targets:
+            self.retain(frame)
+        for subscription in targets:
+            subscription._deliver(published)
+        return len(targets)
+
+    def _pooled(self, shape, dtype):
+        key = (tuple(shape), dtype.str)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = FramePool(shape, dtype, self.pool_size)
+                self._pools[key] = pool
+        return pool.acquire()
+
+    def _derive(self, image, key):
+        size, color = key
+        if size is not None:
+            shape = (size[1], size[0]) + image.shape[2:]
+            if color == COLOR_BGR:
+                return downscale(image, size, self._pooled(shape, image.dtype))
+            # 先縮小再轉換色彩，轉換只處理較少的像素
+            image = downscale(image, size)
+        shape = image.shape[:2] if color == COLOR_GRAY else image.shape
+        return cv2.cvtColor(image, _CONVERSIONS[color], dst=self._pooled(shape, image.dtype))
+
+    def _recycle(self, variants):
+        with self._lock:
+            pools = list(self._pools.values())
+        for image in variants.values():
+            for pool in pools:
+                if pool.owns(image):
+                    pool.release(image)
+                    break
+
+    def get_stats(self):
+        with self._lock:
+            return {subscription.name: subscription.get_stats() for subscription in self._subscriptions}
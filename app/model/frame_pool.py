@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+
+
+# 各處最多同時保留的緩衝池影格數，預設的緩衝池大小為其總和，
+# 正常負載下擷取不需另外配置記憶體
+CAPTURE_RING_FRAMES = 4      # FrameRingBuffer
+PREVIEW_FRAMES = 3           # 顯示中、等待顯示與最近一格深度影格
+BUS_FRAMES = 4               # 預設的分析模組：每個訂閱佇列 1 格加處理中 1 格
+PREROLL_QUEUE_FRAMES = 4     # 預錄複製佇列
+SYNC_PENDING_FRAMES = 8      # FrameSynchronizer 每個串流
+ENCODER_QUEUE_FRAMES = 32    # VideoRecorder 編碼佇列
+# 另加擷取中與編碼中各一格。未使用的緩衝區只佔虛擬位址，頁面在首次寫入時才配置
+DEFAULT_POOL_SIZE = (CAPTURE_RING_FRAMES + PREVIEW_FRAMES + BUS_FRAMES + PREROLL_QUEUE_FRAMES
+                     + SYNC_PENDING_FRAMES + ENCODER_QUEUE_FRAMES + 2)
+
+
+class FramePool:
+    """Fixed set of preallocated frame buffers with reference counting.
+
+    ``acquire`` hands out a free buffer with a reference count of one. Every
+    consumer that keeps the frame beyond the current call should ``retain`` it
+    and ``release`` it when done; the buffer returns to the pool when the count
+    drops to zero. When the pool is exhausted a temporary array is allocated
+    instead (counted in ``misses``) so capture never blocks on a slow consumer.
+    """
+
+    def __init__(self, shape, dtype=np.uint8, size=DEFAULT_POOL_SIZE):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.size = size
+        self._buffers = [np.empty(self.shape, self.dtype) for _ in range(size)]
+        self._index = {id(buf): i for i, buf in enumerate(self._buffers)}
+        self._refcounts = [0] * size
+        self._free = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def matches(self, shape, dtype=np.uint8):
+        return self.shape == tuple(shape) and self.dtype == np.dtype(dtype)
+
+    def owns(self, frame):
+        return frame is not None and id(frame) in self._index \
+            and self._buffers[self._index[id(frame)]] is frame
+
+    def acquire(self):
+        """Return a buffer to fill; its contents are undefined."""
+        with self._lock:
+            if self._free:
+                i = self._free.pop()
+                self._refcounts[i] = 1
+                return self._buffers[i]
+            self.misses += 1
+        return np.empty(self.shape, self.dtype)
+
+    def retain(self, frame):
+        if not self.owns(frame):
+            return
+        with self._lock:
+            self._refcounts[self._index[id(frame)]] += 1
+
+    def release(self, frame):
+        """Drop one reference; arrays not owned by the pool are ignored."""
+        if not self.owns(frame):
+            return
+        with self._lock:
+            i = self._index[id(frame)]
+            if self._refcounts[i] == 0:
+                return
+            self._refcounts[i] -= 1
+            if self._refcounts[i] == 0:
+                self._free.append(i)
+
+    def available(self):
+        with self._lock:
+            return len(self._free)
@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+import time
+
+
+# 逐格追蹤等級，低於 DEBUG，預設不輸出
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+ROOT_LOGGER_NAME = "ad_sensor"
+
+# 常用計數器名稱
+FRAMES_GRABBED = "frames_grabbed"
+NONE_FRAMES = "none_frames"
+FRAMES_DISPLAYED = "frames_displayed"
+CONVERSION_ERRORS = "conversion_errors"
+FRAME_ERRORS = "frame_errors"
+DEVICE_DROPPED_FRAMES = "device_dropped_frames"
+DISPLAY_COALESCED = "display_coalesced"
+DISPLAY_PAUSED = "display_paused"
+
+
+class Counters:
+    """Thread-safe in-memory event counters (frames grabbed, errors, ...)."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+counters = Counters()
+
+
+class RateLimitFilter(logging.Filter):
+    """Pass each message template at most once per ``interval`` seconds.
+
+    Applies to warnings and errors, and to any record logged with
+    ``extra={'rate_limited': True}``. Messages are keyed by logger, level and
+    the unformatted template, so a per-frame error with changing arguments is
+    still limited. The number of suppressed repeats is appended to the next
+    message that gets through.
+    """
+
+    def __init__(self, interval=5.0):
+        super().__init__()
+        self.interval = interval
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+        if record.levelno < logging.WARNING and not getattr(record, 'rate_limited', False):
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._state.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._state[key] = (last, suppressed + 1)
+                return False
+            self._state[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.msg} (另有 {suppressed} 則相同訊息已略過)"
+        return True
+
+
+def get_logger(name):
+    """Return a logger below the application's root logger."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def configure_logging(level=None, trace=None, rate_limit=5.0):
+    """Set up console logging for the application.
+
+    Args:
+        level: logging level name or number (default: $AD_SENSOR_LOG_LEVEL or INFO)
+        trace: enable the per-frame TRACE output (default: $AD_SENSOR_TRACE)
+        rate_limit: minimum seconds between repeats of the same message
+    """
+    if trace is None:
+        trace = os.environ.get("AD_SENSOR_TRACE", "").lower() in ("1", "true", "yes")
+    if trace:
+        level = TRACE
+    elif level is None:
+        level = os.environ.get("AD_SENSOR_LOG_LEVEL", "INFO").upper()
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s [%(name)s] %(message)s", "%H:%M:%S"
+    ))
+    handler.addFilter(RateLimitFilter(rate_limit))
+    root.addHandler(handler)
+    return root
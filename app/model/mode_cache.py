@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+
+from .logger import get_logger
+
+
+log = get_logger("camera.modes")
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.ad_sensor_gui', 'camera_modes.json')
+
+
+class CameraModeCache:
+    """On-disk cache of the capture modes each device actually supports.
+
+    Probing a webcam means opening it and trying every candidate mode, which
+    can take seconds, so the result is stored per device key and reused on the
+    next start. Each mode is a dict with ``width``, ``height``, ``fps`` and
+    ``format`` keys.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key):
+        with self._lock:
+            modes = self._load().get(key)
+            return [dict(mode) for mode in modes] if modes else None
+
+    def put(self, key, modes):
+        with self._lock:
+            entries = self._load()
+            entries[key] = [dict(mode) for mode in modes]
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, indent=2)
+            except OSError as e:
+                log.warning("Unable to write camera mode cache: %s", e)
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                try:
+                    with open(self.path, 'w', encoding='utf-8') as f:
+                        json.dump(self._entries, f, indent=2)
+                except OSError:
+                    pass
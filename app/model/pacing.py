@@ -0,0 +1,83 @@
+import math
+
+from .logger import get_logger
+
+
+log = get_logger("pacing")
+
+
+class FramePacer:
+    """Map capture timestamps onto the slots of a constant-rate output.
+
+    Output slot ``n`` covers the time ``start + n / fps``. ``slots_for`` tells
+    how many times a frame captured at ``timestamp`` must be written: 0 when
+    its slot is already filled (the capture runs faster than ``fps``), more
+    than 1 when slots were skipped (the capture stalled or runs slower), so
+    that the file always plays back in real time.
+    """
+
+    def __init__(self, fps):
+        if not fps or fps <= 0:
+            raise ValueError("fps must be positive")
+        self.fps = fps
+        self.start_time = None
+        self.next_slot = 0
+        self.frames_duplicated = 0
+        self.frames_skipped = 0
+
+    def reset(self):
+        self.start_time = None
+        self.next_slot = 0
+        self.frames_duplicated = 0
+        self.frames_skipped = 0
+
+    def slots_for(self, timestamp):
+        """Return the number of output frames for a frame captured at ``timestamp`` (seconds)."""
+        if self.start_time is None:
+            self.start_time = timestamp
+        slot = math.floor((timestamp - self.start_time) * self.fps + 0.5)
+        if slot < self.next_slot:
+            self.frames_skipped += 1
+            return 0
+        copies = slot - self.next_slot + 1
+        if copies > 1:
+            self.frames_duplicated += copies - 1
+            log.debug("Filling %d missing output frame(s) at slot %d", copies - 1, self.next_slot)
+        self.next_slot = slot + 1
+        return copies
+
+    @property
+    def elapsed(self):
+        """Media time written so far in seconds."""
+        return self.next_slot / self.fps
+
+
+class DisplayScheduler:
+    """Limit preview rendering to ``max_fps`` frames per second.
+
+    ``delay(now)`` is how long to wait before the next render is allowed (0
+    when it may happen now). While waiting the caller keeps only the newest
+    frame, so frames arriving faster than the display rate are coalesced
+    instead of queued. A rate of 0 means no limit.
+    """
+
+    def __init__(self, max_fps=60):
+        self.max_fps = 0
+        self.interval = 0.0
+        self.last_render = None
+        self.set_rate(max_fps)
+
+    def set_rate(self, max_fps):
+        self.max_fps = max_fps or 0
+        self.interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+
+    def delay(self, now):
+        if self.last_render is None:
+            return 0.0
+        return max(0.0, self.last_render + self.interval - now)
+
+    def rendered(self, now):
+        self.last_render = now
+
+    def reset(self):
+        self.last_render = None
@@ -0,0 +1,126 @@
+import numpy as np
+
+from .logger import get_logger
+
+
+log = get_logger("pointcloud")
+
+
+def _ray_tables(intrinsics):
+    """Per-pixel (x/z, y/z) of the viewing ray, following rs2_deproject_pixel_to_point."""
+    width, height = intrinsics['width'], intrinsics['height']
+    u, v = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+    x = (u - intrinsics['ppx']) / intrinsics['fx']
+    y = (v - intrinsics['ppy']) / intrinsics['fy']
+    coeffs = intrinsics.get('coeffs') or [0.0] * 5
+    model = str(intrinsics.get('model', ''))
+    if any(coeffs) and 'inverse_brown_conrady' in model.lower():
+        # 只在建表時計算一次，之後每格只需乘法
+        r2 = x * x + y * y
+        f = 1 + coeffs[0] * r2 + coeffs[1] * r2 * r2 + coeffs[4] * r2 * r2 * r2
+        ux = x * f + 2 * coeffs[2] * x * y + coeffs[3] * (r2 + 2 * x * x)
+        uy = y * f + 2 * coeffs[3] * x * y + coeffs[2] * (r2 + 2 * y * y)
+        x, y = ux, uy
+    return x.astype(np.float32), y.astype(np.float32)
+
+
+class PointCloudEngine:
+    """Deproject depth images to XYZ points with precomputed ray tables.
+
+    The tables hold, for every pixel, the ray direction derived from the
+    stream intrinsics (the dict returned by ``CameraDevice.get_intrinsics``),
+    so a point is just ``depth * scale * ray``. Whole frames, sub-sampled
+    ROIs and single pixels all use the same tables; coordinates are in
+    meters in the camera frame (x right, y down, z forward).
+    """
+
+    def __init__(self, intrinsics, depth_scale):
+        self.intrinsics = dict(intrinsics)
+        self.depth_scale = depth_scale
+        self.width = intrinsics['width']
+        self.height = intrinsics['height']
+        self.ray_x, self.ray_y = _ray_tables(intrinsics)
+
+    def matches(self, intrinsics, depth_scale):
+        return dict(intrinsics) == self.intrinsics and depth_scale == self.depth_scale
+
+    def _check(self, depth):
+        if depth.shape != (self.height, self.width):
+            raise ValueError(f"Depth shape {depth.shape} does not match intrinsics {self.width}x{self.height}")
+
+    def deproject(self, depth, roi=None, step=1, color=None):
+        """Return the valid points of a depth frame as an (N, 3) float32 array.
+
+        Args:
+            depth: uint16 depth image aligned with the intrinsics
+            roi: optional (x, y, width, height) region in pixels
+            step: keep every ``step``-th pixel in both directions
+            color: optional BGR image of the same size; when given,
+                ``(points, colors)`` is returned with (N, 3) uint8 RGB colors
+
+        Pixels without depth (0) are left out.
+        """
+        self._check(depth)
+        if roi is not None:
+            x, y, w, h = roi
+            rows, cols = slice(max(y, 0), y + h, step), slice(max(x, 0), x + w, step)
+        else:
+            rows, cols = slice(None, None, step), slice(None, None, step)
+        raw = depth[rows, cols]
+        valid = raw > 0
+        z = raw[valid].astype(np.float32) * np.float32(self.depth_scale)
+        points = np.empty((z.size, 3), np.float32)
+        points[:, 0] = self.ray_x[rows, cols][valid] * z
+        points[:, 1] = self.ray_y[rows, cols][valid] * z
+        points[:, 2] = z
+        if color is None:
+            return points
+        colors = color[rows, cols][valid][:, ::-1]
+        return points, np.ascontiguousarray(colors)
+
+    def point_at(self, depth, u, v, window=2):
+        """3D point at pixel (u, v), using the median of valid depth in a small window.
+
+        Returns None when there is no depth around the pixel.
+        """
+        self._check(depth)
+        if not (0 <= u < self.width and 0 <= v < self.height):
+            return None
+        patch = depth[max(v - window, 0):v + window + 1, max(u - window, 0):u + window + 1]
+        values = patch[patch > 0]
+        if values.size == 0:
+            return None
+        z = float(np.median(values)) * self.depth_scale
+        return np.array([self.ray_x[v, u] * z, self.ray_y[v, u] * z, z], dtype=np.float64)
+
+    def distance(self, depth, first, second, window=2):
+        """Euclidean distance in meters between two pixels, or None without depth at either."""
+        p1 = self.point_at(depth, *first, window=window)
+        p2 = self.point_at(depth, *second, window=window)
+        if p1 is None or p2 is None:
+            return None
+        return float(np.linalg.norm(p1 - p2))
+
+
+def export_npy(path, points):
+    np.save(path, points)
+
+
+def export_ply(path, points, colors=None):
+    """Write points (and optional RGB uint8 colors) as a binary little-endian PLY file."""
+    count = len(points)
+    fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors is not None:
+        fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    vertices = np.empty(count, dtype=fields)
+    vertices['x'], vertices['y'], vertices['z'] = points[:, 0], points[:, 1], points[:, 2]
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {count}",
+              "property float x", "property float y", "property float z"]
+    if colors is not None:
+        vertices['red'], vertices['green'], vertices['blue'] = colors[:, 0], colors[:, 1], colors[:, 2]
+        header += ["property uchar red", "property uchar green", "property uchar blue"]
+    header.append("end_header")
+    with open(path, 'wb') as f:
+        f.write(("\n".join(header) + "\n").encode('ascii'))
+        vertices.tofile(f)
+    log.info("Exported %d points to %s", count, path)
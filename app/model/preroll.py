@@ -0,0 +1,183 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from .encoder import BACKPRESSURE_DROP_OLDEST, FrameQueue
+from .frame import Frame, frame_image
+from .frame_pool import PREROLL_QUEUE_FRAMES
+from .logger import get_logger
+
+
+log = get_logger("preroll")
+
+# 預錄緩衝的預設記憶體上限
+DEFAULT_PREROLL_BYTES = 512 * 2 ** 20
+
+
+class PrerollBuffer:
+    """Always-on ring of the last ``seconds`` of frames, kept before recording starts.
+
+    Frames are copied into one preallocated array, so memory use is fixed at
+    ``min(seconds * fps, max_bytes / frame size)`` frames no matter how long
+    the preview runs. ``take`` hands that array over to the caller (e.g. the
+    recorder's encoder queue) without copying and starts a fresh ring on the
+    next ``push``; until the handed-over frames are encoded, up to twice the
+    budget can be in use.
+
+    ``push`` only queues the frame; the copy is made on a background thread,
+    so the caller (the UI thread) never pays for it. Pooled frames stay valid
+    while queued when ``retain_frame`` and ``release_frame`` hooks are set.
+    If the copier falls behind, the oldest queued frames are dropped.
+    """
+
+    def __init__(self, seconds=0.0, fps=30, max_bytes=DEFAULT_PREROLL_BYTES):
+        self.seconds = seconds
+        self.fps = fps
+        self.max_bytes = max_bytes
+        self.retain_frame = None
+        self.release_frame = None
+        self.frames_dropped = 0
+        self._storage = None
+        self._meta = []
+        self._start = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        # 已排入但尚未寫入環形緩衝區的影格數
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+    def configure(self, seconds=None, fps=None, max_bytes=None):
+        """Change the buffer length or budget; buffered frames are discarded."""
+        with self._lock:
+            if seconds is not None:
+                self.seconds = seconds
+            if fps:
+                self.fps = fps
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._reset()
+
+    @property
+    def enabled(self):
+        return self.seconds > 0
+
+    def _capacity_for(self, image):
+        by_time = math.ceil(self.seconds * (self.fps or 30)) + 1
+        by_memory = self.max_bytes // max(image.nbytes, 1)
+        return int(min(by_time, by_memory))
+
+    def _reset(self):
+        self._storage = None
+        self._meta = []
+        self._start = 0
+        self._count = 0
+
+    def push(self, frame):
+        """Queue a frame (``Frame`` or ndarray) to be copied into the ring, overwriting the oldest."""
+        if not self.enabled or frame is None:
+            return
+        if self._thread is None:
+            self._queue = FrameQueue(PREROLL_QUEUE_FRAMES, BACKPRESSURE_DROP_OLDEST)
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name="preroll-copy", daemon=True)
+            self._thread.start()
+        if self.retain_frame is not None:
+            self.retain_frame(frame)
+        with self._idle:
+            self._in_flight += 1
+        dropped = self._queue.put(frame)
+        if dropped is not None:
+            self.frames_dropped += 1
+            self._done(dropped)
+
+    def _done(self, frame):
+        if self.release_frame is not None:
+            self.release_frame(frame)
+        with self._idle:
+            self._in_flight -= 1
+            self._idle.notify_all()
+
+    def _run(self, queue):
+        while True:
+            frame = queue.get()
+            if frame is None:
+                break
+            try:
+                self._store(frame)
+            finally:
+                self._done(frame)
+
+    def _wait_idle(self, timeout=1.0):
+        # 等待已排入的影格寫入環形緩衝區，按下錄影前的最後幾格才不會遺漏
+        with self._idle:
+            self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def _store(self, frame):
+        image = frame_image(frame)
+        with self._lock:
+            if not self.enabled:
+                return
+            if self._storage is None or self._storage.shape[1:] != image.shape or self._storage.dtype != image.dtype:
+                capacity = self._capacity_for(image)
+                if capacity < 1:
+                    return
+                # np.empty 只保留位址空間，頁面在首次寫入時才配置
+                self._storage = np.empty((capacity,) + image.shape, image.dtype)
+                self._meta = [None] * capacity
+                self._start = 0
+                self._count = 0
+                log.debug("Pre-roll ring: %d frames, %.1f MB", capacity, self._storage.nbytes / 2 ** 20)
+            capacity = len(self._storage)
+            if self._count < capacity:
+                index = (self._start + self._count) % capacity
+                self._count += 1
+            else:
+                index = self._start
+                self._start = (self._start + 1) % capacity
+            np.copyto(self._storage[index], image)
+            if isinstance(frame, Frame):
+                self._meta[index] = (frame.seq, frame.host_time, frame.device_time, frame.device_seq)
+            else:
+                self._meta[index] = (0, time.monotonic(), None, None)
+
+    def take(self):
+        """Return the buffered frames of the last ``seconds``, oldest first, and empty the ring."""
+        self._wait_idle()
+        with self._lock:
+            if self._storage is None or self._count == 0:
+                return []
+            capacity = len(self._storage)
+            order = [(self._start + i) % capacity for i in range(self._count)]
+            newest = self._meta[order[-1]][1]
+            frames = [
+                Frame(self._storage[i], *self._meta[i]) for i in order
+                if newest - self._meta[i][1] <= self.seconds
+            ]
+            self._reset()
+            return frames
+
+    def clear(self):
+        self._wait_idle()
+        with self._lock:
+            self._reset()
+
+    def close(self):
+        """Stop the copy thread and release queued frames."""
+        if self._thread is None:
+            return
+        self._queue.close()
+        self._thread.join(2.0)
+        self._thread = None
+        self._queue = None
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+    @property
+    def memory_bytes(self):
+        storage = self._storage
+        return storage.nbytes if storage is not None else 0
@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+
+from .logger import get_logger
+
+
+log = get_logger("preview")
+
+
+def fit_size(width, height, max_width, max_height):
+    """Largest (width, height) with the same aspect ratio that fits the box."""
+    scale = min(max_width / width, max_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def downscale(image, size, out=None, scratch=None):
+    """Reduce ``image`` to ``size`` (width, height), writing into ``out`` if given.
+
+    Large reductions are done by repeated 2x area averaging (OpenCV's fast
+    path for ``INTER_AREA``), then a bilinear resize to the exact size, which
+    is several times faster than a single arbitrary-ratio ``INTER_AREA`` with
+    the same anti-aliasing. 16-bit depth uses nearest neighbour, so missing
+    depth is not blended into valid pixels. ``scratch(level, size)`` may
+    supply buffers for the intermediate levels.
+    """
+    if image.dtype == np.uint16:
+        return cv2.resize(image, size, dst=out, interpolation=cv2.INTER_NEAREST)
+    source = image
+    level = 0
+    while source.shape[1] >= 2 * size[0] and source.shape[0] >= 2 * size[1]:
+        # 裁成偶數尺寸才會使用 2 倍縮小的快速路徑
+        even = source[:source.shape[0] & ~1, :source.shape[1] & ~1]
+        half = (even.shape[1] // 2, even.shape[0] // 2)
+        reduced = scratch(level, half) if scratch is not None else None
+        source = cv2.resize(even, half, dst=reduced, interpolation=cv2.INTER_AREA)
+        level += 1
+    return cv2.resize(source, size, dst=out, interpolation=cv2.INTER_LINEAR)
+
+
+class PreviewScaler:
+    """Downscale frames for display into reused buffers (see ``downscale``).
+
+    Each slot alternates between two output buffers, so the previous preview
+    stays valid while the next one is produced; buffers are only reallocated
+    when the output size changes. Frames that already fit are returned
+    unchanged.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self._next = {}
+
+    def _buffer(self, key, size, image):
+        shape = (size[1], size[0]) + image.shape[2:]
+        out = self._buffers.get(key)
+        if out is None or out.shape != shape or out.dtype != image.dtype:
+            out = np.empty(shape, image.dtype)
+            self._buffers[key] = out
+        return out
+
+    def scale(self, image, max_size, slot=0):
+        max_width, max_height = max_size
+        height, width = image.shape[:2]
+        if max_width <= 0 or max_height <= 0 or (width <= max_width and height <= max_height):
+            return image
+        size = fit_size(width, height, max_width, max_height)
+        index = self._next.get(slot, 0)
+        self._next[slot] = index ^ 1
+        out = self._buffer((slot, 'out', index), size, image)
+        downscale(image, size, out, lambda level, half: self._buffer((slot, 'half', level), half, image))
+        return out
+
+    def clear(self):
+        self._buffers = {}
+        self._next = {}
@@ -0,0 +1,104 @@
+import threading
+
+import cv2
+import numpy as np
+
+from .logger import get_logger
+
+
+log = get_logger("quality")
+
+
+# 視為裁切 (全黑 / 全白) 的灰階值
+CLIP_LOW = 5
+CLIP_HIGH = 250
+
+# CSV 欄位，依 QualityMeter.measure 的結果順序
+QUALITY_FIELDS = ('sharpness', 'brightness', 'exposure', 'underexposed', 'overexposed', 'motion')
+
+
+class QualityMeter:
+    """Per-frame image-quality metrics of a (decimated) 8-bit grayscale image.
+
+    ``measure`` returns:
+        sharpness: variance of the Laplacian (higher is sharper)
+        brightness: mean gray level from the histogram (0-255)
+        exposure: median gray level mapped to -1 (black) .. +1 (white)
+        underexposed / overexposed: fraction of pixels at or beyond
+            ``CLIP_LOW`` / ``CLIP_HIGH``
+        motion: mean absolute difference to the previous image (0-255),
+            0 for the first image or after a size change
+
+    Everything is computed with whole-image OpenCV/NumPy operations; the
+    previous image and the Laplacian output are kept in reused buffers.
+    Sharpness depends on the decimation, so compare it only between frames
+    measured at the same size.
+    """
+
+    def __init__(self):
+        self._previous = None
+        self._laplacian = None
+        self._levels = np.arange(256, dtype=np.float64)
+
+    def reset(self):
+        self._previous = None
+
+    def measure(self, gray):
+        if self._laplacian is None or self._laplacian.shape != gray.shape:
+            self._laplacian = np.empty(gray.shape, np.float32)
+            self._previous = None
+        cv2.Laplacian(gray, cv2.CV_32F, dst=self._laplacian)
+        _, std = cv2.meanStdDev(self._laplacian)
+
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        total = gray.size
+        cumulative = np.cumsum(hist)
+        median = int(np.searchsorted(cumulative, total / 2.0))
+
+        if self._previous is None:
+            motion = 0.0
+            self._previous = gray.copy()
+        else:
+            motion = cv2.norm(gray, self._previous, cv2.NORM_L1) / total
+            np.copyto(self._previous, gray)
+
+        return {
+            'sharpness': float(std[0, 0]) ** 2,
+            'brightness': float(hist @ self._levels) / total,
+            'exposure': (median - 127.5) / 127.5,
+            'underexposed': float(cumulative[CLIP_LOW]) / total,
+            'overexposed': float(total - cumulative[CLIP_HIGH - 1]) / total,
+            'motion': motion,
+        }
+
+
+class QualityLog:
+    """CSV of quality metrics next to a recording: one row per measured frame.
+
+    ``write`` may be called from an analysis thread while ``close`` is called
+    from the UI thread; rows arriving after ``close`` are ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(",".join(("seq", "host_time") + QUALITY_FIELDS) + "\n")
+        self._lock = threading.Lock()
+        self.rows = 0
+
+    def write(self, frame, metrics):
+        row = [str(frame.seq), f"{frame.host_time:.6f}"]
+        row += [f"{metrics[field]:.6g}" for field in QUALITY_FIELDS]
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(",".join(row) + "\n")
+            self.rows += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        log.info("Quality log %s: %d rows", self.path, self.rows)
@@ -0,0 +1,194 @@
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .frame import Frame, frame_image
+from .logger import get_logger
+
+
+log = get_logger("raw_frames")
+
+
+MAGIC = b"ADRAWV01"
+HEADER_SIZE = 4096
+# 標頭內容：MAGIC、已寫入格數 (uint64)、JSON 長度 (uint32)、JSON 中繼資料
+_COUNT_OFFSET = 8
+_JSON_OFFSET = 20
+RECORD_ALIGN = 64
+META_FIELDS = [('seq', '<i8'), ('host_time', '<f8'), ('device_time', '<f8'), ('device_seq', '<i8')]
+META_SIZE = 32
+
+
+def _record_dtype(shape, dtype):
+    image_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    itemsize = -(-(RECORD_ALIGN + image_bytes) // RECORD_ALIGN) * RECORD_ALIGN
+    return np.dtype({
+        'names': ['meta', 'image'],
+        'formats': [np.dtype(META_FIELDS), (np.dtype(dtype), tuple(shape))],
+        'offsets': [0, RECORD_ALIGN],
+        'itemsize': itemsize,
+    })
+
+
+class RawFrameWriter:
+    """Append frames uncompressed to a preallocated, memory-mapped file.
+
+    The file is a 4 KB header (shape, dtype, fps and the number of frames
+    written) followed by fixed-size records holding the frame's capture
+    metadata and its pixels, so writing a frame is one memcpy into the map.
+    Space is reserved ``capacity`` frames at a time and the file is trimmed
+    to the written frames on ``release``. Implements the ``cv2.VideoWriter``
+    methods used by ``EncoderWorker``.
+    """
+
+    def __init__(self, path, fps, size, channels=3, dtype=np.uint8, capacity=None):
+        width, height = size
+        self.path = path
+        self.fps = fps
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.dtype = np.dtype(dtype)
+        self.record_dtype = _record_dtype(self.shape, self.dtype)
+        self.capacity = 0
+        self.count = 0
+        self._grow_frames = capacity or max(int(round((fps or 30) * 10)), 16)
+        self._records = None
+        self._file = open(path, 'w+b')
+        self._header = None
+        self._write_header()
+        self._reserve(self._grow_frames)
+
+    def _write_header(self):
+        meta = json.dumps({
+            'shape': list(self.shape),
+            'dtype': self.dtype.str,
+            'fps': self.fps,
+            'record_size': self.record_dtype.itemsize,
+            'image_offset': RECORD_ALIGN,
+        }).encode('utf-8')
+        if _JSON_OFFSET + len(meta) > HEADER_SIZE:
+            raise ValueError("Raw frame header too large")
+        self._file.truncate(HEADER_SIZE)
+        self._header = mmap.mmap(self._file.fileno(), HEADER_SIZE)
+        self._header[:8] = MAGIC
+        struct.pack_into('<QI', self._header, _COUNT_OFFSET, 0, len(meta))
+        self._header[_JSON_OFFSET:_JSON_OFFSET + len(meta)] = meta
+
+    def _reserve(self, capacity):
+        """Grow the file to hold ``capacity`` records and remap it."""
+        size = HEADER_SIZE + capacity * self.record_dtype.itemsize
+        current = HEADER_SIZE + self.capacity * self.record_dtype.itemsize
+        if self._records is not None:
+            self._records.flush()
+            self._records = None
+        self._file.truncate(size)
+        if hasattr(os, 'posix_fallocate'):
+            # 預先配置磁碟區塊，避免磁碟已滿時寫入對映記憶體發生 SIGBUS
+            try:
+                os.posix_fallocate(self._file.fileno(), current, size - current)
+            except OSError as e:
+                log.warning("Unable to preallocate %s: %s", self.path, e)
+        self._records = np.memmap(self._file, dtype=self.record_dtype, mode='r+',
+                                  offset=HEADER_SIZE, shape=(capacity,))
+        self.capacity = capacity
+
+    def isOpened(self):
+        return self._records is not None
+
+    def write_frame(self, frame):
+        image = frame_image(frame)
+        if self.count >= self.capacity:
+            self._reserve(self.capacity + self._grow_frames)
+        record = self._records[self.count]
+        np.copyto(record['image'], image.reshape(self.shape), casting='no')
+        if isinstance(frame, Frame):
+            record['meta'] = (
+                frame.seq, frame.host_time,
+                np.nan if frame.device_time is None else frame.device_time,
+                -1 if frame.device_seq is None else frame.device_seq,
+            )
+        else:
+            record['meta'] = (self.count, np.nan, np.nan, -1)
+        self.count += 1
+        struct.pack_into('<Q', self._header, _COUNT_OFFSET, self.count)
+
+    def write(self, image):
+        self.write_frame(image)
+
+    def release(self):
+        if self._records is None:
+            return
+        self._records.flush()
+        self._records = None
+        self._header.flush()
+        self._header.close()
+        self._file.truncate(HEADER_SIZE + self.count * self.record_dtype.itemsize)
+        self._file.close()
+
+
+class RawFrameReader:
+    """Random access to the frames of a ``RawFrameWriter`` file.
+
+    ``reader[i]`` is a read-only ndarray view into the mapped file (no
+    copy); ``frame(i)`` wraps it in a ``Frame`` with the stored metadata.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if header[:8] != MAGIC:
+            raise ValueError(f"Not a raw frame file: {path}")
+        count, meta_len = struct.unpack_from('<QI', header, _COUNT_OFFSET)
+        self.meta = json.loads(header[_JSON_OFFSET:_JSON_OFFSET + meta_len].decode('utf-8'))
+        self.shape = tuple(self.meta['shape'])
+        self.dtype = np.dtype(self.meta['dtype'])
+        self.fps = self.meta.get('fps')
+        record_dtype = _record_dtype(self.shape, self.dtype)
+        # 錄影中斷時檔案可能包含尚未寫入的預留空間，以標頭記錄的格數為準
+        available = (os.path.getsize(path) - HEADER_SIZE) // record_dtype.itemsize
+        self.count = min(count, available)
+        self._records = (
+            np.memmap(path, dtype=record_dtype, mode='r', offset=HEADER_SIZE, shape=(self.count,))
+            if self.count else None
+        )
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if self._records is None:
+            raise IndexError("raw frame file is empty")
+        return self._records['image'][index]
+
+    def frame(self, index):
+        meta = self._records['meta'][index]
+        device_time = None if np.isnan(meta['device_time']) else float(meta['device_time'])
+        device_seq = None if meta['device_seq'] < 0 else int(meta['device_seq'])
+        return Frame(self[index], int(meta['seq']), float(meta['host_time']), device_time, device_seq)
+
+    @property
+    def timestamps(self):
+        """Structured array (seq, host_time, device_time, device_seq) of every frame."""
+        if self._records is None:
+            return np.zeros(0, dtype=META_FIELDS)
+        return self._records['meta']
+
+    @property
+    def width(self):
+        return self.shape[1]
+
+    @property
+    def height(self):
+        return self.shape[0]
+
+    def close(self):
+        self._records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
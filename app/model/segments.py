@@ -0,0 +1,166 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .frame import Frame, frame_image
+from .logger import get_logger
+
+
+log = get_logger("segments")
+
+# 每寫入多少格檢查一次檔案大小
+SIZE_CHECK_INTERVAL = 30
+
+
+def segment_path(filename, index):
+    base, ext = os.path.splitext(filename)
+    return f"{base}_{index:03d}{ext}"
+
+
+def manifest_path(filename):
+    return os.path.splitext(filename)[0] + ".segments.json"
+
+
+class SegmentedWriter:
+    """Video writer that rolls over into consecutive files by time or size.
+
+    Drop-in replacement for ``cv2.VideoWriter`` inside ``EncoderWorker``.
+    The next segment's writer is opened ahead of time and the finished one is
+    released (which writes the container index) on a helper thread, so the
+    encoder thread only swaps writers at the boundary and no frame is lost.
+    After every closed segment the manifest ``<name>.segments.json`` is
+    rewritten, listing each segment's file, frame range and capture
+    timestamps, so a crash only loses the segment in progress.
+
+    Args:
+        filename: base name; segments are ``<base>_000<ext>``, ``<base>_001<ext>``...
+        open_writer: callable ``path -> cv2.VideoWriter``
+        fps: output frame rate, used to convert ``segment_seconds`` to frames
+        segment_seconds: maximum media time per segment (None for no limit)
+        segment_bytes: maximum file size per segment (None for no limit)
+        codec: name of the codec ``open_writer`` uses, stored in the manifest
+    """
+
+    def __init__(self, filename, open_writer, fps, segment_seconds=None, segment_bytes=None, codec=None):
+        if not segment_seconds and not segment_bytes:
+            raise ValueError("segment_seconds or segment_bytes is required")
+        self.filename = filename
+        self.open_writer = open_writer
+        self.fps = fps
+        self.segment_frames = int(round(segment_seconds * fps)) if segment_seconds else None
+        self.segment_bytes = segment_bytes
+        self.codec = codec
+        self.manifest_path = manifest_path(filename)
+        self.segments = []
+        self.frames_written = 0
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-io")
+        self._index = 0
+        self._writer = self._open(0)
+        self._current = self._new_entry(0)
+        self._next = self._io.submit(self._open, 1)
+
+    def _open(self, index):
+        path = segment_path(self.filename, index)
+        writer = self.open_writer(path)
+        if not writer.isOpened():
+            log.error("Unable to open segment %s", path)
+        return writer
+
+    def _new_entry(self, index):
+        return {
+            'index': index,
+            'file': os.path.basename(segment_path(self.filename, index)),
+            'first_frame': self.frames_written,
+            'frames': 0,
+            'first_seq': None,
+            'last_seq': None,
+            'first_host_time': None,
+            'last_host_time': None,
+            'bytes': None,
+            'complete': False,
+        }
+
+    def isOpened(self):
+        return self._writer is not None and self._writer.isOpened()
+
+    def write_frame(self, frame):
+        """Write a ``Frame`` (or ndarray), rolling over first if the segment is full."""
+        if self._segment_full():
+            self._rollover()
+        self._writer.write(frame_image(frame))
+        entry = self._current
+        if isinstance(frame, Frame):
+            if entry['first_seq'] is None:
+                entry['first_seq'] = frame.seq
+                entry['first_host_time'] = frame.host_time
+            entry['last_seq'] = frame.seq
+            entry['last_host_time'] = frame.host_time
+        entry['frames'] += 1
+        self.frames_written += 1
+
+    def write(self, image):
+        self.write_frame(image)
+
+    def _segment_full(self):
+        frames = self._current['frames']
+        if frames == 0:
+            return False
+        if self.segment_frames and frames >= self.segment_frames:
+            return True
+        if self.segment_bytes and frames % SIZE_CHECK_INTERVAL == 0:
+            try:
+                return os.path.getsize(segment_path(self.filename, self._index)) >= self.segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def _rollover(self):
+        finished, entry = self._writer, self._current
+        # 下一段通常已在背景開啟完成
+        self._writer = self._next.result()
+        self._index += 1
+        self._current = self._new_entry(self._index)
+        self._io.submit(self._close, finished, entry)
+        self._next = self._io.submit(self._open, self._index + 1)
+        log.info("Recording rolled over to segment %d", self._index)
+
+    def _close(self, writer, entry):
+        writer.release()
+        try:
+            entry['bytes'] = os.path.getsize(segment_path(self.filename, entry['index']))
+        except OSError:
+            pass
+        entry['complete'] = True
+        self.segments.append(entry)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            'filename': os.path.basename(self.filename),
+            'fps': self.fps,
+            'codec': self.codec,
+            'segment_frames': self.segment_frames,
+            'segment_bytes': self.segment_bytes,
+            'segments': sorted(self.segments, key=lambda entry: entry['index']),
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            log.warning("Unable to write segment manifest: %s", e)
+
+    def release(self):
+        """Close the current segment, discard the pre-opened one and finalize the manifest."""
+        if self._writer is None:
+            return
+        self._io.submit(self._close, self._writer, self._current).result()
+        self._writer = None
+        unused = self._next.result()
+        unused.release()
+        try:
+            os.remove(segment_path(self.filename, self._index + 1))
+        except OSError:
+            pass
+        self._io.shutdown(wait=True)
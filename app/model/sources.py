@@ -0,0 +1,265 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+from .frame_pool import DEFAULT_POOL_SIZE, FramePool
+from .logger import get_logger
+
+
+log = get_logger("sources")
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+class SyntheticCamera:
+    """Procedural frame source with the same interface as WebcamCamera.
+
+    Frames are a precomputed noise pattern with a moving bar, copied into
+    pooled buffers at ``fps`` (0 means as fast as possible), so the whole
+    pipeline can be loaded beyond the rate of any attached device.
+    """
+
+    def __init__(self, width=640, height=480, fps=30, pool_size=DEFAULT_POOL_SIZE):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pool_size = pool_size
+        self.frame_pool = FramePool((height, width, 3), np.uint8, pool_size)
+        rng = np.random.default_rng(0)
+        self._pattern = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        self._index = 0
+        self._next_time = None
+        self.last_frame_meta = (None, None)
+
+    def start(self):
+        self._index = 0
+        self._next_time = time.perf_counter()
+
+    def stop(self):
+        self._next_time = None
+
+    def release(self):
+        self.stop()
+
+    def get_frame(self):
+        if self._next_time is None:
+            return None
+        if self.fps:
+            delay = self._next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time += 1.0 / self.fps
+        frame = self.frame_pool.acquire()
+        np.copyto(frame, self._pattern)
+        bar = (self._index * 8) % self.width
+        frame[:, bar:bar + 8] = 255
+        device_time = self._index * 1000.0 / self.fps if self.fps else None
+        self.last_frame_meta = (device_time, self._index)
+        self._index += 1
+        return frame
+
+    def release_frame(self, frame):
+        self.frame_pool.release(frame)
+
+    def get_mode(self):
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'format': 'BGR8'}
+
+    def get_supported_modes(self, refresh=False):
+        return [
+            {'width': w, 'height': h, 'fps': self.fps, 'format': 'BGR8'}
+            for w, h in ((3840, 2160), (1920, 1080), (1280, 720), (640, 480))
+        ]
+
+    def configure(self, width, height, fps=None, pixel_format=None):
+        running = self._next_time is not None
+        self.__init__(width, height, fps if fps is not None else self.fps, self.pool_size)
+        if running:
+            self.start()
+        return self.get_mode()
+
+
+class VideoFileCamera:
+    """Replay a recorded video file as a camera.
+
+    With ``realtime`` the frames are paced by their presentation timestamps;
+    otherwise they are delivered as fast as they can be decoded. Playback
+    restarts from the beginning at the end of the file when ``loop`` is set.
+    """
+
+    def __init__(self, path, realtime=True, loop=True, pool_size=DEFAULT_POOL_SIZE):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.pool_size = pool_size
+        self.capture = None
+        self.frame_pool = None
+        self.width = None
+        self.height = None
+        self.fps = None
+        self._clock_start = None
+        self.last_frame_meta = (None, None)
+
+    def start(self):
+        if not self.path or not os.path.isfile(self.path):
+            raise FileNotFoundError(f"Video file not found: {self.path}")
+        if self.capture is None:
+            self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            raise IOError(f"Unable to open video file: {self.path}")
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None
+        self.fps = round(self.capture.get(cv2.CAP_PROP_FPS), 2) or None
+        if self.width and self.height:
+            if self.frame_pool is None or not self.frame_pool.matches((self.height, self.width, 3)):
+                self.frame_pool = FramePool((self.height, self.width, 3), np.uint8, self.pool_size)
+        self._clock_start = None
+
+    def stop(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def release(self):
+        self.stop()
+
+    def _read(self):
+        buffer = self.frame_pool.acquire() if self.frame_pool else None
+        ret, frame = self.capture.read(buffer)
+        if not ret:
+            self.release_frame(buffer)
+            return None
+        if frame is not buffer:
+            self.release_frame(buffer)
+        return frame
+
+    def get_frame(self):
+        if self.capture is None:
+            return None
+        frame = self._read()
+        if frame is None and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._clock_start = None
+            frame = self._read()
+        if frame is None:
+            return None
+        position_ms = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+        self.last_frame_meta = (position_ms, int(self.capture.get(cv2.CAP_PROP_POS_FRAMES)) - 1)
+
+        if self.realtime:
+            # 依影片時間軸安排播放時間
+            position = position_ms / 1000.0
+            now = time.perf_counter()
+            if self._clock_start is None:
+                self._clock_start = now - position
+            delay = self._clock_start + position - now
+            if delay > 0:
+                time.sleep(delay)
+        return frame
+
+    def release_frame(self, frame):
+        if self.frame_pool:
+            self.frame_pool.release(frame)
+
+    def get_mode(self):
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'format': 'FILE'}
+
+    def get_supported_modes(self, refresh=False):
+        # 檔案來源的解析度固定
+        if self.width is None and self.path and os.path.isfile(self.path):
+            capture = cv2.VideoCapture(self.path)
+            self.width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None
+            self.height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None
+            self.fps = round(capture.get(cv2.CAP_PROP_FPS), 2) or None
+            capture.release()
+        return [self.get_mode()] if self.width else []
+
+    def configure(self, width, height, fps=None, pixel_format=None):
+        return self.get_mode()
+
+
+class ImageFolderCamera:
+    """Replay a directory of still frames (sorted by file name) as a camera.
+
+    Frames are delivered at ``fps`` when ``realtime`` is set, otherwise as fast
+    as they can be read from disk.
+    """
+
+    def __init__(self, path, fps=30, realtime=True, loop=True):
+        self.path = path
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        # imread 每次都會配置新陣列，因此不使用緩衝池
+        self.frame_pool = None
+        self.files = []
+        self.width = None
+        self.height = None
+        self._index = 0
+        self._next_time = None
+        self.last_frame_meta = (None, None)
+
+    def _scan(self):
+        if not self.path or not os.path.isdir(self.path):
+            raise FileNotFoundError(f"Image folder not found: {self.path}")
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise IOError(f"No images found in {self.path}")
+        first = cv2.imread(self.files[0])
+        if first is not None:
+            self.height, self.width = first.shape[:2]
+
+    def start(self):
+        self._scan()
+        self._index = 0
+        self._next_time = time.perf_counter()
+
+    def stop(self):
+        self._next_time = None
+
+    def release(self):
+        self.stop()
+
+    def get_frame(self):
+        if self._next_time is None or not self.files:
+            return None
+        if self._index >= len(self.files):
+            if not self.loop:
+                return None
+            self._index = 0
+        if self.realtime and self.fps:
+            delay = self._next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time += 1.0 / self.fps
+        frame = cv2.imread(self.files[self._index])
+        device_time = self._index * 1000.0 / self.fps if self.fps else None
+        self.last_frame_meta = (device_time, self._index)
+        self._index += 1
+        if frame is None:
+            log.warning("Unable to read image: %s", self.files[self._index - 1])
+        return frame
+
+    def release_frame(self, frame):
+        pass
+
+    def get_mode(self):
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'format': 'FILE'}
+
+    def get_supported_modes(self, refresh=False):
+        if self.width is None:
+            try:
+                self._scan()
+            except (OSError, FileNotFoundError):
+                return []
+        return [self.get_mode()] if self.width else []
+
+    def configure(self, width, height, fps=None, pixel_format=None):
+        if fps:
+            self.fps = fps
+        return self.get_mode()
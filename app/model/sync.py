@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+
+from .frame_pool import SYNC_PENDING_FRAMES
+from .logger import get_logger
+
+
+log = get_logger("sync")
+
+
+class FrameSynchronizer:
+    """Group frames from several streams by nearest capture timestamp.
+
+    Frames are pushed per stream in capture order. ``pop_groups`` returns
+    dicts ``{stream: Frame}`` whose ``host_time`` values all lie within
+    ``tolerance`` seconds of each other; frames that can no longer be matched
+    (older than the group they would have to join) are discarded. Each
+    stream keeps at most ``max_pending`` frames, so a stalled device cannot
+    grow memory. ``retain``/``release`` hooks keep pooled buffers alive while
+    frames wait here; the caller releases emitted groups with
+    ``release_group``.
+    """
+
+    def __init__(self, streams, tolerance=0.010, max_pending=SYNC_PENDING_FRAMES, retain=None, release=None):
+        self.streams = list(streams)
+        self.tolerance = tolerance
+        self.max_pending = max_pending
+        self.retain = retain
+        self.release = release
+        self.groups_emitted = 0
+        self.frames_discarded = 0
+        self._pending = {name: deque() for name in self.streams}
+        self._lock = threading.Lock()
+
+    def push(self, stream, frame):
+        with self._lock:
+            pending = self._pending[stream]
+            if self.retain is not None:
+                self.retain(frame)
+            pending.append(frame)
+            while len(pending) > self.max_pending:
+                self._discard(pending.popleft())
+
+    def _discard(self, frame):
+        self.frames_discarded += 1
+        if self.release is not None:
+            self.release(frame)
+
+    def pop_groups(self):
+        """Return every complete group available, oldest first."""
+        groups = []
+        with self._lock:
+            while all(self._pending[name] for name in self.streams):
+                heads = {name: self._pending[name][0] for name in self.streams}
+                # 最晚的隊首是所有串流都可能對齊的最早時間
+                pivot = max(frame.host_time for frame in heads.values())
+                stale = [name for name, frame in heads.items() if frame.host_time < pivot - self.tolerance]
+                if stale:
+                    for name in stale:
+                        self._discard(self._pending[name].popleft())
+                    continue
+                groups.append({name: self._pending[name].popleft() for name in self.streams})
+                self.groups_emitted += 1
+        return groups
+
+    def release_group(self, group):
+        if self.release is not None:
+            for frame in group.values():
+                self.release(frame)
+
+    def clear(self):
+        with self._lock:
+            for pending in self._pending.values():
+                while pending:
+                    self._discard(pending.popleft())
+
+    @staticmethod
+    def skew(group):
+        """Spread of the capture times within a group, in seconds."""
+        times = [frame.host_time for frame in group.values()]
+        return max(times) - min(times)
+
+
+class SyncLog:
+    """CSV of synchronized groups: one row per group with each stream's seq and host time."""
+
+    def __init__(self, path, streams):
+        self.streams = list(streams)
+        self._file = open(path, 'w', encoding='utf-8')
+        columns = ["group", "skew_ms"]
+        for name in self.streams:
+            columns += [f"{name}_seq", f"{name}_host_time"]
+        self._file.write(",".join(columns) + "\n")
+        self._count = 0
+
+    def write(self, group):
+        row = [str(self._count), f"{FrameSynchronizer.skew(group) * 1000:.3f}"]
+        for name in self.streams:
+            frame = group[name]
+            row += [str(frame.seq), f"{frame.host_time:.6f}"]
+        self._file.write(",".join(row) + "\n")
+        self._count += 1
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# 管線各階段與速率名稱
+STAGE_GRAB = "grab"
+STAGE_CONVERT = "convert"
+STAGE_RENDER = "render"
+STAGE_ENCODE = "encode"
+STAGES = (STAGE_GRAB, STAGE_CONVERT, STAGE_RENDER, STAGE_ENCODE)
+
+RATE_CAPTURE = "capture"
+RATE_DISPLAY = "display"
+RATE_ENCODE = "encode"
+RATES = (RATE_CAPTURE, RATE_DISPLAY, RATE_ENCODE)
+
+
+class RateMeter:
+    """Events per second measured over a sliding time window."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def mark(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._times.append(now)
+            self._trim(now)
+
+    def _trim(self, now):
+        cutoff = now - self.window
+        while self._times and self._times[0] < cutoff:
+            self._times.popleft()
+
+    def rate(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            if len(self._times) < 2:
+                return 0.0
+            span = self._times[-1] - self._times[0]
+            return (len(self._times) - 1) / span if span > 0 else 0.0
+
+    def reset(self):
+        with self._lock:
+            self._times.clear()
+
+
+class LatencyTracker:
+    """Rolling window of durations with percentile queries (values in seconds)."""
+
+    def __init__(self, size=300):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples[self._count % len(self._samples)] = seconds
+            self._count += 1
+
+    def percentiles(self, points=(50, 95, 99)):
+        """Return the requested percentiles in milliseconds, or None without samples."""
+        with self._lock:
+            n = min(self._count, len(self._samples))
+            if n == 0:
+                return None
+            values = self._samples[:n].copy()
+        return dict(zip(points, (np.percentile(values, points) * 1000.0).tolist()))
+
+    def reset(self):
+        with self._lock:
+            self._count = 0
+
+
+class PipelineTelemetry:
+    """Throughput and per-stage latency of the capture → display → record pipeline.
+
+    Producers call ``mark`` and ``record_latency`` (or use ``measure``) from any
+    thread; ``snapshot`` collects everything for the status panel.
+    """
+
+    def __init__(self, window=2.0, samples=300):
+        self.rates = {name: RateMeter(window) for name in RATES}
+        self.latencies = {name: LatencyTracker(samples) for name in STAGES}
+
+    def mark(self, rate_name):
+        self.rates[rate_name].mark()
+
+    def record_latency(self, stage, seconds):
+        self.latencies[stage].add(seconds)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.latencies[stage].add(time.perf_counter() - start)
+
+    def snapshot(self):
+        return {
+            'fps': {name: meter.rate() for name, meter in self.rates.items()},
+            'latency_ms': {name: tracker.percentiles() for name, tracker in self.latencies.items()},
+        }
+
+    def reset(self):
+        for meter in self.rates.values():
+            meter.reset()
+        for tracker in self.latencies.values():
+            tracker.reset()
+
+
+telemetry = PipelineTelemetry()
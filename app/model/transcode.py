@@ -0,0 +1,296 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+import cv2
+
+from .logger import get_logger
+from .raw_frames import RawFrameReader
+from .video_codecs import DEFAULT_CODEC, get_codec, probe_codec
+from .workers import init_worker
+
+
+log = get_logger("transcode")
+
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser('~'), '.ad_sensor_gui', 'transcode_jobs.json')
+RAW_EXTENSION = ".adraw"
+SEGMENT_MANIFEST_SUFFIX = ".segments.json"
+
+# 任務狀態
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# 狀態檔保留的已完成工作數
+KEEP_FINISHED_JOBS = 20
+
+
+def _job_base(source):
+    if source.endswith(SEGMENT_MANIFEST_SUFFIX):
+        return source[:-len(SEGMENT_MANIFEST_SUFFIX)]
+    return os.path.splitext(source)[0]
+
+
+def _output_path(path, codec):
+    base = os.path.splitext(path)[0]
+    output = base + codec.extension
+    return base + "_transcoded" + codec.extension if output == path else output
+
+
+def _already_encoded(path, codec, source_codec=None):
+    # 編碼格式與容器都已符合時直接沿用原檔，重新編碼只會增加 I/O 並降低畫質
+    if not path.lower().endswith(codec.extension):
+        return False
+    if (source_codec or probe_codec(path)) != codec.name:
+        return False
+    log.info("%s is already %s, not transcoding", path, codec.name)
+    return True
+
+
+def _task(source, output, frames, skip=False):
+    task = {'input': source, 'output': source if skip else output,
+            'start': 0, 'end': frames, 'frames': frames}
+    if skip:
+        task.update(status=DONE, written=frames, skipped=True)
+    return task
+
+
+def transcode_task(task, codec_name):
+    """Encode one task's frame range into its output file (runs in a worker process)."""
+    codec = get_codec(codec_name)
+    source = task['input']
+    written = 0
+    if source.endswith(RAW_EXTENSION):
+        with RawFrameReader(source) as reader:
+            writer = codec.open_writer(task['output'], reader.fps or 30, (reader.width, reader.height))
+            try:
+                for index in range(task['start'], min(task['end'], len(reader))):
+                    image = reader[index]
+                    if image.ndim == 2:
+                        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+                    writer.write(image)
+                    written += 1
+            finally:
+                writer.release()
+    else:
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise IOError(f"Unable to open {source}")
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        writer = codec.open_writer(task['output'], capture.get(cv2.CAP_PROP_FPS) or 30, size)
+        try:
+            while True:
+                ret, image = capture.read()
+                if not ret:
+                    break
+                writer.write(image)
+                written += 1
+        finally:
+            writer.release()
+            capture.release()
+    return task['index'], written
+
+
+def plan_tasks(source, codec, chunk_frames=600):
+    """Split a recording into independent tasks.
+
+    Raw frame files are split into ranges of ``chunk_frames`` frames, a
+    segment manifest into one task per segment, any other video is one task.
+    Videos already written with ``codec`` in its container are not
+    re-encoded: their task is marked done with the source as output.
+    """
+    tasks = []
+    if source.endswith(RAW_EXTENSION):
+        with RawFrameReader(source) as reader:
+            count = len(reader)
+        base = os.path.splitext(source)[0]
+        for part, start in enumerate(range(0, count, chunk_frames)):
+            end = min(start + chunk_frames, count)
+            tasks.append({'input': source, 'output': f"{base}_part{part:03d}{codec.extension}",
+                          'start': start, 'end': end, 'frames': end - start})
+    elif source.endswith(SEGMENT_MANIFEST_SUFFIX):
+        with open(source, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        directory = os.path.dirname(source)
+        for entry in manifest.get('segments', []):
+            path = os.path.join(directory, entry['file'])
+            skip = _already_encoded(path, codec, manifest.get('codec'))
+            tasks.append(_task(path, _output_path(path, codec), entry['frames'], skip))
+    else:
+        capture = cv2.VideoCapture(source)
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) if capture.isOpened() else 0
+        capture.release()
+        tasks.append(_task(source, _output_path(source, codec), frames, _already_encoded(source, codec)))
+    for index, task in enumerate(tasks):
+        task['index'] = index
+        task.setdefault('status', PENDING)
+    return tasks
+
+
+class TranscodeQueue:
+    """Background transcoding of finished recordings on a process pool.
+
+    Jobs are split by ``plan_tasks`` and run on up to ``processes`` worker
+    processes (one core is left for acquisition by default) at a lower
+    priority. Job and task state is saved to ``state_path`` after every task,
+    so ``resume`` continues interrupted jobs on the next start. When a job
+    finishes, ``<source>.transcode.json`` lists its output files.
+    ``on_progress(done_frames, total_frames)`` is called from a pool thread.
+    """
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH, codec=DEFAULT_CODEC, chunk_frames=600,
+                 processes=None, on_progress=None):
+        self.state_path = state_path
+        self.codec = codec
+        self.chunk_frames = chunk_frames
+        self.processes = processes or max(1, (os.cpu_count() or 2) - 1)
+        self.on_progress = on_progress
+        self.jobs = []
+        self._pool = None
+        self._retired_pools = []
+        self._outstanding = 0
+        self._lock = threading.RLock()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('jobs', [])
+        except (OSError, ValueError):
+            return []
+
+    def _save(self):
+        finished = [job for job in self.jobs if job['status'] != PENDING]
+        self.jobs = finished[-KEEP_FINISHED_JOBS:] + [job for job in self.jobs if job['status'] == PENDING]
+        tmp_path = self.state_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'jobs': self.jobs}, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            log.warning("Unable to save transcode state: %s", e)
+
+    def submit(self, source, codec=None):
+        """Queue a raw file, segment manifest or video for transcoding; returns the job id."""
+        codec = get_codec(codec or self.codec)
+        job = {
+            'id': uuid.uuid4().hex[:8],
+            'source': source,
+            'codec': codec.name,
+            'created': time.time(),
+            'status': PENDING,
+            'tasks': plan_tasks(source, codec, self.chunk_frames),
+        }
+        with self._lock:
+            self.jobs.append(job)
+            self._dispatch(job)
+            self._save()
+        log.info("Transcode job %s: %s (%d tasks)", job['id'], source, len(job['tasks']))
+        return job['id']
+
+    def resume(self):
+        """Reload saved jobs and rerun their unfinished tasks; returns the number of jobs resumed."""
+        with self._lock:
+            self.jobs = self._load()
+            pending = [job for job in self.jobs if job.get('status') == PENDING]
+            for job in pending:
+                self._dispatch(job)
+            self._save()
+        if pending:
+            log.info("Resuming %d transcode job(s)", len(pending))
+        return len(pending)
+
+    def _dispatch(self, job):
+        pending = [task for task in job['tasks'] if task['status'] != DONE]
+        if not pending:
+            self._finish_job(job)
+            return
+        if self._pool is None:
+            # fork 會複製 Qt 與擷取執行緒的狀態，改用 spawn 啟動乾淨的行程
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(self.processes, initializer=init_worker)
+        for task in pending:
+            task['status'] = PENDING
+            self._outstanding += 1
+            self._pool.apply_async(
+                transcode_task, (task, job['codec']),
+                callback=lambda result, job=job: self._task_done(job, result),
+                error_callback=lambda error, job=job, task=task: self._task_failed(job, task, error),
+            )
+
+    def _task_done(self, job, result):
+        index, written = result
+        with self._lock:
+            task = job['tasks'][index]
+            task['status'] = DONE
+            task['written'] = written
+            self._task_finished(job)
+
+    def _task_failed(self, job, task, error):
+        log.error("Transcode of %s [%d:%d] failed: %s", task['input'], task['start'], task['end'], error)
+        with self._lock:
+            task['status'] = FAILED
+            self._task_finished(job)
+
+    def _task_finished(self, job):
+        self._outstanding -= 1
+        if all(task['status'] != PENDING for task in job['tasks']):
+            self._finish_job(job)
+        self._save()
+        if self._outstanding == 0 and self._pool is not None:
+            # 閒置時讓工作行程結束以釋放記憶體 (在結果執行緒中不可 join)
+            self._pool.close()
+            self._retired_pools.append(self._pool)
+            self._pool = None
+        if self.on_progress is not None:
+            self.on_progress(*self.progress())
+
+    def _finish_job(self, job):
+        failed = [task for task in job['tasks'] if task['status'] == FAILED]
+        job['status'] = FAILED if failed else DONE
+        manifest = {
+            'source': job['source'],
+            'codec': job['codec'],
+            'status': job['status'],
+            'outputs': [
+                {'file': os.path.basename(task['output']), 'input': os.path.basename(task['input']),
+                 'start': task['start'], 'end': task['end'], 'frames': task.get('written', 0),
+                 'status': task['status'], 'skipped': task.get('skipped', False)}
+                for task in job['tasks']
+            ],
+        }
+        path = _job_base(job['source']) + ".transcode.json"
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+        except OSError as e:
+            log.warning("Unable to write transcode manifest: %s", e)
+        log.info("Transcode job %s %s", job['id'], job['status'])
+
+    def progress(self):
+        """(frames done, frames total) over the unfinished jobs; (0, 0) when idle."""
+        with self._lock:
+            tasks = [task for job in self.jobs if job['status'] == PENDING for task in job['tasks']]
+            total = sum(task['frames'] for task in tasks)
+            done = sum(task['frames'] for task in tasks if task['status'] != PENDING)
+            return done, total
+
+    def is_busy(self):
+        with self._lock:
+            return self._outstanding > 0
+
+    def shutdown(self):
+        """Stop the workers now; unfinished tasks stay pending and are resumed later."""
+        with self._lock:
+            pools = self._retired_pools + ([self._pool] if self._pool else [])
+            self._pool = None
+            self._retired_pools = []
+            self._outstanding = 0
+            self._save()
+        for pool in pools:
+            pool.terminate()
+            pool.join()
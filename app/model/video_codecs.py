@@ -0,0 +1,206 @@
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from .logger import get_logger
+from .raw_frames import RawFrameWriter
+
+
+log = get_logger("codecs")
+
+
+class Codec:
+    """A VideoWriter configuration: FOURCC code plus the container it needs.
+
+    ``fourcc`` None is for codecs that open their own writer (see
+    ``RawFramesCodec``).
+    """
+
+    def __init__(self, name, fourcc, extension, lossless=False, description=""):
+        self.name = name
+        self.fourcc = fourcc
+        self.extension = extension
+        self.lossless = lossless
+        self.description = description
+
+    @property
+    def fourcc_code(self):
+        return cv2.VideoWriter_fourcc(*self.fourcc) if self.fourcc else 0
+
+    def open_writer(self, path, fps, size):
+        return cv2.VideoWriter(path, self.fourcc_code, fps, size)
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+class RawFramesCodec(Codec):
+    """Uncompressed frames in a memory-mapped file (see ``RawFrameWriter``).
+
+    No encoding at all: each frame is one memcpy, for lossless sessions that
+    are transcoded afterwards.
+    """
+
+    def __init__(self, name="MEMMAP", extension=".adraw", description="Raw frames, memory-mapped"):
+        super().__init__(name, None, extension, lossless=True, description=description)
+
+    def open_writer(self, path, fps, size):
+        return RawFrameWriter(path, fps, size)
+
+
+DEFAULT_CODEC = "mp4v"
+
+# 解碼時回報的 FOURCC 與寫入時不同者 (ffmpeg 將 mp4v 回報為 FMP4)
+_DECODED_FOURCC = {"FMP4": "MP4V"}
+
+CODECS = {}
+
+# 依 OpenCV 建置而定，實際開啟一次才能確認可用
+_available = {}
+
+
+def register_codec(codec):
+    """Make a codec selectable in VideoRecorder and the camera panel."""
+    CODECS[codec.name] = codec
+    _available.pop(codec.name, None)
+
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}")
+
+
+register_codec(Codec("mp4v", "mp4v", ".mp4", description="MPEG-4 Part 2"))
+register_codec(Codec("MJPG", "MJPG", ".avi", description="Motion JPEG"))
+register_codec(Codec("FFV1", "FFV1", ".mkv", lossless=True, description="FFV1 lossless"))
+# 不提供 FOURCC 0 的「未壓縮」AVI：ffmpeg 後端會寫成 YUV420P，色度被降採樣而非無損。
+# 需要逐位元相同的影格請使用 FFV1 或 MEMMAP
+register_codec(RawFramesCodec())
+
+
+def fourcc_to_str(code):
+    code = int(code)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+
+
+def probe_codec(path):
+    """Name of the registered codec a video file was written with, or None if unknown."""
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            return None
+        tag = fourcc_to_str(capture.get(cv2.CAP_PROP_FOURCC)).upper()
+    finally:
+        capture.release()
+    tag = _DECODED_FOURCC.get(tag, tag)
+    extension = os.path.splitext(path)[1].lower()
+    for codec in CODECS.values():
+        if codec.fourcc and codec.fourcc.upper() == tag and codec.extension == extension:
+            return codec.name
+    return None
+
+
+def codec_available(name):
+    """True if this OpenCV build can write the codec (probed once, then cached)."""
+    if name not in _available:
+        codec = get_codec(name)
+        directory = tempfile.mkdtemp(prefix="codec_probe_")
+        try:
+            writer = codec.open_writer(os.path.join(directory, "probe" + codec.extension), 30, (64, 64))
+            ok = writer.isOpened()
+            if ok:
+                writer.write(np.zeros((64, 64, 3), np.uint8))
+            writer.release()
+        except cv2.error:
+            ok = False
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        _available[name] = ok
+        if not ok:
+            log.info("Codec %s is not available in this OpenCV build", name)
+    return _available[name]
+
+
+def available_codecs():
+    return [name for name in CODECS if codec_available(name)]
+
+
+def _bench_frames(width, height, count):
+    # 雜訊底圖加上移動亮條 (與 SyntheticCamera 相同)，接近最差壓縮情況
+    rng = np.random.default_rng(0)
+    pattern = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = pattern.copy()
+        bar = (i * 8) % width
+        frame[:, bar:bar + 8] = 255
+        frames.append(frame)
+    return frames
+
+
+def benchmark_codec(name, width, height, frames=60, fps=30, directory=None):
+    """Encode ``frames`` synthetic frames and return encode fps and bytes per frame."""
+    codec = get_codec(name)
+    images = _bench_frames(width, height, frames)
+    own_directory = directory is None
+    directory = directory or tempfile.mkdtemp(prefix="codec_bench_")
+    path = os.path.join(directory, f"bench_{name}_{width}x{height}{codec.extension}")
+    try:
+        writer = codec.open_writer(path, fps, (width, height))
+        if not writer.isOpened():
+            return None
+        start = time.perf_counter()
+        for image in images:
+            writer.write(image)
+        writer.release()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    finally:
+        if own_directory:
+            shutil.rmtree(directory, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+    return {
+        'codec': name,
+        'width': width,
+        'height': height,
+        'encode_fps': round(frames / elapsed, 2),
+        'bytes_per_frame': size // frames,
+    }
+
+
+def benchmark_codecs(resolutions, frames=60, fps=30, codecs=None):
+    """Run ``benchmark_codec`` for every available codec at every (width, height)."""
+    results = []
+    for name in codecs or available_codecs():
+        for width, height in resolutions:
+            result = benchmark_codec(name, width, height, frames, fps)
+            if result is not None:
+                result['realtime'] = result['encode_fps'] >= fps
+                results.append(result)
+                log.info("%s %dx%d: %.1f fps, %d bytes/frame", name, width, height,
+                         result['encode_fps'], result['bytes_per_frame'])
+    return results
+
+
+def recommend_codec(results, width, height, fps, headroom=1.2):
+    """Pick the smallest-output codec that encodes ``width``x``height`` at ``fps`` with headroom.
+
+    Falls back to the fastest codec when none keeps up. Returns None without
+    results for that resolution.
+    """
+    candidates = [r for r in results if r['width'] == width and r['height'] == height]
+    if not candidates:
+        return None
+    sustained = [r for r in candidates if r['encode_fps'] >= fps * headroom]
+    if sustained:
+        return min(sustained, key=lambda r: r['bytes_per_frame'])['codec']
+    return max(candidates, key=lambda r: r['encode_fps'])['codec']
@@ -0,0 +1,21 @@
+import os
+
+import cv2
+
+
+# 背景工作行程的 nice 值，讓擷取與錄影優先取得 CPU
+WORKER_NICENESS = 10
+
+
+def init_worker():
+    """Initializer of the spawn process pools (transcoding, analysis).
+
+    Lowers the worker's priority below capture and recording, and limits
+    OpenCV to one thread: parallelism comes from the number of processes.
+    """
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(WORKER_NICENESS)
+        except OSError:
+            pass
+    cv2.setNumThreads(1)
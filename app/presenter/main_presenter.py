@@ -1,16 +1,47 @@
-from PyQt6.QtCore import QTimer, QObject, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, QObject, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox, QFileDialog
-import cv2
 import os
-import numpy as np
+import threading
+import time
 from datetime import datetime
 
+from model.analysis import AnalysisPipeline
+from model.camera import FILE_CAMERA_TYPES, VideoRecorder
+from model.depth import DepthRecorder
+from model.pacing import DisplayScheduler
+from model.pointcloud import PointCloudEngine, export_npy, export_ply
+from model.preroll import PrerollBuffer
+from model.quality import QualityLog
+from model.sync import FrameSynchronizer, SyncLog
+from model.transcode import TranscodeQueue
+from model.video_codecs import available_codecs, benchmark_codecs, get_codec, recommend_codec
+
+from model.logger import (
+    TRACE, DISPLAY_COALESCED, DISPLAY_PAUSED, FRAME_ERRORS, FRAMES_DISPLAYED, NONE_FRAMES,
+    counters, get_logger
+)
+from model.telemetry import (
+    RATE_CAPTURE, RATE_DISPLAY, RATE_ENCODE,
+    STAGE_CONVERT, STAGE_ENCODE, STAGE_GRAB, STAGE_RENDER, telemetry
+)
+
+
+log = get_logger("presenter")
+
+
+# 狀態頁與錄影品質紀錄使用的分析模組
+QUALITY_PLUGIN = "image_quality"
+
 
 class Presenter(QObject):
     # Custom signals for thread-safe UI updates
     image_update_signal = pyqtSignal(object)
     status_update_signal = pyqtSignal(dict)
     progress_update_signal = pyqtSignal(int, str)
+    frame_ready_signal = pyqtSignal()
+    performance_update_signal = pyqtSignal(dict)
+    codec_benchmark_signal = pyqtSignal(object)
+    transcode_progress_signal = pyqtSignal(int, int)
     
     def __init__(self, model, view):
         super().__init__()
@@ -18,10 +49,35 @@ class Presenter(QObject):
         self.model = model
         self.camera = None
         self.video_recorder = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        # 擷取執行緒通知時只排入一次更新，未處理前不重複發送
+        self._frame_pending = threading.Event()
+        # 目前顯示中的影格 (ImageViewer 直接引用其記憶體)
+        self._displayed_frame = None
+        # 預覽依幀率上限更新，等待期間只保留最新的一格
+        self.display_scheduler = DisplayScheduler(self._display_rate())
+        self._pending_display = None
+        self.display_timer = QTimer()
+        self.display_timer.setSingleShot(True)
+        self.display_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.display_timer.timeout.connect(self._render_pending)
+        # 按下錄影前最近幾秒的影格
+        self.preroll = PrerollBuffer(self.view.camera_panel.preroll_spinbox.value())
+        # 深度串流另以 16 位元 PNG 儲存
+        self.depth_recorder = DepthRecorder()
+        self.display_stream = 'color'
+        # 最近一個含深度的影格 (保留其彩色緩衝區)，供量測與點雲匯出
+        self._last_depth_frame = None
+        self._pointcloud = None
+        self._measure_points = []
+        # 多相機同步擷取：依時間戳記分組，其他相機各自錄成一個檔案
+        self.synchronizer = None
+        self.stream_recorders = {}
+        self.sync_log = None
         self.recording_timer = QTimer()
         self.recording_timer.timeout.connect(self.update_recording_progress)
+        # 效能數據以低頻率更新，避免影響畫面更新
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self.update_performance_status)
         
         # Recording state
         self.is_recording = False
@@ -32,14 +88,44 @@ class Presenter(QObject):
         self.image_update_signal.connect(self.update_image_view)
         self.status_update_signal.connect(self.update_status_view)
         self.progress_update_signal.connect(self.update_progress_view)
+        self.frame_ready_signal.connect(self.update_frame)
+        self.performance_update_signal.connect(self.update_performance_view)
+        self.codec_benchmark_signal.connect(self.show_codec_benchmark)
+        self.transcode_progress_signal.connect(self.update_transcode_progress)
         
-        print("Signals connected")
+        log.debug("Signals connected")
         
         # Connect UI signals
         self.connect_ui_signals()
         
         # Initialize camera model
         self.init_camera_model()
+        if self.camera:
+            # 預錄影格在背景執行緒複製，排隊期間保留緩衝池中的影格
+            self.preroll.retain_frame = self.camera.retain_frame
+            self.preroll.release_frame = self.camera.release_frame
+        
+        # 即時分析模組從相機的影格匯流排取得降採樣影格，於背景執行緒處理
+        self.analysis = AnalysisPipeline(self.camera.frame_bus, on_result=self.on_analysis_result) if self.camera else None
+        self.analysis_timer = QTimer()
+        self.analysis_timer.timeout.connect(self.update_analysis_view)
+        # 錄影期間每格的影像品質寫入影片旁的 CSV
+        self.quality_log = None
+        if self.analysis:
+            self.view.analysis_panel.set_plugins(
+                [(plugin.name, plugin.title, False) for plugin in self.analysis.plugins]
+            )
+            self.view.analysis_panel.plugin_toggled.connect(self.toggle_analysis_plugin)
+            # 影像品質預設啟用，供狀態頁即時顯示
+            self.view.analysis_panel.set_plugin_enabled(QUALITY_PLUGIN, True)
+            self.toggle_analysis_plugin(QUALITY_PLUGIN, True)
+        
+        # 背景轉檔佇列，繼續上次中斷的工作
+        self.transcoder = TranscodeQueue(on_progress=self.transcode_progress_signal.emit)
+        try:
+            self.transcoder.resume()
+        except Exception as e:
+            log.error("繼續轉檔工作失敗: %s", e)
         
     def init_camera_model(self):
         """Initialize camera model with default settings"""
@@ -47,27 +133,37 @@ class Presenter(QObject):
             # Use the model passed from main.py
             self.camera = self.model['camera']
             self.video_recorder = self.model['video_recorder']
+            self.video_recorder.retain_frame = self.camera.retain_frame
+            self.video_recorder.release_frame = self.camera.release_frame
             
             # Update camera combo box with available camera types
             self.view.camera_panel.camera_combo.clear()
             self.view.camera_panel.camera_combo.addItems(self.camera.camera_types)
+            self.update_resolution_modes()
+            self.update_codecs()
+            self.update_sync_camera_list()
             
-            print("使用傳入的相機模組")
+            log.info("使用傳入的相機模組")
         else:
             # Fallback to creating camera model internally
-            from app.model.camera import CameraDevice, VideoRecorder
+            from model.camera import CameraDevice, VideoRecorder
             
             try:
                 self.camera = CameraDevice(camera_type="Webcam")
                 self.video_recorder = VideoRecorder()
+                self.video_recorder.retain_frame = self.camera.retain_frame
+                self.video_recorder.release_frame = self.camera.release_frame
                 
                 # Update camera combo box with available camera types
                 self.view.camera_panel.camera_combo.clear()
                 self.view.camera_panel.camera_combo.addItems(self.camera.camera_types)
+                self.update_resolution_modes()
+                self.update_codecs()
+                self.update_sync_camera_list()
                 
-                print("內部初始化相機模組")
+                log.info("內部初始化相機模組")
             except Exception as e:
-                print(f"相機初始化失敗: {str(e)}")
+                log.error("相機初始化失敗: %s", e)
                 QMessageBox.critical(self.view, "錯誤", f"無法初始化相機: {str(e)}")
     
     def connect_ui_signals(self):
@@ -77,38 +173,73 @@ class Presenter(QObject):
             self.view.camera_panel.open_camera_btn.clicked.connect(self.toggle_camera)
         if not self.view.camera_panel.camera_combo.receivers(self.view.camera_panel.camera_combo.currentTextChanged):
             self.view.camera_panel.camera_combo.currentTextChanged.connect(self.switch_camera)
+        if not self.view.camera_panel.replay_realtime_checkbox.receivers(self.view.camera_panel.replay_realtime_checkbox.toggled):
+            self.view.camera_panel.replay_realtime_checkbox.toggled.connect(self.change_replay_mode)
         if not self.view.camera_panel.resolution_combo.receivers(self.view.camera_panel.resolution_combo.currentTextChanged):
             self.view.camera_panel.resolution_combo.currentTextChanged.connect(self.change_resolution)
         if not self.view.camera_panel.save_video_btn.receivers(self.view.camera_panel.save_video_btn.clicked):
             self.view.camera_panel.save_video_btn.clicked.connect(self.toggle_recording)
+        if not self.view.camera_panel.preroll_spinbox.receivers(self.view.camera_panel.preroll_spinbox.valueChanged):
+            self.view.camera_panel.preroll_spinbox.valueChanged.connect(self.change_preroll)
+        if not self.view.camera_panel.codec_combo.receivers(self.view.camera_panel.codec_combo.currentIndexChanged):
+            self.view.camera_panel.codec_combo.currentIndexChanged.connect(self.change_codec)
+        if not self.view.camera_panel.codec_benchmark_btn.receivers(self.view.camera_panel.codec_benchmark_btn.clicked):
+            self.view.camera_panel.codec_benchmark_btn.clicked.connect(self.run_codec_benchmark)
+        if not self.view.camera_panel.transcode_btn.receivers(self.view.camera_panel.transcode_btn.clicked):
+            self.view.camera_panel.transcode_btn.clicked.connect(self.start_transcode)
+        if not self.view.camera_panel.depth_checkbox.receivers(self.view.camera_panel.depth_checkbox.toggled):
+            self.view.camera_panel.depth_checkbox.toggled.connect(self.change_depth_streams)
+        if not self.view.camera_panel.infrared_checkbox.receivers(self.view.camera_panel.infrared_checkbox.toggled):
+            self.view.camera_panel.infrared_checkbox.toggled.connect(self.change_depth_streams)
+        if not self.view.camera_panel.display_stream_combo.receivers(self.view.camera_panel.display_stream_combo.currentIndexChanged):
+            self.view.camera_panel.display_stream_combo.currentIndexChanged.connect(self.change_display_stream)
+        if not self.view.camera_panel.display_fps_spinbox.receivers(self.view.camera_panel.display_fps_spinbox.valueChanged):
+            self.view.camera_panel.display_fps_spinbox.valueChanged.connect(self.change_display_rate)
+        if not self.view.camera_panel.export_pointcloud_btn.receivers(self.view.camera_panel.export_pointcloud_btn.clicked):
+            self.view.camera_panel.export_pointcloud_btn.clicked.connect(self.export_pointcloud)
+        if not self.view.camera_panel.sync_camera_list.receivers(self.view.camera_panel.sync_camera_list.itemChanged):
+            self.view.camera_panel.sync_camera_list.itemChanged.connect(self.change_sync_cameras)
+        if not self.view.camera_panel.sync_tolerance_spinbox.receivers(self.view.camera_panel.sync_tolerance_spinbox.valueChanged):
+            self.view.camera_panel.sync_tolerance_spinbox.valueChanged.connect(self.change_sync_tolerance)
+        if not self.view.camera_panel.standby_spinbox.receivers(self.view.camera_panel.standby_spinbox.valueChanged):
+            self.view.camera_panel.standby_spinbox.valueChanged.connect(self.change_standby_limit)
+        if not self.view.camera_panel.scan_cameras_btn.receivers(self.view.camera_panel.scan_cameras_btn.clicked):
+            self.view.camera_panel.scan_cameras_btn.clicked.connect(self.scan_cameras)
+        if not self.view.image_viewer.receivers(self.view.image_viewer.pixel_clicked):
+            self.view.image_viewer.pixel_clicked.connect(self.measure_point)
         
-        print("UI 信號連接完成")
+        log.debug("UI 信號連接完成")
         
     def toggle_camera(self):
         """Toggle camera on/off"""
         try:
             if self.view.camera_panel.open_camera_btn.text() == '開啟相機':
-                print("正在開啟相機...")
+                log.info("正在開啟相機...")
                 self.start_camera()
             else:
-                print("正在關閉相機...")
+                log.info("正在關閉相機...")
                 self.stop_camera()
         except Exception as e:
-            print(f"相機操作錯誤: {str(e)}")
+            log.error("相機操作錯誤: %s", e)
             QMessageBox.critical(self.view, "錯誤", f"相機操作失敗: {str(e)}")
     
     def start_camera(self):
         """Start camera and update UI"""
         if self.camera:
             try:
-                self.camera.start()
-                self.timer.start(30)  # 30ms interval for ~33fps
+                self._frame_pending.clear()
+                telemetry.reset()
+                self.configure_preroll()
+                self.camera.start_capture(on_frame=self._on_frame_captured)
+                self._reset_synchronizer()
+                self.view.image_viewer.depth_colorizer.set_depth_scale(self.camera.get_depth_scale())
+                self.telemetry_timer.start(1000)
                 self.view.camera_panel.open_camera_btn.setText('關閉相機')
                 self.view.camera_panel.progress_bar.setFormat('相機已開啟')
                 self.update_camera_status()
-                print("相機已開啟")
+                log.info("相機已開啟")
             except Exception as e:
-                print(f"開啟相機失敗: {str(e)}")
+                log.error("開啟相機失敗: %s", e)
                 QMessageBox.critical(self.view, "錯誤", f"開啟相機失敗: {str(e)}")
     
     def stop_camera(self):
@@ -116,35 +247,450 @@ class Presenter(QObject):
         if self.is_recording:
             self.stop_recording()
         
-        self.timer.stop()
         if self.camera:
-            self.camera.stop()
+            self.camera.stop_capture()
+            self.camera.stop_standby()
+        self.telemetry_timer.stop()
+        self.display_timer.stop()
+        self._release_display(self._pending_display)
+        self._pending_display = None
+        self.display_scheduler.reset()
+        self.preroll.clear()
+        if self.synchronizer is not None:
+            self.synchronizer.clear()
+            self.synchronizer = None
+        self._set_last_depth_frame(None)
+        self._measure_points = []
+        self.view.image_viewer.set_markers([])
         
         self.view.camera_panel.open_camera_btn.setText('開啟相機')
         self.view.camera_panel.progress_bar.setFormat('就緒')
-        self.view.image_viewer.update_view(None)
+        self.update_image_view(None)
         self.update_camera_status()
-        print("相機已關閉")
+        log.info("相機已關閉")
     
     def switch_camera(self, camera_type):
         """Switch between different camera types"""
         if not camera_type or not self.camera:
             return
-            
-        was_running = self.timer.isActive()
-        if was_running:
-            self.timer.stop()
+        
+        # 檔案來源需先選擇要播放的檔案或資料夾
+        if camera_type in FILE_CAMERA_TYPES and not self.select_source_path(camera_type):
+            combo = self.view.camera_panel.camera_combo
+            combo.blockSignals(True)
+            combo.setCurrentText(self.camera.camera_type)
+            combo.blockSignals(False)
+            return
         
         try:
+            switch_start = time.perf_counter()
+            # CameraDevice 會自行停止並重新啟動擷取執行緒 (待命中的相機直接接手)
             self.camera.switch_camera(camera_type)
-            if was_running:
-                self.timer.start(30)
+            self.update_sync_camera_list()
+            self._reset_synchronizer()
+            self.configure_preroll()
+            self.update_resolution_modes()
             self.update_camera_status()
-            print(f"已切換到 {camera_type}")
+            log.info("已切換到 %s (%.0f ms)", camera_type, (time.perf_counter() - switch_start) * 1000)
         except Exception as e:
-            print(f"切換相機錯誤: {str(e)}")
+            log.error("切換相機錯誤: %s", e)
             QMessageBox.critical(self.view, "錯誤", f"切換相機失敗: {str(e)}")
     
+    def change_standby_limit(self, limit):
+        """Keep up to this many previously used cameras streaming for instant switching"""
+        if self.camera:
+            self.camera.set_standby_limit(limit)
+            log.info("待命相機數: %d", limit)
+    
+    def toggle_analysis_plugin(self, name, enabled):
+        """Start or stop an analysis plugin"""
+        try:
+            self.analysis.set_enabled(name, enabled)
+        except Exception as e:
+            log.error("分析模組錯誤: %s", e)
+            QMessageBox.warning(self.view, "警告", f"無法{'啟用' if enabled else '停用'}分析模組: {str(e)}")
+            return
+        if not enabled:
+            self.view.analysis_panel.update_plugin(name, None, None)
+        if self.analysis.stages and not self.analysis_timer.isActive():
+            self.analysis_timer.start(200)
+        elif not self.analysis.stages:
+            self.analysis_timer.stop()
+    
+    def on_analysis_result(self, name, frame, result):
+        """Called on analysis threads; stores image-quality rows while recording"""
+        quality_log = self.quality_log
+        if name == QUALITY_PLUGIN and quality_log is not None:
+            quality_log.write(frame, result)
+    
+    def update_analysis_view(self):
+        """Show the latest analysis results while the analysis tab is visible"""
+        panel = self.view.analysis_panel
+        if not panel.isVisible():
+            return
+        results = self.analysis.results()
+        for name, stats in self.analysis.get_stats().items():
+            result = results.get(name)
+            text = self.analysis.plugin(name).describe(result) if result else None
+            panel.update_plugin(name, text, stats)
+    
+    def update_sync_camera_list(self):
+        """List the cameras that can be captured alongside the active one"""
+        if not self.camera:
+            return
+        others = [t for t in self.camera.camera_types if t != self.camera.camera_type]
+        self.view.camera_panel.set_sync_cameras(others, self.camera.sync_camera_types)
+    
+    def scan_cameras(self):
+        """Look for more connected webcams and RealSense units"""
+        if not self.camera:
+            return
+        try:
+            added = self.camera.discover_cameras()
+        except Exception as e:
+            log.error("搜尋相機錯誤: %s", e)
+            QMessageBox.warning(self.view, "警告", f"搜尋相機失敗: {str(e)}")
+            return
+        combo = self.view.camera_panel.camera_combo
+        combo.blockSignals(True)
+        for camera_type in added:
+            combo.addItem(camera_type)
+        combo.blockSignals(False)
+        self.update_sync_camera_list()
+        self.progress_update_signal.emit(0, f'找到 {len(added)} 台新相機' if added else '沒有找到其他相機')
+    
+    def change_sync_cameras(self, _item=None):
+        """Capture the checked cameras together with the active one"""
+        if not self.camera:
+            return
+        if self.is_recording:
+            QMessageBox.warning(self.view, "警告", "錄影中無法變更同步擷取的相機")
+            self.update_sync_camera_list()
+            return
+        camera_types = self.view.camera_panel.checked_sync_cameras()
+        try:
+            self.camera.set_sync_cameras(camera_types)
+        except Exception as e:
+            log.error("設定同步相機錯誤: %s", e)
+            QMessageBox.warning(self.view, "警告", f"無法同步擷取: {str(e)}")
+            return
+        self._reset_synchronizer()
+        self.update_camera_status()
+        log.info("同步擷取: %s", ", ".join(self.camera.capturing_types()))
+    
+    def change_sync_tolerance(self, _value=None):
+        """Change how far apart frames of one synchronized group may be"""
+        if self.synchronizer is not None:
+            self.synchronizer.tolerance = self.view.camera_panel.sync_tolerance_spinbox.value() / 1000.0
+    
+    def _reset_synchronizer(self):
+        """Group frames of all capturing cameras, or none with a single camera"""
+        if self.synchronizer is not None:
+            self.synchronizer.clear()
+            self.synchronizer = None
+        if not self.camera or not self.camera.is_capturing():
+            return
+        streams = self.camera.capturing_types()
+        if len(streams) > 1:
+            self.synchronizer = FrameSynchronizer(
+                streams, self.view.camera_panel.sync_tolerance_spinbox.value() / 1000.0,
+                retain=self.camera.retain_frame, release=self.camera.release_frame,
+            )
+    
+    def select_source_path(self, camera_type):
+        """Ask for the video file or frame folder replayed by a file-backed camera"""
+        start_dir = os.path.expanduser('~/Videos')
+        if camera_type == "Video File":
+            path, _ = QFileDialog.getOpenFileName(
+                self.view, "選擇影片檔案", start_dir, "影片檔案 (*.mp4 *.avi *.mkv *.mov);;所有檔案 (*.*)"
+            )
+        else:
+            path = QFileDialog.getExistingDirectory(self.view, "選擇影像資料夾", start_dir)
+        if not path:
+            return False
+        try:
+            self.camera.set_source_path(
+                camera_type, path, self.view.camera_panel.replay_realtime_checkbox.isChecked()
+            )
+        except Exception as e:
+            log.error("設定檔案來源錯誤: %s", e)
+            QMessageBox.warning(self.view, "警告", f"無法使用此來源: {str(e)}")
+            return False
+        log.info("檔案來源: %s", path)
+        return True
+    
+    def configure_preroll(self):
+        """Size the pre-roll ring for the current camera mode"""
+        fps = (self.camera.get_mode() or {}).get('fps') if self.camera else None
+        self.preroll.configure(self.view.camera_panel.preroll_spinbox.value(), fps)
+    
+    def change_preroll(self, seconds):
+        """Change how many seconds before the record button are kept"""
+        self.configure_preroll()
+        log.info("預錄時間: %d 秒", seconds)
+    
+    def update_codecs(self):
+        """List the codecs this OpenCV build can write"""
+        codecs = [get_codec(name) for name in available_codecs()]
+        self.view.camera_panel.set_codecs(codecs, self.video_recorder.codec.name if self.video_recorder else None)
+    
+    def change_codec(self, index):
+        """Use the selected codec for the next recording"""
+        name = self.view.camera_panel.codec_combo.itemData(index)
+        if not name or not self.video_recorder:
+            return
+        try:
+            self.video_recorder.set_codec(name)
+            log.info("編碼格式: %s", name)
+        except ValueError as e:
+            log.error("設定編碼格式錯誤: %s", e)
+    
+    def run_codec_benchmark(self):
+        """Measure every codec at the current resolution on a background thread"""
+        mode = (self.camera.get_mode() if self.camera else None) or {}
+        width, height = mode.get('width') or 640, mode.get('height') or 480
+        fps = mode.get('fps') or 30
+        self.view.camera_panel.codec_benchmark_btn.setEnabled(False)
+        self.view.camera_panel.progress_bar.setFormat(f'編碼效能測試中 ({width}x{height})...')
+        
+        def run():
+            try:
+                results = benchmark_codecs([(width, height)], frames=30, fps=fps)
+            except Exception as e:
+                log.exception("編碼效能測試錯誤: %s", e)
+                results = []
+            self.codec_benchmark_signal.emit({'results': results, 'width': width, 'height': height, 'fps': fps})
+        
+        threading.Thread(target=run, name="codec-benchmark", daemon=True).start()
+    
+    def show_codec_benchmark(self, report):
+        """Show the codec benchmark and select the recommended codec"""
+        panel = self.view.camera_panel
+        panel.codec_benchmark_btn.setEnabled(True)
+        if not self.is_recording:
+            capturing = self.camera is not None and self.camera.is_capturing()
+            panel.progress_bar.setFormat('相機已開啟' if capturing else '就緒')
+        results = report['results']
+        if not results:
+            QMessageBox.warning(self.view, "警告", "編碼效能測試失敗")
+            return
+        
+        recommended = recommend_codec(results, report['width'], report['height'], report['fps'])
+        lines = [f"{report['width']}x{report['height']} @ {report['fps']:g} FPS", ""]
+        for r in results:
+            mark = "✓" if r['realtime'] else "✗"
+            lines.append(f"{mark} {r['codec']}: {r['encode_fps']:.1f} FPS, {r['bytes_per_frame'] / 1024:.0f} KB/格")
+        lines += ["", f"建議使用: {recommended}"]
+        
+        index = panel.codec_combo.findData(recommended)
+        if index >= 0:
+            panel.codec_combo.setCurrentIndex(index)
+        QMessageBox.information(self.view, "編碼效能測試", "\n".join(lines))
+    
+    def change_depth_streams(self, _checked=None):
+        """Enable or disable the RealSense depth / infrared streams"""
+        if not self.camera:
+            return
+        panel = self.view.camera_panel
+        try:
+            if not self.camera.set_depth_streams(panel.depth_checkbox.isChecked(), panel.infrared_checkbox.isChecked()):
+                log.info("目前的相機不支援深度或紅外線串流")
+                return
+            self.view.image_viewer.depth_colorizer.set_depth_scale(self.camera.get_depth_scale())
+        except Exception as e:
+            log.error("設定深度串流錯誤: %s", e)
+            QMessageBox.warning(self.view, "警告", f"無法設定深度串流: {str(e)}")
+    
+    def change_display_stream(self, index):
+        """Preview the color, depth or infrared stream"""
+        self.display_stream = self.view.camera_panel.display_stream_combo.itemData(index) or 'color'
+    
+    def _display_rate(self):
+        """Preview rate limit: the configured value, or the screen refresh rate"""
+        rate = self.view.camera_panel.display_fps_spinbox.value()
+        if rate:
+            return rate
+        screen = self.view.screen()
+        return (screen.refreshRate() if screen else 0) or 60
+    
+    def change_display_rate(self, _value=None):
+        """Change the preview rate limit (capture and recording keep their rate)"""
+        rate = self._display_rate()
+        self.display_scheduler.set_rate(rate)
+        log.info("預覽幀率上限: %g FPS", rate)
+    
+    def _preview_visible(self):
+        viewer = self.view.image_viewer
+        return not self.view.isMinimized() and viewer.isVisible() and not viewer.visibleRegion().isEmpty()
+    
+    def _release_display(self, item):
+        if item is None or not self.camera:
+            return
+        for image in (item if isinstance(item, list) else [item]):
+            self.camera.release_frame(image)
+    
+    def _schedule_display(self, item):
+        """Show a retained frame (or list of tiles) no faster than the display rate.
+
+        A frame waiting for its turn is replaced by a newer one instead of
+        queued, and nothing is rendered while the preview cannot be seen.
+        """
+        if not self._preview_visible():
+            counters.incr(DISPLAY_PAUSED)
+            self._release_display(item)
+            return
+        previous, self._pending_display = self._pending_display, item
+        if previous is not None:
+            counters.incr(DISPLAY_COALESCED)
+            self._release_display(previous)
+        delay = self.display_scheduler.delay(time.monotonic())
+        if delay <= 0:
+            self.display_timer.stop()
+            self._render_pending()
+        elif not self.display_timer.isActive():
+            self.display_timer.start(max(1, int(delay * 1000 + 0.999)))
+    
+    def _render_pending(self):
+        item, self._pending_display = self._pending_display, None
+        if item is None:
+            return
+        self.display_scheduler.rendered(time.monotonic())
+        self.image_update_signal.emit(item)
+    
+    def _set_last_depth_frame(self, frame):
+        if frame is not None and self.camera:
+            self.camera.retain_frame(frame)
+        previous, self._last_depth_frame = self._last_depth_frame, frame
+        if previous is not None and self.camera:
+            self.camera.release_frame(previous)
+    
+    def _pointcloud_engine(self):
+        """Point-cloud engine for the active camera's intrinsics (ray tables built once)"""
+        intrinsics = self.camera.get_intrinsics() if self.camera else None
+        depth_scale = self.camera.get_depth_scale() if self.camera else None
+        if not intrinsics or not depth_scale:
+            return None
+        if self._pointcloud is None or not self._pointcloud.matches(intrinsics, depth_scale):
+            self._pointcloud = PointCloudEngine(intrinsics, depth_scale)
+        return self._pointcloud
+    
+    def measure_point(self, x, y):
+        """Measure the 3D point under a click; two clicks give their distance"""
+        frame = self._last_depth_frame
+        engine = self._pointcloud_engine()
+        if frame is None or engine is None:
+            return
+        try:
+            point = engine.point_at(frame.stream('depth'), x, y)
+        except ValueError as e:
+            log.warning("量測失敗: %s", e)
+            return
+        viewer = self.view.image_viewer
+        if point is None:
+            viewer.set_markers([(px, py) for px, py, _ in self._measure_points], "此點無深度資料")
+            return
+        if len(self._measure_points) >= 2:
+            self._measure_points = []
+        self._measure_points.append((x, y, point))
+        markers = [(px, py) for px, py, _ in self._measure_points]
+        if len(self._measure_points) == 2:
+            distance = float(((self._measure_points[0][2] - point) ** 2).sum() ** 0.5)
+            text = f"距離 {distance:.3f} m"
+            log.info("量測距離: %.3f m", distance)
+        else:
+            text = f"({point[0]:.3f}, {point[1]:.3f}, {point[2]:.3f}) m"
+        viewer.set_markers(markers, text)
+    
+    def export_pointcloud(self):
+        """Save the point cloud of the latest depth frame as PLY or NPY"""
+        frame = self._last_depth_frame
+        engine = self._pointcloud_engine()
+        if frame is None or engine is None:
+            QMessageBox.warning(self.view, "警告", "請先開啟 RealSense 相機並啟用深度串流")
+            return
+        # 先複製，避免選擇檔案期間影格被更新
+        depth, color = frame.stream('depth').copy(), frame.image.copy()
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self.view, "匯出點雲",
+            os.path.join(os.path.expanduser('~/Videos'), f"pointcloud_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ply"),
+            "PLY 點雲 (*.ply);;NumPy 陣列 (*.npy)"
+        )
+        if not path:
+            return
+        try:
+            if path.endswith('.npy') or selected_filter.startswith('NumPy'):
+                if not path.endswith('.npy'):
+                    path += '.npy'
+                export_npy(path, engine.deproject(depth))
+            else:
+                if not path.endswith('.ply'):
+                    path += '.ply'
+                if color.shape[:2] == depth.shape:
+                    export_ply(path, *engine.deproject(depth, color=color))
+                else:
+                    export_ply(path, engine.deproject(depth))
+            self.progress_update_signal.emit(100, f'點雲已匯出: {os.path.basename(path)}')
+        except Exception as e:
+            log.error("匯出點雲錯誤: %s", e)
+            QMessageBox.critical(self.view, "錯誤", f"匯出點雲失敗: {str(e)}")
+    
+    def start_transcode(self):
+        """Queue a finished recording for background transcoding to MP4"""
+        path, _ = QFileDialog.getOpenFileName(
+            self.view, "選擇要轉檔的錄影", os.path.expanduser('~/Videos'),
+            "錄影檔案 (*.adraw *.segments.json *.mp4 *.avi *.mkv);;所有檔案 (*.*)"
+        )
+        if not path:
+            return
+        try:
+            self.transcoder.submit(path)
+        except Exception as e:
+            log.error("建立轉檔工作錯誤: %s", e)
+            QMessageBox.critical(self.view, "錯誤", f"無法轉檔: {str(e)}")
+            return
+        self.update_transcode_progress(*self.transcoder.progress())
+    
+    def update_transcode_progress(self, done, total):
+        """Show transcoding progress unless a recording is using the progress bar"""
+        if self.is_recording:
+            return
+        if total == 0:
+            self.progress_update_signal.emit(100, '轉檔完成')
+        else:
+            progress = int(done * 100 / total)
+            self.progress_update_signal.emit(progress, f'背景轉檔中... {progress}%')
+    
+    def change_replay_mode(self, realtime):
+        """Replay file sources at original timing or as fast as possible"""
+        if self.camera:
+            self.camera.set_replay_realtime(realtime)
+    
+    def update_resolution_modes(self):
+        """Fill the resolution combo with the modes the active camera really supports"""
+        if not self.camera:
+            return
+        try:
+            modes = self.camera.get_supported_modes()
+        except Exception as e:
+            log.warning("查詢相機模式錯誤: %s", e)
+            modes = []
+        if not modes:
+            return
+        
+        # 預設選擇目前模式，否則選擇不超過 Full HD 的最高模式
+        current = self.camera.get_mode() or {}
+        selected = next(
+            (i for i, m in enumerate(modes)
+             if (m['width'], m['height']) == (current.get('width'), current.get('height'))),
+            None
+        )
+        if selected is None:
+            selected = next(
+                (i for i, m in enumerate(modes) if m['width'] * m['height'] <= 1920 * 1080), 0
+            )
+        self.view.camera_panel.set_resolution_modes(modes, selected)
+        self.change_resolution(self.view.camera_panel.resolution_combo.currentText())
+    
     def change_resolution(self, resolution_text):
         """Change camera resolution"""
         if not resolution_text or not self.camera:
@@ -152,70 +698,166 @@ class Presenter(QObject):
             
         # Parse resolution from text
         try:
-            if 'x' in resolution_text:
+            mode = self.view.camera_panel.resolution_combo.currentData()
+            if mode is None and 'x' in resolution_text:
                 res_part = resolution_text.split('(')[0].strip()
                 width, height = map(int, res_part.split('x'))
-                
-                # For RealSense camera, reinitialize with new resolution
-                if self.camera.camera_type == "RealSense":
-                    was_running = self.timer.isActive()
-                    if was_running:
-                        self.timer.stop()
-                    self.camera.camera.reset(width=width, height=height)
-                    if was_running:
-                        self.camera.start()
-                        self.timer.start(30)
-                
-                # Update video recorder resolution
-                if self.video_recorder:
-                    self.video_recorder.width = width
-                    self.video_recorder.height = height
-                
-                self.update_camera_status()
-                print(f"解析度已更改為 {width}x{height}")
+                mode = {'width': width, 'height': height, 'fps': None, 'format': None}
+            if mode is None:
+                return
+            
+            # 直接讓裝置輸出所選模式，錄影時不需再逐格縮放；
+            # 已是目前模式時不重新設定，避免重啟擷取 (切換待命相機時尤其重要)
+            current = self.camera.get_mode() or {}
+            if all(mode.get(key) in (None, current.get(key)) for key in ('width', 'height', 'fps', 'format')):
+                granted = current
+            else:
+                granted = self.camera.set_mode(
+                    mode['width'], mode['height'], mode.get('fps'), mode.get('format')
+                ) or mode
+            width = granted.get('width') or mode['width']
+            height = granted.get('height') or mode['height']
+            
+            # Update video recorder resolution
+            if self.video_recorder:
+                self.video_recorder.width = width
+                self.video_recorder.height = height
+            
+            self.configure_preroll()
+            self.update_camera_status()
+            log.info("解析度已更改為 %dx%d", width, height)
         except Exception as e:
-            print(f"更改解析度錯誤: {str(e)}")
+            log.error("更改解析度錯誤: %s", e)
             QMessageBox.warning(self.view, "警告", f"無法更改解析度: {str(e)}")
     
+    def _on_frame_captured(self):
+        """Called from the capture thread; schedule a UI update if none is pending"""
+        if not self._frame_pending.is_set():
+            self._frame_pending.set()
+            self.frame_ready_signal.emit()
+    
     def update_frame(self):
         """Update camera frame in the UI"""
-        if self.camera:
+        self._frame_pending.clear()
+        if self.synchronizer is not None:
+            self.update_sync_frames()
+        elif self.camera:
+            frames = []
             try:
-                frame = self.camera.get_frame()
+                frames = self.camera.drain_frames()
+                
+                # Record every captured frame (使用原始 BGR 格式)
+                if self.is_recording and self.video_recorder and self.video_recorder.is_recording:
+                    for captured in frames:
+                        self.video_recorder.record_frame(captured)
+                        if self.depth_recorder.is_recording:
+                            self.depth_recorder.record_frame(captured)
+                elif self.preroll.enabled:
+                    for captured in frames:
+                        self.preroll.push(captured)
+                
+                # Only the newest frame is displayed (沒有所選串流時顯示彩色影像)
+                frame = None
+                if frames:
+                    frame = frames[-1].stream(self.display_stream)
+                    if frame is None:
+                        frame = frames[-1].image
                 if frame is not None:
-                    print(f"Got frame: {frame.shape}, dtype: {frame.dtype}")
+                    if log.isEnabledFor(TRACE):
+                        log.log(TRACE, "Got frame #%d: %s, dtype: %s (%d drained)",
+                                frames[-1].seq, frame.shape, frame.dtype, len(frames))
                     
-                    # Convert BGR to RGB for display
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    print(f"Converted to RGB: {rgb_frame.shape}")
-                    
-                    # Ensure frame is contiguous
-                    if not rgb_frame.flags['C_CONTIGUOUS']:
-                        rgb_frame = np.ascontiguousarray(rgb_frame)
-                        print("Made frame contiguous")
-                    
-                    # Emit signal to update the display
-                    self.image_update_signal.emit(rgb_frame)
-                    
-                    # Record frame if recording (使用原始 BGR 格式)
-                    if self.is_recording and self.video_recorder and self.video_recorder.is_recording:
-                        self.video_recorder.record_frame(frame)
+                    # ImageViewer 直接顯示 BGR 緩衝區，顯示期間保留該影格
+                    self.camera.retain_frame(frame)
+                    self._schedule_display(frame)
+                    if frames[-1].stream('depth') is not None:
+                        self._set_last_depth_frame(frames[-1])
                 else:
-                    print("Frame is None from camera")
+                    counters.incr(NONE_FRAMES)
+                    log.log(TRACE, "Frame is None from camera")
             except Exception as e:
-                print(f"更新畫面錯誤: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                counters.incr(FRAME_ERRORS)
+                log.exception("更新畫面錯誤: %s", e)
+            finally:
+                # 錄影與顯示各自保留所需的影格，其餘歸還緩衝池
+                for captured in frames:
+                    self.camera.release_frame(captured)
+    
+    def _stream_recorder(self, camera_type):
+        if camera_type == self.camera.camera_type:
+            return self.video_recorder
+        return self.stream_recorders.get(camera_type)
+    
+    def update_sync_frames(self):
+        """Record every camera's frames and show the newest synchronized group side by side"""
+        streams = self.synchronizer.streams
+        drained = {}
+        groups = []
+        try:
+            for camera_type in streams:
+                drained[camera_type] = self.camera.drain_frames(camera_type)
+            
+            # 每台相機各有自己的編碼執行緒，慢的裝置不會拖慢其他相機
+            recording = self.is_recording and self.video_recorder and self.video_recorder.is_recording
+            for camera_type, frames in drained.items():
+                recorder = self._stream_recorder(camera_type) if recording else None
+                for captured in frames:
+                    if recorder is not None and recorder.is_recording:
+                        recorder.record_frame(captured)
+                    self.synchronizer.push(camera_type, captured)
+            
+            # 預錄與深度只套用在目前選擇的相機
+            primary = drained[streams[0]]
+            if recording and self.depth_recorder.is_recording:
+                for captured in primary:
+                    self.depth_recorder.record_frame(captured)
+            elif not recording and self.preroll.enabled:
+                for captured in primary:
+                    self.preroll.push(captured)
+            
+            groups = self.synchronizer.pop_groups()
+            if self.sync_log is not None:
+                for group in groups:
+                    self.sync_log.write(group)
+            if groups:
+                newest = groups[-1]
+                images = []
+                for camera_type in streams:
+                    image = newest[camera_type].stream(self.display_stream)
+                    images.append(newest[camera_type].image if image is None else image)
+                if log.isEnabledFor(TRACE):
+                    log.log(TRACE, "Sync group of %d streams, skew %.1f ms (%d groups)",
+                            len(streams), FrameSynchronizer.skew(newest) * 1000, len(groups))
+                for image in images:
+                    self.camera.retain_frame(image)
+                self._schedule_display(images)
+        except Exception as e:
+            counters.incr(FRAME_ERRORS)
+            log.exception("更新同步畫面錯誤: %s", e)
+        finally:
+            for group in groups:
+                self.synchronizer.release_group(group)
+            for frames in drained.values():
+                for captured in frames:
+                    self.camera.release_frame(captured)
     
     def update_image_view(self, frame):
-        """Update the image viewer with new frame"""
-        print("update_image_view called")
+        """Update the image viewer with a new frame, or a list of frames to tile"""
         try:
-            self.view.image_viewer.update_view(frame)
+            if isinstance(frame, list):
+                labels = self.synchronizer.streams if self.synchronizer is not None else None
+                self.view.image_viewer.update_tiles(frame, labels)
+            else:
+                self.view.image_viewer.update_view(frame)
+            if frame is not None:
+                counters.incr(FRAMES_DISPLAYED)
         except Exception as e:
-            print(f"Error in update_image_view: {e}")
-            import traceback
-            traceback.print_exc()
+            counters.incr(FRAME_ERRORS)
+            log.exception("Error in update_image_view: %s", e)
+        finally:
+            # 前一個顯示的影格已不再被引用
+            previous, self._displayed_frame = self._displayed_frame, frame
+            self._release_display(previous)
     
     def toggle_recording(self):
         """Toggle video recording"""
@@ -226,7 +868,7 @@ class Presenter(QObject):
     
     def start_recording(self):
         """Start video recording"""
-        if not self.camera or not self.timer.isActive():
+        if not self.camera or not self.camera.is_capturing():
             QMessageBox.warning(self.view, "警告", "請先開啟相機")
             return
         
@@ -235,34 +877,49 @@ class Presenter(QObject):
         if not os.path.exists(videos_dir):
             os.makedirs(videos_dir)
             
+        # 副檔名需符合編碼格式使用的容器
+        extension = self.video_recorder.codec.extension
         filename, _ = QFileDialog.getSaveFileName(
             self.view, 
             "儲存影片", 
-            os.path.join(videos_dir, f"video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"),
-            "影片檔案 (*.mp4);;所有檔案 (*.*)"
+            os.path.join(videos_dir, f"video_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"),
+            f"影片檔案 (*{extension});;所有檔案 (*.*)"
         )
         
         if not filename:
             return
         
-        # Ensure .mp4 extension
-        if not filename.endswith('.mp4'):
-            filename += '.mp4'
+        # Ensure container extension
+        if not filename.endswith(extension):
+            filename += extension
         
         # Get duration from UI
         duration = self.view.camera_panel.duration_spinbox.value()
         
-        # Get current resolution
-        resolution_text = self.view.camera_panel.resolution_combo.currentText()
-        width, height = 640, 480  # Default
-        if 'x' in resolution_text:
-            res_part = resolution_text.split('(')[0].strip()
-            width, height = map(int, res_part.split('x'))
+        # 使用相機實際輸出的解析度與幀率，避免逐格縮放
+        mode = self.camera.get_mode() or {}
+        width, height = mode.get('width'), mode.get('height')
+        fps = mode.get('fps') or 30
+        if not width or not height:
+            width, height = 640, 480  # Default
+            resolution_text = self.view.camera_panel.resolution_combo.currentText()
+            if 'x' in resolution_text:
+                res_part = resolution_text.split('(')[0].strip()
+                width, height = map(int, res_part.split('x'))
         
         try:
             # Configure and start recording
-            self.video_recorder.set_config(filename, width, height, 30, duration)
+            self.video_recorder.set_config(filename, width, height, fps, duration)
+            self.video_recorder.set_segmenting(self.view.camera_panel.segment_spinbox.value())
             self.video_recorder.start()
+            # 預錄影格不需複製，直接交給編碼執行緒寫在即時影格之前
+            preroll_count = self.video_recorder.record_preroll(self.preroll.take())
+            if self.synchronizer is not None:
+                self.start_stream_recorders(filename, duration)
+            if self.camera.get_depth_scale() is not None:
+                self.depth_recorder.start(os.path.splitext(filename)[0] + "_depth")
+            if self.analysis:
+                self.start_quality_log(filename)
             
             self.is_recording = True
             self.recording_start_time = datetime.now()
@@ -272,37 +929,92 @@ class Presenter(QObject):
             self.recording_timer.start(100)  # Update progress every 100ms
             
             self.update_camera_status()
-            print(f"開始錄影: {filename}")
+            log.info("開始錄影: %s (預錄 %d 格)", filename, preroll_count)
         except Exception as e:
-            print(f"開始錄影錯誤: {str(e)}")
+            log.error("開始錄影錯誤: %s", e)
             QMessageBox.critical(self.view, "錯誤", f"開始錄影失敗: {str(e)}")
     
+    def start_stream_recorders(self, filename, duration):
+        """Record each synchronized camera to its own file next to the main recording"""
+        base, extension = os.path.splitext(filename)
+        self.stream_recorders = {}
+        for camera_type in self.synchronizer.streams[1:]:
+            mode = self.camera.get_mode(camera_type) or {}
+            recorder = VideoRecorder(codec=self.video_recorder.codec.name)
+            recorder.retain_frame = self.camera.retain_frame
+            recorder.release_frame = self.camera.release_frame
+            recorder.set_config(
+                f"{base}_{camera_type.replace(' ', '_')}{extension}",
+                mode.get('width') or 640, mode.get('height') or 480, mode.get('fps') or 30, duration
+            )
+            recorder.set_segmenting(self.view.camera_panel.segment_spinbox.value())
+            recorder.start()
+            self.stream_recorders[camera_type] = recorder
+        # 每組同步影格在各檔案中的序號與時間
+        self.sync_log = SyncLog(base + ".sync.csv", self.synchronizer.streams)
+    
+    def start_quality_log(self, filename):
+        """Write per-frame image-quality metrics next to the recording"""
+        if not self.analysis.is_enabled(QUALITY_PLUGIN):
+            self.view.analysis_panel.set_plugin_enabled(QUALITY_PLUGIN, True)
+            self.toggle_analysis_plugin(QUALITY_PLUGIN, True)
+        self.quality_log = QualityLog(os.path.splitext(filename)[0] + ".quality.csv")
+    
     def stop_recording(self):
         """Stop video recording"""
         if self.video_recorder and self.video_recorder.is_recording:
+            # 不等待編碼完成，剩餘影格由背景執行緒寫入
             self.video_recorder.stop()
+        for recorder in self.stream_recorders.values():
+            if recorder.is_recording:
+                recorder.stop()
+        if self.sync_log is not None:
+            self.sync_log.close()
+            self.sync_log = None
+        if self.quality_log is not None:
+            self.quality_log.close()
+            self.quality_log = None
+        if self.depth_recorder.is_recording:
+            self.depth_recorder.stop()
         
         self.is_recording = False
-        self.recording_timer.stop()
         
         self.view.camera_panel.save_video_btn.setText('開始錄影')
-        self.progress_update_signal.emit(100, '錄影已完成並儲存')
+        if self.is_flushing_recording():
+            self.progress_update_signal.emit(100, '正在寫入剩餘影格...')
+        else:
+            self.recording_timer.stop()
+            self.progress_update_signal.emit(100, '錄影已完成並儲存')
         
         self.update_camera_status()
-        print("錄影已停止")
+        stats = self.video_recorder.get_stats() if self.video_recorder else {}
+        log.info("錄影已停止 (已排入 %d 格, 捨棄 %d 格, 補幀 %d 格, 略過 %d 格)",
+                 stats.get('queued', 0), stats.get('dropped', 0),
+                 stats.get('duplicated', 0), stats.get('skipped', 0))
+    
+    def is_flushing_recording(self):
+        """True while stopped video or depth recordings are still being written"""
+        video_flushing = self.video_recorder is not None and self.video_recorder.is_flushing()
+        streams_flushing = any(recorder.is_flushing() for recorder in self.stream_recorders.values())
+        return video_flushing or streams_flushing or self.depth_recorder.is_flushing()
     
     def update_recording_progress(self):
-        """Update recording progress bar"""
-        if not self.is_recording or not self.recording_start_time:
+        """Update recording progress bar from the recorded media time"""
+        if not self.is_recording:
+            # 停止後持續檢查背景編碼是否已寫完
+            if self.is_flushing_recording():
+                return
+            self.recording_timer.stop()
+            self.progress_update_signal.emit(100, '錄影已完成並儲存')
+            return
+        if not self.video_recorder:
             return
         
-        elapsed = (datetime.now() - self.recording_start_time).total_seconds()
-        progress = min(int((elapsed / self.recording_duration) * 100), 100)
-        
+        # VideoRecorder 依影格時間軸判斷時長並自行停止，此處只反映其狀態
+        progress = int(self.video_recorder.progress() * 100)
         self.progress_update_signal.emit(progress, f'正在錄影... {progress}%')
         
-        # Auto-stop if duration reached
-        if progress >= 100:
+        if not self.video_recorder.is_recording:
             self.stop_recording()
     
     def update_progress_view(self, value, text):
@@ -315,10 +1027,20 @@ class Presenter(QObject):
         if not self.camera:
             return
         
+        # 尚無量測值時顯示裝置協商的幀率
+        measured = telemetry.rates[RATE_CAPTURE].rate()
+        mode_fps = (self.camera.get_mode() or {}).get('fps')
+        if measured > 0:
+            fps_text = f'{measured:.1f} FPS'
+        elif mode_fps:
+            fps_text = f'{mode_fps:g} FPS'
+        else:
+            fps_text = '—'
+        
         status = {
             'resolution': self.view.camera_panel.resolution_combo.currentText().split('(')[0].strip(),
-            'camera': self.camera.camera_type,
-            'fps': '30 FPS',
+            'camera': ' + '.join(self.camera.capturing_types()) if self.synchronizer else self.camera.camera_type,
+            'fps': fps_text,
             'output': os.path.expanduser('~/Videos')
         }
         
@@ -331,6 +1053,59 @@ class Presenter(QObject):
         self.view.status_panel.fps_value.setText(status['fps'])
         self.view.status_panel.output_value.setText(status['output'])
     
+    def update_performance_status(self):
+        """Collect pipeline telemetry for the status panel"""
+        snapshot = telemetry.snapshot()
+        capture_stats = self.camera.get_capture_stats() if self.camera else {}
+        recorder_stats = self.video_recorder.get_stats() if self.video_recorder else {}
+        snapshot['queue_depth'] = {
+            'capture': capture_stats.get('queue_depth', 0),
+            'encode': recorder_stats.get('queue_depth', 0),
+        }
+        snapshot['dropped'] = {
+            'capture': capture_stats.get('overwritten', 0),
+            'device': capture_stats.get('device_dropped', 0),
+            'encode': recorder_stats.get('dropped', 0),
+        }
+        snapshot['quality'] = self.analysis.results().get(QUALITY_PLUGIN) if self.analysis else None
+        self.performance_update_signal.emit(snapshot)
+    
+    def update_performance_view(self, snapshot):
+        """Show measured FPS, latency percentiles, queue depths and drops"""
+        panel = self.view.status_panel
+        fps = snapshot['fps']
+        panel.fps_value.setText(f"{fps[RATE_CAPTURE]:.1f} FPS")
+        panel.capture_fps_value.setText(f"{fps[RATE_CAPTURE]:.1f} FPS")
+        panel.display_fps_value.setText(f"{fps[RATE_DISPLAY]:.1f} FPS")
+        panel.encode_fps_value.setText(f"{fps[RATE_ENCODE]:.1f} FPS")
+        
+        latency_labels = {
+            STAGE_GRAB: panel.grab_latency_value,
+            STAGE_CONVERT: panel.convert_latency_value,
+            STAGE_RENDER: panel.render_latency_value,
+            STAGE_ENCODE: panel.encode_latency_value,
+        }
+        for stage, label in latency_labels.items():
+            p = snapshot['latency_ms'][stage]
+            label.setText('—' if p is None else f"{p[50]:.1f} / {p[95]:.1f} / {p[99]:.1f} ms")
+        
+        depth = snapshot['queue_depth']
+        dropped = snapshot['dropped']
+        panel.queue_depth_value.setText(f"擷取 {depth['capture']} / 編碼 {depth['encode']}")
+        panel.dropped_frames_value.setText(
+            f"擷取 {dropped['capture']} / 裝置 {dropped['device']} / 編碼 {dropped['encode']}"
+        )
+        
+        quality = snapshot['quality']
+        if quality is None:
+            for label in (panel.sharpness_value, panel.exposure_value, panel.clipping_value, panel.motion_value):
+                label.setText('—')
+        else:
+            panel.sharpness_value.setText(f"{quality['sharpness']:.0f}")
+            panel.exposure_value.setText(f"{quality['brightness']:.0f} / {quality['exposure']:+.2f}")
+            panel.clipping_value.setText(f"{quality['underexposed']:.1%} / {quality['overexposed']:.1%}")
+            panel.motion_value.setText(f"{quality['motion']:.1f}")
+    
     def cleanup(self):
         """Clean up resources when closing"""
         if self.is_recording:
@@ -338,4 +1113,19 @@ class Presenter(QObject):
         
         if self.camera:
             self.stop_camera()
-            self.camera.release()
\ No newline at end of file
+            self.preroll.close()
+            self.camera.release()
+        
+        # 等待背景編碼將剩餘影格寫入檔案
+        if self.video_recorder:
+            self.video_recorder.wait_finished(timeout=10)
+        for recorder in self.stream_recorders.values():
+            recorder.wait_finished(timeout=10)
+        self.depth_recorder.wait_finished(timeout=10)
+        
+        self.analysis_timer.stop()
+        if self.analysis:
+            self.analysis.stop()
+        
+        # 未完成的轉檔會在下次啟動時繼續
+        self.transcoder.shutdown()
\ No newline at end of file
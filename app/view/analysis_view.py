@@ -0,0 +1,153 @@
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QFrame,
+    QVBoxLayout,
+    QGroupBox,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView
+)
+
+
+class AnalysisInterface(QFrame):
+    # 勾選或取消分析模組時以 (模組名稱, 是否啟用) 發出
+    plugin_toggled = pyqtSignal(str, bool)
+
+    COLUMNS = ['模組', '結果', '幀率', '延遲 (p50/p95)', '略過']
+
+    def __init__(self):
+        super().__init__()
+        self._rows = {}
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle('即時分析')
+
+        # Set widget background to white
+        self.setStyleSheet("background-color: white;")
+
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+
+        # 標題
+        title_label = QLabel('即時分析')
+        title_font = QFont()
+        title_font.setPointSize(18)
+        title_font.setBold(True)
+        title_label.setFont(title_font)
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title_label.setStyleSheet("color: #2c3e50; padding: 10px;")
+        main_layout.addWidget(title_label)
+
+        # 分析模組群組
+        plugins_group = QGroupBox('分析模組')
+        plugins_group.setStyleSheet("""
+            QGroupBox {
+                background-color: #f8f9fa;
+                border: 1px solid #e9ecef;
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 15px;
+                font-weight: bold;
+                color: #495057;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px 0 5px;
+            }
+        """)
+        plugins_layout = QVBoxLayout()
+
+        hint_label = QLabel('勾選的模組以降採樣影格在背景執行，不影響擷取與錄影幀率；處理不及時會自動略過影格。')
+        hint_label.setWordWrap(True)
+        hint_label.setStyleSheet("color: #6c757d; font-weight: normal;")
+        plugins_layout.addWidget(hint_label)
+
+        self.plugin_table = QTableWidget(0, len(self.COLUMNS))
+        self.plugin_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.plugin_table.verticalHeader().setVisible(False)
+        self.plugin_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.plugin_table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        header = self.plugin_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.plugin_table.setStyleSheet("""
+            QTableWidget {
+                background-color: white;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+                color: #212529;
+                font-weight: normal;
+            }
+        """)
+        self.plugin_table.itemChanged.connect(self._on_item_changed)
+        plugins_layout.addWidget(self.plugin_table)
+
+        plugins_group.setLayout(plugins_layout)
+        main_layout.addWidget(plugins_group)
+
+        # 新增彈性空間
+        main_layout.addStretch()
+
+    def set_plugins(self, plugins):
+        """列出分析模組
+
+        Args:
+            plugins: list of (name, title, enabled)
+        """
+        self.plugin_table.blockSignals(True)
+        self.plugin_table.setRowCount(len(plugins))
+        self._rows = {}
+        for row, (name, title, enabled) in enumerate(plugins):
+            item = QTableWidgetItem(title or name)
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if enabled else Qt.CheckState.Unchecked)
+            self.plugin_table.setItem(row, 0, item)
+            for column in range(1, len(self.COLUMNS)):
+                self.plugin_table.setItem(row, column, QTableWidgetItem('—'))
+            self._rows[name] = row
+        self.plugin_table.blockSignals(False)
+
+    def set_plugin_enabled(self, name, enabled):
+        """Check or uncheck a plugin without emitting plugin_toggled"""
+        row = self._rows.get(name)
+        if row is None:
+            return
+        self.plugin_table.blockSignals(True)
+        self.plugin_table.item(row, 0).setCheckState(Qt.CheckState.Checked if enabled else Qt.CheckState.Unchecked)
+        self.plugin_table.blockSignals(False)
+
+    def update_plugin(self, name, result_text, stats):
+        """更新單一模組的結果與效能
+
+        Args:
+            name: plugin name
+            result_text: text of the latest result, or None
+            stats: dict from AnalysisStage.get_stats, or None when disabled
+        """
+        row = self._rows.get(name)
+        if row is None:
+            return
+        if stats is None:
+            values = ['—', '—', '—', '—']
+        else:
+            latency = stats['latency_ms']
+            values = [
+                result_text or '—',
+                f"{stats['fps']:.1f} FPS",
+                '—' if latency is None else f"{latency[50]:.1f} / {latency[95]:.1f} ms",
+                f"{stats['skipped'] + stats['dropped']}",
+            ]
+        self.plugin_table.blockSignals(True)
+        for column, value in enumerate(values, start=1):
+            self.plugin_table.item(row, column).setText(value)
+        self.plugin_table.blockSignals(False)
+
+    def _on_item_changed(self, item):
+        if item.column() != 0:
+            return
+        self.plugin_toggled.emit(item.data(Qt.ItemDataRole.UserRole), item.checkState() == Qt.CheckState.Checked)
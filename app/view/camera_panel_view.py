@@ -10,7 +10,10 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QSpinBox,
     QFormLayout,
-    QProgressBar
+    QProgressBar,
+    QCheckBox,
+    QListWidget,
+    QListWidgetItem
 )
 
 
@@ -114,6 +117,86 @@ class CameraInterface(QFrame):
         camera_selection_layout.addWidget(self.camera_combo)
         camera_layout.addLayout(camera_selection_layout)
         
+        # 檔案來源播放方式
+        self.replay_realtime_checkbox = QCheckBox('檔案來源依原始時序播放')
+        self.replay_realtime_checkbox.setChecked(True)
+        self.replay_realtime_checkbox.setStyleSheet("color: #495057; font-weight: normal;")
+        camera_layout.addWidget(self.replay_realtime_checkbox)
+        
+        # 多相機同步：勾選的相機與目前鏡頭同時擷取、並排預覽並各自錄影
+        sync_label = QLabel('同步擷取的其他相機:')
+        sync_label.setStyleSheet("color: #495057; font-weight: normal;")
+        camera_layout.addWidget(sync_label)
+        self.sync_camera_list = QListWidget()
+        self.sync_camera_list.setMaximumHeight(90)
+        self.sync_camera_list.setToolTip('勾選的相機各自以獨立執行緒擷取，依時間戳記對齊後並排顯示；錄影時每台相機各存一個檔案')
+        self.sync_camera_list.setStyleSheet("""
+            QListWidget {
+                background-color: white;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+                color: #495057;
+                font-weight: normal;
+            }
+        """)
+        camera_layout.addWidget(self.sync_camera_list)
+        
+        sync_layout = QHBoxLayout()
+        tolerance_label = QLabel('對齊容許誤差:')
+        tolerance_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.sync_tolerance_spinbox = QSpinBox()
+        self.sync_tolerance_spinbox.setMinimum(1)
+        self.sync_tolerance_spinbox.setMaximum(200)
+        self.sync_tolerance_spinbox.setValue(20)
+        self.sync_tolerance_spinbox.setSuffix(' ms')
+        self.sync_tolerance_spinbox.setMinimumHeight(35)
+        self.sync_tolerance_spinbox.setStyleSheet("""
+            QSpinBox {
+                background-color: white;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+                padding: 5px;
+                color: #495057;
+                font-weight: normal;
+            }
+        """)
+        self.scan_cameras_btn = QPushButton('搜尋相機')
+        self.scan_cameras_btn.setMinimumHeight(35)
+        self.scan_cameras_btn.setToolTip('尋找其他已連接的 Webcam 與 RealSense')
+        self.scan_cameras_btn.setStyleSheet("""
+            QPushButton {
+                background-color: white;
+                color: #495057;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+                font-weight: normal;
+            }
+            QPushButton:hover {
+                border: 1px solid #80bdff;
+            }
+        """)
+        sync_layout.addWidget(tolerance_label)
+        sync_layout.addWidget(self.sync_tolerance_spinbox)
+        sync_layout.addWidget(self.scan_cameras_btn)
+        camera_layout.addLayout(sync_layout)
+        
+        # 待命相機：切換後舊相機持續串流，切回時不需重新開啟裝置
+        standby_layout = QHBoxLayout()
+        standby_label = QLabel('待命相機數:')
+        standby_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.standby_spinbox = QSpinBox()
+        self.standby_spinbox.setMinimum(0)
+        self.standby_spinbox.setMaximum(4)
+        self.standby_spinbox.setValue(0)
+        self.standby_spinbox.setSpecialValueText('關閉')
+        self.standby_spinbox.setMinimumHeight(35)
+        self.standby_spinbox.setToolTip('切換鏡頭後保持最近使用的相機持續串流，切回時幾乎無延遲；每台待命相機會佔用 USB 頻寬與記憶體')
+        self.standby_spinbox.setStyleSheet(self.sync_tolerance_spinbox.styleSheet())
+        standby_layout.addWidget(standby_label)
+        standby_layout.addWidget(self.standby_spinbox)
+        standby_layout.addStretch()
+        camera_layout.addLayout(standby_layout)
+        
         camera_group.setLayout(camera_layout)
         main_layout.addWidget(camera_group)
         
@@ -173,6 +256,67 @@ class CameraInterface(QFrame):
         resolution_layout.addWidget(self.resolution_combo)
         image_layout.addLayout(resolution_layout)
         
+        # RealSense 深度與紅外線串流 (其他相機無作用)
+        streams_layout = QHBoxLayout()
+        self.depth_checkbox = QCheckBox('深度')
+        self.depth_checkbox.setStyleSheet("color: #495057; font-weight: normal;")
+        self.depth_checkbox.setToolTip('啟用 RealSense 深度串流 (對齊至彩色影像)，錄影時另存 16 位元深度 PNG')
+        self.infrared_checkbox = QCheckBox('紅外線')
+        self.infrared_checkbox.setStyleSheet("color: #495057; font-weight: normal;")
+        streams_layout.addWidget(self.depth_checkbox)
+        streams_layout.addWidget(self.infrared_checkbox)
+        streams_layout.addStretch()
+        image_layout.addLayout(streams_layout)
+        
+        # 預覽顯示的串流
+        display_layout = QHBoxLayout()
+        display_label = QLabel('顯示:')
+        display_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.display_stream_combo = QComboBox()
+        self.display_stream_combo.addItem('彩色', 'color')
+        self.display_stream_combo.addItem('深度', 'depth')
+        self.display_stream_combo.addItem('紅外線', 'infrared')
+        self.display_stream_combo.setMinimumHeight(35)
+        self.display_stream_combo.setStyleSheet(self.resolution_combo.styleSheet())
+        display_layout.addWidget(display_label)
+        display_layout.addWidget(self.display_stream_combo)
+        image_layout.addLayout(display_layout)
+        
+        # 預覽更新率上限 (擷取與錄影不受影響)；0 表示依螢幕更新率
+        display_rate_layout = QHBoxLayout()
+        display_rate_label = QLabel('預覽幀率上限:')
+        display_rate_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.display_fps_spinbox = QSpinBox()
+        self.display_fps_spinbox.setMinimum(0)
+        self.display_fps_spinbox.setMaximum(240)
+        self.display_fps_spinbox.setValue(0)
+        self.display_fps_spinbox.setSuffix(' FPS')
+        self.display_fps_spinbox.setSpecialValueText('螢幕更新率')
+        self.display_fps_spinbox.setMinimumHeight(35)
+        self.display_fps_spinbox.setToolTip('預覽只顯示最新影格，超過上限的影格直接略過；視窗最小化時暫停預覽')
+        self.display_fps_spinbox.setStyleSheet(self.sync_tolerance_spinbox.styleSheet())
+        display_rate_layout.addWidget(display_rate_label)
+        display_rate_layout.addWidget(self.display_fps_spinbox)
+        display_rate_layout.addStretch()
+        image_layout.addLayout(display_rate_layout)
+        
+        # 點雲匯出 (需啟用深度串流)；點擊影像兩點可量測距離
+        self.export_pointcloud_btn = QPushButton('匯出點雲')
+        self.export_pointcloud_btn.setMinimumHeight(35)
+        self.export_pointcloud_btn.setToolTip('將目前畫面的深度轉為點雲並存成 PLY 或 NPY；在影像上點擊兩點可量測距離')
+        self.export_pointcloud_btn.setStyleSheet("""
+            QPushButton {
+                background-color: white;
+                color: #495057;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+            }
+            QPushButton:hover {
+                border: 1px solid #80bdff;
+            }
+        """)
+        image_layout.addWidget(self.export_pointcloud_btn)
+        
         image_group.setLayout(image_layout)
         main_layout.addWidget(image_group)
         
@@ -248,8 +392,70 @@ class CameraInterface(QFrame):
             }
         """)
         duration_layout.addRow(self.duration_label, self.duration_spinbox)
+        
+        # 預錄時間：按下錄影前保留的秒數 (0 表示關閉)
+        self.preroll_label = QLabel('預錄時間(秒):')
+        self.preroll_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.preroll_spinbox = QSpinBox()
+        self.preroll_spinbox.setMinimum(0)
+        self.preroll_spinbox.setMaximum(30)
+        self.preroll_spinbox.setValue(0)
+        self.preroll_spinbox.setSuffix(' 秒')
+        self.preroll_spinbox.setMinimumHeight(35)
+        self.preroll_spinbox.setToolTip('錄影檔會包含按下「開始錄影」前的畫面，記憶體用量上限 512 MB')
+        self.preroll_spinbox.setStyleSheet(self.duration_spinbox.styleSheet())
+        duration_layout.addRow(self.preroll_label, self.preroll_spinbox)
+        
+        # 分段長度：長時間錄影切成多個檔案 (0 表示不分段)
+        self.segment_label = QLabel('分段長度(秒):')
+        self.segment_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.segment_spinbox = QSpinBox()
+        self.segment_spinbox.setMinimum(0)
+        self.segment_spinbox.setMaximum(3600)
+        self.segment_spinbox.setSingleStep(60)
+        self.segment_spinbox.setValue(0)
+        self.segment_spinbox.setSuffix(' 秒')
+        self.segment_spinbox.setSpecialValueText('不分段')
+        self.segment_spinbox.setMinimumHeight(35)
+        self.segment_spinbox.setStyleSheet(self.duration_spinbox.styleSheet())
+        duration_layout.addRow(self.segment_label, self.segment_spinbox)
+        
+        # 編碼格式 (由 presenter 依 OpenCV 支援情況填入)
+        self.codec_label = QLabel('編碼格式:')
+        self.codec_label.setStyleSheet("color: #495057; font-weight: normal;")
+        self.codec_combo = QComboBox()
+        self.codec_combo.setMinimumHeight(35)
+        self.codec_combo.setStyleSheet(self.resolution_combo.styleSheet())
+        duration_layout.addRow(self.codec_label, self.codec_combo)
         recording_layout.addLayout(duration_layout)
         
+        # 量測各編碼格式在本機的編碼速度
+        self.codec_benchmark_btn = QPushButton('編碼效能測試')
+        self.codec_benchmark_btn.setMinimumHeight(35)
+        self.codec_benchmark_btn.setToolTip('以目前解析度測試各編碼格式的編碼速度與檔案大小，並推薦可即時編碼的格式')
+        self.codec_benchmark_btn.setStyleSheet("""
+            QPushButton {
+                background-color: white;
+                color: #495057;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+            }
+            QPushButton:hover {
+                border: 1px solid #80bdff;
+            }
+            QPushButton:disabled {
+                color: #adb5bd;
+            }
+        """)
+        recording_layout.addWidget(self.codec_benchmark_btn)
+        
+        # 將原始或分段錄影轉為 MP4 (背景執行)
+        self.transcode_btn = QPushButton('轉檔為 MP4')
+        self.transcode_btn.setMinimumHeight(35)
+        self.transcode_btn.setToolTip('選擇原始影格檔 (.adraw)、分段清單 (.segments.json) 或影片，於背景以多個行程轉檔')
+        self.transcode_btn.setStyleSheet(self.codec_benchmark_btn.styleSheet())
+        recording_layout.addWidget(self.transcode_btn)
+        
         recording_group.setLayout(recording_layout)
         main_layout.addWidget(recording_group)
         
@@ -284,6 +490,68 @@ class CameraInterface(QFrame):
         self.open_camera_btn.clicked.connect(self.on_open_camera)
         self.save_video_btn.clicked.connect(self.on_save_video)
         
+    def set_resolution_modes(self, modes, selected=0):
+        """以相機實際支援的模式更新解析度選單
+
+        Args:
+            modes: list of dicts with width, height, fps and format keys
+            selected: index of the entry to select
+        """
+        self.resolution_combo.blockSignals(True)
+        self.resolution_combo.clear()
+        for mode in modes:
+            text = f"{mode['width']}x{mode['height']}"
+            details = []
+            if mode.get('fps'):
+                details.append(f"{mode['fps']:g} FPS")
+            if mode.get('format'):
+                details.append(mode['format'])
+            if details:
+                text += f" ({' '.join(details)})"
+            self.resolution_combo.addItem(text, mode)
+        self.resolution_combo.setCurrentIndex(selected)
+        self.resolution_combo.blockSignals(False)
+    
+    def set_sync_cameras(self, camera_types, checked=()):
+        """填入可同步擷取的相機
+
+        Args:
+            camera_types: camera type names
+            checked: names to show as selected
+        """
+        self.sync_camera_list.blockSignals(True)
+        self.sync_camera_list.clear()
+        for camera_type in camera_types:
+            item = QListWidgetItem(camera_type)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if camera_type in checked else Qt.CheckState.Unchecked)
+            self.sync_camera_list.addItem(item)
+        self.sync_camera_list.blockSignals(False)
+    
+    def checked_sync_cameras(self):
+        """目前勾選的相機"""
+        return [
+            self.sync_camera_list.item(i).text()
+            for i in range(self.sync_camera_list.count())
+            if self.sync_camera_list.item(i).checkState() == Qt.CheckState.Checked
+        ]
+    
+    def set_codecs(self, codecs, selected=None):
+        """填入可用的編碼格式
+
+        Args:
+            codecs: list of video_codecs.Codec
+            selected: name of the codec to select
+        """
+        self.codec_combo.blockSignals(True)
+        self.codec_combo.clear()
+        for codec in codecs:
+            text = f"{codec.name} ({codec.description})" if codec.description else codec.name
+            self.codec_combo.addItem(text, codec.name)
+        index = self.codec_combo.findData(selected)
+        self.codec_combo.setCurrentIndex(max(index, 0))
+        self.codec_combo.blockSignals(False)
+    
     def on_open_camera(self):
         # 這裡放置開啟相機的程式碼
         if self.open_camera_btn.text() == '開啟相機':
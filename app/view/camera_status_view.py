@@ -86,6 +86,59 @@ class CameraStatusInterface(QFrame):
         basic_status_group.setLayout(basic_layout)
         main_layout.addWidget(basic_status_group)
         
+        # 效能監控群組
+        performance_group = QGroupBox('效能監控')
+        performance_group.setStyleSheet(basic_status_group.styleSheet())
+        performance_layout = QGridLayout()
+        performance_layout.setSpacing(10)
+        performance_layout.setContentsMargins(20, 20, 20, 20)
+        
+        # 各項量測值: (標籤, 屬性名稱)
+        performance_rows = [
+            ('擷取幀率：', 'capture_fps_value'),
+            ('顯示幀率：', 'display_fps_value'),
+            ('編碼幀率：', 'encode_fps_value'),
+            ('擷取延遲：', 'grab_latency_value'),
+            ('轉換延遲：', 'convert_latency_value'),
+            ('繪製延遲：', 'render_latency_value'),
+            ('編碼延遲：', 'encode_latency_value'),
+            ('佇列深度：', 'queue_depth_value'),
+            ('捨棄影格：', 'dropped_frames_value'),
+        ]
+        for row, (text, name) in enumerate(performance_rows):
+            value_label = self.create_value_label('—')
+            if name.endswith('_latency_value'):
+                value_label.setToolTip('p50 / p95 / p99')
+            setattr(self, name, value_label)
+            performance_layout.addWidget(self.create_status_label(text), row, 0)
+            performance_layout.addWidget(value_label, row, 1)
+        
+        performance_group.setLayout(performance_layout)
+        main_layout.addWidget(performance_group)
+        
+        # 影像品質群組 (降採樣影格的即時量測)
+        quality_group = QGroupBox('影像品質')
+        quality_group.setStyleSheet(basic_status_group.styleSheet())
+        quality_layout = QGridLayout()
+        quality_layout.setSpacing(10)
+        quality_layout.setContentsMargins(20, 20, 20, 20)
+        
+        quality_rows = [
+            ('清晰度：', 'sharpness_value', 'Laplacian 變異數，數值越高越清晰'),
+            ('曝光：', 'exposure_value', '平均亮度 / 中位數偏移 (-1 全黑 ~ +1 全白)'),
+            ('裁切像素：', 'clipping_value', '欠曝 / 過曝像素比例'),
+            ('動態：', 'motion_value', '與前一格的平均絕對差'),
+        ]
+        for row, (text, name, tooltip) in enumerate(quality_rows):
+            value_label = self.create_value_label('—')
+            value_label.setToolTip(tooltip)
+            setattr(self, name, value_label)
+            quality_layout.addWidget(self.create_status_label(text), row, 0)
+            quality_layout.addWidget(value_label, row, 1)
+        
+        quality_group.setLayout(quality_layout)
+        main_layout.addWidget(quality_group)
+        
         # 新增彈性空間
         main_layout.addStretch()
         
@@ -1,116 +1,254 @@
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QPixmap, QImage
+from PyQt6.QtCore import Qt, QSize, QRect, QPointF, pyqtSignal
+from PyQt6.QtGui import QColor, QImage, QPainter, QPen
 from PyQt6.QtWidgets import QLabel, QFrame
+import math
 import numpy as np
 
+from model.depth import DepthColorizer
+from model.logger import CONVERSION_ERRORS, counters, get_logger
+from model.preview import PreviewScaler
+from model.telemetry import RATE_DISPLAY, STAGE_CONVERT, STAGE_RENDER, telemetry
+
+
+log = get_logger("view.image")
+
 
 class ImageViewer(QLabel):
-    
+    # 點擊影像時以影像像素座標 (x, y) 發出
+    pixel_clicked = pyqtSignal(int, int)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setMinimumSize(QSize(640, 480))
         self.setFrameShape(QFrame.Shape.Box)
         self.setText("No Camera Feed")
-        self.setScaledContents(True)  # Changed to True for better display
-        self.original_pixmap = None
+        # The frame is painted directly in paintEvent, scaled exactly once
+        self.current_image = None
+        self._frame = None
+        self.smooth_scaling = True
+        # 大於顯示區域的影格先縮小再顯示；錄影仍使用原始影格
+        self.preview_scaler = PreviewScaler()
+        self.preview_size = (0, 0)
+        # 顯示中影格的原始尺寸，點擊座標依此換算
+        self.source_size = None
+        # 16 位元深度影像以查表上色
+        self.depth_colorizer = DepthColorizer()
+        # 量測標記 (影像像素座標) 與說明文字
+        self.markers = []
+        self.overlay_text = ""
+        # 多相機同步預覽：[(QImage, buffer, label)]，各自縮放到格狀區域
+        self.tiles = []
         # Set initial background
         self.setStyleSheet("background-color: #333; color: white; font-size: 16px;")
 
+    def image_rect(self):
+        """Area of the widget covered by the image, keeping its aspect ratio."""
+        if self.current_image is None:
+            return QRect()
+        return self._fit(self.current_image.size(), self.contentsRect())
+
+    @staticmethod
+    def _fit(size, area):
+        size = size.scaled(area.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        x = area.x() + (area.width() - size.width()) // 2
+        y = area.y() + (area.height() - size.height()) // 2
+        return QRect(x, y, size.width(), size.height())
+
+    def tile_rects(self):
+        """Cell of the widget assigned to each tile, in a near-square grid."""
+        count = len(self.tiles)
+        if count == 0:
+            return []
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        area = self.contentsRect()
+        width, height = area.width() // columns, area.height() // rows
+        return [
+            QRect(area.x() + (i % columns) * width, area.y() + (i // columns) * height, width, height)
+            for i in range(count)
+        ]
+
+    def _paint_tiles(self):
+        with telemetry.measure(STAGE_RENDER):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.smooth_scaling)
+            painter.setPen(QColor(255, 255, 255))
+            for (image, _, label), cell in zip(self.tiles, self.tile_rects()):
+                painter.drawImage(self._fit(image.size(), cell), image)
+                if label:
+                    painter.drawText(cell.adjusted(8, 8, -8, -8), Qt.AlignmentFlag.AlignLeft, label)
+            painter.end()
+        telemetry.mark(RATE_DISPLAY)
+
     def resizeEvent(self, event):
-        """Handle resize events to scale the image appropriately."""
         super().resizeEvent(event)
-        if self.original_pixmap is not None:
-            self.setPixmap(self._scale_pixmap())
-    
-    def _scale_pixmap(self):
-        """Scale the pixmap to fit the widget while maintaining aspect ratio."""
-        if self.original_pixmap is None:
-            return QPixmap()
-            
-        return self.original_pixmap.scaled(
-            self.size(),  # Use self.size() instead of width() and height()
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-    
+        # 以實體像素計算，高 DPI 螢幕上不會縮得比顯示解析度更小
+        ratio = self.devicePixelRatioF()
+        area = self.contentsRect()
+        self.preview_size = (int(area.width() * ratio), int(area.height() * ratio))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.tiles:
+            self._paint_tiles()
+            return
+        if self.current_image is None:
+            return
+        with telemetry.measure(STAGE_RENDER):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.smooth_scaling)
+            painter.drawImage(self.image_rect(), self.current_image)
+            if self.markers or self.overlay_text:
+                self._paint_overlay(painter)
+            painter.end()
+        telemetry.mark(RATE_DISPLAY)
+
+    def _to_widget(self, x, y):
+        rect = self.image_rect()
+        width, height = self.source_size
+        scale_x = rect.width() / width
+        scale_y = rect.height() / height
+        return QPointF(rect.x() + (x + 0.5) * scale_x, rect.y() + (y + 0.5) * scale_y)
+
+    def _paint_overlay(self, painter):
+        painter.setPen(QPen(QColor(255, 255, 0), 2))
+        points = [self._to_widget(x, y) for x, y in self.markers]
+        for point in points:
+            painter.drawEllipse(point, 5, 5)
+        if len(points) == 2:
+            painter.drawLine(points[0], points[1])
+        if self.overlay_text:
+            rect = self.image_rect()
+            painter.drawText(rect.adjusted(10, 10, -10, -10), Qt.AlignmentFlag.AlignLeft, self.overlay_text)
+
+    def set_markers(self, markers, text=""):
+        """Draw measurement markers (image pixel coordinates) and a caption over the image."""
+        self.markers = list(markers)
+        self.overlay_text = text
+        self.update()
+
+    def mousePressEvent(self, event):
+        if self.current_image is not None and event.button() == Qt.MouseButton.LeftButton:
+            rect = self.image_rect()
+            pos = event.position()
+            if rect.width() > 0 and rect.contains(pos.toPoint()):
+                width, height = self.source_size
+                x = int((pos.x() - rect.x()) * width / rect.width())
+                y = int((pos.y() - rect.y()) * height / rect.height())
+                self.pixel_clicked.emit(x, y)
+        super().mousePressEvent(event)
+
     def update_view(self, frame):
         """Update the displayed frame.
-        
+
+        The frame buffer is wrapped without copying or color conversion, so the
+        caller must keep it unchanged until the next call to update_view.
+
         Args:
-            frame: NumPy array containing the image data (RGB format)
+            frame: NumPy array containing the image data (BGR, BGRA, grayscale
+                or uint16 depth, which is colorized through ``depth_colorizer``)
         """
+        self.tiles = []
         if frame is None:
+            self.current_image = None
+            self._frame = None
             self.setText("No Camera Feed")
-            self.original_pixmap = None
-            print("Frame is None")
             return
-            
+
         try:
-            print(f"Frame shape: {frame.shape}, dtype: {frame.dtype}")
-            
-            # Ensure frame is in the correct format
-            if frame.dtype != np.uint8:
-                frame = frame.astype(np.uint8)
-                print("Converted frame to uint8")
-            
-            # Create pixmap from the frame
-            self.original_pixmap = self._narr2pixmap(frame)
-            
-            if self.original_pixmap.isNull():
-                print("Pixmap is null!")
-                self.setText("Error: Invalid pixmap")
+            source_size = (frame.shape[1], frame.shape[0])
+            with telemetry.measure(STAGE_CONVERT):
+                # 先縮小再上色，查表只處理顯示所需的像素
+                frame = self.preview_scaler.scale(frame, self.preview_size)
+                if frame.dtype == np.uint16 and frame.ndim == 2:
+                    frame = self.depth_colorizer.colorize(frame)
+                image, buffer = self._narr2qimage(frame)
+            if image.isNull():
+                self.setText("Error: Invalid image")
                 return
-                
-            # Set the pixmap
-            self.setPixmap(self._scale_pixmap())
-            print(f"Pixmap set: {self.original_pixmap.width()}x{self.original_pixmap.height()}")
-            
+
+            if self.current_image is None:
+                self.setText("")
+            # Keep a reference so the wrapped buffer outlives the QImage
+            self._frame = buffer
+            self.current_image = image
+            self.source_size = source_size
+            self.update()
+
         except Exception as e:
-            print(f"Error updating view: {e}")
-            import traceback
-            traceback.print_exc()
+            counters.incr(CONVERSION_ERRORS)
+            log.exception("Error updating view: %s", e)
+            self.current_image = None
+            self._frame = None
             self.setText(f"Error: {str(e)}")
 
-    @staticmethod
-    def _narr2pixmap(narr): 
-        """Convert numpy array to QPixmap
-        
+    def update_tiles(self, frames, labels=None):
+        """Show several frames side by side in a grid (multi-camera preview).
+
+        Like update_view, the buffers are wrapped without copying and must
+        stay unchanged until the next update. Measurement clicks are disabled
+        while tiles are shown.
+
         Args:
-            narr: numpy array in RGB format
-            
-        Returns:
-            QPixmap object
+            frames: list of NumPy arrays (same formats as update_view)
+            labels: optional caption per frame
         """
-        if narr is None:
-            return QPixmap()
-            
+        labels = labels or [""] * len(frames)
+        tiles = []
+        columns = math.ceil(math.sqrt(len(frames))) if frames else 1
+        rows = math.ceil(len(frames) / columns) if frames else 1
+        cell_size = (self.preview_size[0] // columns, self.preview_size[1] // rows)
         try:
-            height, width, channel = narr.shape
-            
-            # Ensure the array is contiguous
-            if not narr.flags['C_CONTIGUOUS']:
-                narr = np.ascontiguousarray(narr)
-                print("Made array contiguous")
-            
-            bytes_per_line = channel * width
-            
-            # Create QImage with the correct format
-            if channel == 3:
-                q_img = QImage(narr.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            elif channel == 4:
-                q_img = QImage(narr.data, width, height, bytes_per_line, QImage.Format.Format_RGBA8888)
-            else:
-                raise ValueError(f"Unsupported number of channels: {channel}")
-            
-            # Convert to pixmap
-            pixmap = QPixmap.fromImage(q_img)
-            print(f"Created pixmap: {pixmap.width()}x{pixmap.height()}, null: {pixmap.isNull()}")
-            
-            return pixmap
-            
+            with telemetry.measure(STAGE_CONVERT):
+                for slot, (frame, label) in enumerate(zip(frames, labels)):
+                    frame = self.preview_scaler.scale(frame, cell_size, slot)
+                    if frame.dtype == np.uint16 and frame.ndim == 2:
+                        # 上色結果會在下一格重用，多格深度需各自保留一份
+                        frame = self.depth_colorizer.colorize(frame).copy()
+                    image, buffer = self._narr2qimage(frame)
+                    if not image.isNull():
+                        tiles.append((image, buffer, label))
         except Exception as e:
-            print(f"Error in _narr2pixmap: {e}")
-            import traceback
-            traceback.print_exc()
-            return QPixmap()
\ No newline at end of file
+            counters.incr(CONVERSION_ERRORS)
+            log.exception("Error updating tiles: %s", e)
+            return
+        if not tiles:
+            return
+        if self.current_image is None and not self.tiles:
+            self.setText("")
+        self.current_image = None
+        self._frame = None
+        self.tiles = tiles
+        self.update()
+
+    @staticmethod
+    def _narr2qimage(narr):
+        """Wrap a numpy array in a QImage without copying
+
+        Args:
+            narr: numpy array in BGR, BGRA or grayscale format
+
+        Returns:
+            (QImage, array) - the image shares the returned array's memory
+        """
+        if narr.dtype != np.uint8:
+            narr = narr.astype(np.uint8)
+        if not narr.flags['C_CONTIGUOUS']:
+            narr = np.ascontiguousarray(narr)
+
+        height, width = narr.shape[:2]
+        channel = narr.shape[2] if narr.ndim == 3 else 1
+        bytes_per_line = narr.strides[0]
+
+        if channel == 3:
+            image_format = QImage.Format.Format_BGR888
+        elif channel == 4:
+            # BGRA byte order equals ARGB32 on little-endian machines
+            image_format = QImage.Format.Format_ARGB32
+        elif channel == 1:
+            image_format = QImage.Format.Format_Grayscale8
+        else:
+            raise ValueError(f"Unsupported number of channels: {channel}")
+
+        return QImage(narr.data, width, height, bytes_per_line, image_format), narr
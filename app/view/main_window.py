@@ -6,6 +6,7 @@ from .image_view import ImageViewer
 from .camera_status_view import CameraStatusInterface
 from .camera_panel_view import CameraInterface
 from .info_entry_view import InfoEntryPanel
+from .analysis_view import AnalysisInterface
 
 
 class MainWindow(QMainWindow):
@@ -44,11 +45,9 @@ class MainWindow(QMainWindow):
         status_layout.addWidget(QLabel("相機狀態將在此處顯示"))
         self.tab_widget.addTab(self.status_panel, "相機狀態")
 
-        # Example: Add an analysis panel
-        analysis_panel = QWidget()
-        analysis_layout = QVBoxLayout(analysis_panel)
-        analysis_layout.addWidget(QLabel("分析結果將在此處顯示"))
-        self.tab_widget.addTab(analysis_panel, "分析")
+        # 即時分析模組與結果
+        self.analysis_panel = AnalysisInterface()
+        self.tab_widget.addTab(self.analysis_panel, "分析")
 
         # Example: Add a settings panel
         settings_panel = QWidget()
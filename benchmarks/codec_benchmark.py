@@ -0,0 +1,55 @@
+"""Encode throughput and output size of every recording codec on this machine.
+
+Each codec available in the local OpenCV build encodes the same synthetic
+frames at each resolution; the report lists encode fps and bytes per frame
+and recommends, per resolution, the codec that sustains the requested rate.
+
+Usage:
+    python benchmarks/codec_benchmark.py --resolutions 1920x1080,3840x2160 --fps 30
+"""
+import argparse
+import json
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+from model.video_codecs import available_codecs, benchmark_codecs, recommend_codec
+
+
+def parse_resolutions(text):
+    return [tuple(map(int, item.lower().split('x'))) for item in text.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', default='640x480,1280x720,1920x1080,3840x2160',
+                        help='comma separated WIDTHxHEIGHT list')
+    parser.add_argument('--fps', type=float, default=30, help='rate the recording has to sustain')
+    parser.add_argument('--frames', type=int, default=60, help='frames encoded per codec and resolution')
+    parser.add_argument('--codecs', help='comma separated codec names (default: all available)')
+    parser.add_argument('--output', metavar='PATH', help='write the results as JSON')
+    args = parser.parse_args(argv)
+
+    codecs = args.codecs.split(',') if args.codecs else available_codecs()
+    resolutions = parse_resolutions(args.resolutions)
+    results = benchmark_codecs(resolutions, args.frames, args.fps, codecs)
+
+    print(f"{'codec':<8}{'resolution':>12}{'encode fps':>12}{'KB/frame':>10}  realtime")
+    for r in results:
+        print(f"{r['codec']:<8}{r['width']:>6}x{r['height']:<5}{r['encode_fps']:>12.1f}"
+              f"{r['bytes_per_frame'] / 1024:>10.0f}  {'yes' if r['realtime'] else 'no'}")
+    recommendations = {}
+    for width, height in resolutions:
+        recommendations[f"{width}x{height}"] = recommend_codec(results, width, height, args.fps)
+        print(f"Recommended for {width}x{height} @ {args.fps:g} fps: {recommendations[f'{width}x{height}']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'fps': args.fps, 'results': results, 'recommended': recommendations}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""Headless benchmark of the capture → display → record pipeline.
+
+Runs without a camera or a visible window: a synthetic frame source feeds
+CameraDevice, frames go through the same conversion and paint path as
+ImageViewer on Qt's offscreen platform, and VideoRecorder encodes them into a
+temporary directory. Results can be stored as a baseline and later runs
+compared against it.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --resolutions 640x480,1920x1080
+    python benchmarks/pipeline_benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmarks/pipeline_benchmark.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows 沒有 resource 模組，報告中省略 max_rss_mb
+    resource = None
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtWidgets import QApplication
+
+from model.camera import CameraDevice, VideoRecorder
+from model.sources import SyntheticCamera
+from model.telemetry import STAGE_GRAB, LatencyTracker, telemetry
+from view.image_view import ImageViewer
+
+
+# 數值越高越好 / 越低越好的指標，用於與基準比較
+HIGHER_IS_BETTER = ("capture_fps", "display_fps", "encode_fps", "pipeline_display_fps", "pipeline_record_fps")
+LOWER_IS_BETTER = ("grab_p95_ms", "display_p95_ms", "encode_p95_ms", "pipeline_p95_ms", "peak_alloc_mb")
+
+
+def _percentile_ms(tracker, point=95):
+    values = tracker.percentiles((point,))
+    return round(values[point], 3) if values else None
+
+
+def _make_device(width, height, fps):
+    device = CameraDevice(camera_type="Synthetic")
+    device.set_mode(width, height, fps)
+    return device
+
+
+def bench_capture(width, height, fps, seconds):
+    """Throughput of CameraDevice's capture thread alone."""
+    device = _make_device(width, height, fps)
+    telemetry.reset()
+
+    def on_frame():
+        for frame in device.drain_frames():
+            device.release_frame(frame)
+
+    device.start_capture(on_frame)
+    time.sleep(seconds)
+    device.stop_capture()
+    captured = device.get_capture_stats()['frames_captured']
+    device.release()
+    return {
+        'capture_fps': round(captured / seconds, 2),
+        'grab_p95_ms': _percentile_ms(telemetry.latencies[STAGE_GRAB]),
+    }
+
+
+def bench_display(viewer, frames):
+    """Cost of wrapping a BGR frame and painting it in ImageViewer."""
+    latency = LatencyTracker(len(frames))
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        viewer.update_view(frame)
+        viewer.repaint()
+        latency.add(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    viewer.update_view(None)
+    return {'display_fps': round(len(frames) / elapsed, 2), 'display_p95_ms': _percentile_ms(latency)}
+
+
+def bench_record(frames, width, height, fps, directory):
+    """Encode throughput of VideoRecorder including the final flush."""
+    # 預先產生的影格沒有擷取時間，關閉節拍以量測純編碼吞吐量
+    recorder = VideoRecorder(queue_size=len(frames), backpressure="block", pacing=False)
+    recorder.set_config(os.path.join(directory, f"bench_{width}x{height}.mp4"), width, height, fps or 30)
+    start = time.perf_counter()
+    recorder.start()
+    for frame in frames:
+        recorder.record_frame(frame)
+    recorder.stop(wait=True)
+    elapsed = time.perf_counter() - start
+    written = recorder.get_stats()['written']
+    return {'encode_fps': round(written / elapsed, 2)}
+
+
+def bench_pipeline(viewer, width, height, fps, seconds, directory):
+    """End-to-end loop: capture thread → newest frame displayed → every frame recorded."""
+    device = _make_device(width, height, fps)
+    recorder = VideoRecorder(pacing=bool(fps))
+    recorder.retain_frame = device.retain_frame
+    recorder.release_frame = device.release_frame
+    recorder.set_config(os.path.join(directory, f"pipeline_{width}x{height}.mp4"), width, height, fps or 30)
+    latency = LatencyTracker(100000)
+    displayed = 0
+    shown = None
+
+    device.start_capture()
+    recorder.start()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frames = device.drain_frames()
+        if not frames:
+            time.sleep(0.001)
+            continue
+        t0 = time.perf_counter()
+        for frame in frames:
+            recorder.record_frame(frame)
+        device.retain_frame(frames[-1])
+        viewer.update_view(frames[-1].image)
+        viewer.repaint()
+        if shown is not None:
+            device.release_frame(shown)
+        shown = frames[-1]
+        for frame in frames:
+            device.release_frame(frame)
+        latency.add(time.perf_counter() - t0)
+        displayed += 1
+    device.stop_capture()
+    recorder.stop(wait=True)
+    viewer.update_view(None)
+    device.release_frame(shown)
+    stats = recorder.get_stats()
+    device.release()
+    return {
+        'pipeline_display_fps': round(displayed / seconds, 2),
+        'pipeline_record_fps': round(stats['written'] / seconds, 2),
+        'pipeline_dropped': stats['dropped'],
+        'pipeline_p95_ms': _percentile_ms(latency),
+    }
+
+
+def bench_allocations(viewer, frames, width, height, fps, seconds, directory):
+    """Peak traced allocation of the display, record and pipeline stages.
+
+    Runs as a separate pass after the timed stages: tracing slows down every
+    Python allocation, so its timings are discarded.
+    """
+    tracemalloc.start()
+    try:
+        bench_display(viewer, frames)
+        bench_record(frames, width, height, fps, directory)
+        bench_pipeline(viewer, width, height, fps, seconds, directory)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'peak_alloc_mb': round(peak / 2 ** 20, 1)}
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 回報位元組，Linux 回報 KB
+    return round(rss / 2 ** 20 if sys.platform == 'darwin' else rss / 1024, 1)
+
+
+def run(resolutions, fps, seconds, frames_per_stage):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    viewer = ImageViewer()
+    viewer.resize(1150, 650)
+    viewer.show()
+    app.processEvents()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in resolutions:
+            key = f"{width}x{height}"
+            source = SyntheticCamera(width, height, 0)
+            source.start()
+            frames = [source.get_frame().copy() for _ in range(frames_per_stage)]
+
+            result = {}
+            result.update(bench_capture(width, height, fps, seconds))
+            result.update(bench_display(viewer, frames))
+            result.update(bench_record(frames, width, height, fps, directory))
+            result.update(bench_pipeline(viewer, width, height, fps, seconds, directory))
+            result.update(bench_allocations(viewer, frames, width, height, fps, seconds, directory))
+            results[key] = result
+            print(f"{key}: {json.dumps(result)}", flush=True)
+
+    report = {'fps': fps, 'seconds': seconds, 'results': results}
+    max_rss_mb = _max_rss_mb()
+    if max_rss_mb is not None:
+        report['max_rss_mb'] = max_rss_mb
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of metrics that regressed by more than ``tolerance``."""
+    regressions = []
+    for key, result in report['results'].items():
+        reference = baseline.get('results', {}).get(key)
+        if not reference:
+            continue
+        for metric, value in result.items():
+            old = reference.get(metric)
+            if value is None or not old:
+                continue
+            if metric in HIGHER_IS_BETTER and value < old * (1 - tolerance):
+                regressions.append(f"{key} {metric}: {value} < {old}")
+            elif metric in LOWER_IS_BETTER and value > old * (1 + tolerance):
+                regressions.append(f"{key} {metric}: {value} > {old}")
+    return regressions
+
+
+def parse_resolutions(text):
+    return [tuple(map(int, item.lower().split('x'))) for item in text.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', default='640x480,1280x720,1920x1080',
+                        help='comma separated WIDTHxHEIGHT list')
+    parser.add_argument('--fps', type=float, default=30, help='synthetic source rate, 0 = unthrottled')
+    parser.add_argument('--seconds', type=float, default=3.0, help='duration of the timed stages')
+    parser.add_argument('--frames', type=int, default=60, help='frames for the display and encode stages')
+    parser.add_argument('--save-baseline', metavar='PATH', help='write the results as a baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a stored baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed relative regression')
+    parser.add_argument('--output', metavar='PATH', help='write the full report as JSON')
+    args = parser.parse_args(argv)
+
+    report = run(parse_resolutions(args.resolutions), args.fps, args.seconds, args.frames)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())